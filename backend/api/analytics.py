@@ -1,21 +1,27 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
-from ..database.session import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..database.session import get_async_read_db
 from ..database.schema import Prediction
+from ..database.aggregates import read_dimension, BUCKET_LABELS
 from sqlalchemy import func
+from .response_cache import VersionedCacheRoute
 
-router = APIRouter(prefix="/analytics", tags=["Analytics"])
+# Responses are cached per data version and served with ETags;
+# see response_cache.VersionedCacheRoute. Each endpoint runs its *_query
+# function on the async read session, so waiting on SQLite never blocks
+# the event loop.
+router = APIRouter(prefix="/analytics", tags=["Analytics"], route_class=VersionedCacheRoute)
 
-@router.get("/summary")
-def analytics_summary(db: Session = Depends(get_db)):
+def analytics_summary_query(db: Session):
 
-    total = db.query(Prediction).count()
+    row = read_dimension(db, "all").get("all")
 
-    high_risk_query = db.query(Prediction).filter(Prediction.probability > 0.5)
-    high_risk = high_risk_query.count()
+    total = row.total if row else 0
+    high_risk = row.churn if row else 0
 
-    # Calculate Revenue at Risk (Sum of MonthlyCharges for likely churners)
-    revenue_at_risk = db.query(func.sum(Prediction.monthly_charges)).filter(Prediction.probability > 0.5).scalar() or 0.0
+    # Revenue at Risk (Sum of MonthlyCharges for likely churners)
+    revenue_at_risk = row.revenue_at_risk if row else 0.0
 
     churn_rate = (high_risk / total) * 100 if total else 0
 
@@ -26,57 +32,43 @@ def analytics_summary(db: Session = Depends(get_db)):
         "churn_rate": round(churn_rate, 2)
     }
 
-@router.get("/probability_distribution")
-def probability_distribution(db: Session = Depends(get_db)):
-    probs = [p.probability for p in db.query(Prediction).all()]
-
-    buckets = [
-        {"bucket": "0–0.2", "count": 0},
-        {"bucket": "0.2–0.4", "count": 0},
-        {"bucket": "0.4–0.6", "count": 0},
-        {"bucket": "0.6–0.8", "count": 0},
-        {"bucket": "0.8–1.0", "count": 0},
-    ]
-
-    for p in probs:
-        if p <= 0.2: buckets[0]["count"] += 1
-        elif p <= 0.4: buckets[1]["count"] += 1
-        elif p <= 0.6: buckets[2]["count"] += 1
-        elif p <= 0.8: buckets[3]["count"] += 1
-        else: buckets[4]["count"] += 1
+@router.get("/summary")
+async def analytics_summary(db: AsyncSession = Depends(get_async_read_db)):
+    return await db.run_sync(analytics_summary_query)
 
-    return buckets
 
-@router.get("/churn_by_contract")
-def churn_by_contract(db: Session = Depends(get_db)):
+def probability_distribution_query(db: Session):
+    counts = read_dimension(db, "probability_bucket")
 
-    rows = db.query(Prediction).all()
+    return [
+        {"bucket": b, "count": counts[b].total if b in counts else 0}
+        for b in BUCKET_LABELS
+    ]
 
-    result = {
-        "Month-to-month": {"churn": 0, "total": 0},
-        "One year": {"churn": 0, "total": 0},
-        "Two year": {"churn": 0, "total": 0},
-    }
+@router.get("/probability_distribution")
+async def probability_distribution(db: AsyncSession = Depends(get_async_read_db)):
+    return await db.run_sync(probability_distribution_query)
 
-    for r in rows:
-        if r.contract not in result:
-            continue
 
-        result[r.contract]["total"] += 1
+def churn_by_contract_query(db: Session):
 
-        if r.label == "Likely to Churn":
-            result[r.contract]["churn"] += 1
+    counts = read_dimension(db, "contract")
 
     # convert to chart-friendly format
     output = []
-    for k, v in result.items():
-        churn_rate = (v["churn"] / v["total"]) * 100 if v["total"] else 0
+    for k in ["Month-to-month", "One year", "Two year"]:
+        v = counts.get(k)
+        churn_rate = (v.churn / v.total) * 100 if v and v.total else 0
         output.append({"contract": k, "churn_rate": round(churn_rate, 2)})
 
     return output
 
-@router.get("/top_risk")
-def top_risk(db: Session = Depends(get_db)):
+@router.get("/churn_by_contract")
+async def churn_by_contract(db: AsyncSession = Depends(get_async_read_db)):
+    return await db.run_sync(churn_by_contract_query)
+
+
+def top_risk_query(db: Session):
 
     rows = (
         db.query(Prediction)
@@ -96,9 +88,12 @@ def top_risk(db: Session = Depends(get_db)):
         for r in rows
     ]
 
+@router.get("/top_risk")
+async def top_risk(db: AsyncSession = Depends(get_async_read_db)):
+    return await db.run_sync(top_risk_query)
+
 
-@router.get("/scatter_data")
-def scatter_data(db: Session = Depends(get_db)):
+def scatter_data_query(db: Session):
     # Sample 500 points for performance
     rows = (
         db.query(Prediction.tenure, Prediction.monthly_charges, Prediction.probability, Prediction.label)
@@ -115,72 +110,57 @@ def scatter_data(db: Session = Depends(get_db)):
         for r in rows
     ]
 
+@router.get("/scatter_data")
+async def scatter_data(db: AsyncSession = Depends(get_async_read_db)):
+    return await db.run_sync(scatter_data_query)
 
-@router.get("/trend_by_tenure")
-def trend_by_tenure(db: Session = Depends(get_db)):
-    # Get granular data first
-    raw_results = (
-        db.query(Prediction.tenure, func.avg(Prediction.monthly_charges).label("avg_charges"))
+
+def trend_by_tenure_query(db: Session):
+    # Average charges per tenure month, then averaged into 6-month bins
+    # (1-6, 7-12, ...) - both levels in one query, served by the
+    # (tenure, monthly_charges) covering index. Tenure 0 is skipped.
+    per_tenure = (
+        db.query(Prediction.tenure.label("tenure"), func.avg(Prediction.monthly_charges).label("avg_charges"))
+        .filter(Prediction.tenure != 0)
         .group_by(Prediction.tenure)
-        .order_by(Prediction.tenure)
+        .subquery()
+    )
+    bucket_idx = ((per_tenure.c.tenure - 1) // 6).label("bucket_idx")
+
+    rows = (
+        db.query(bucket_idx, func.avg(per_tenure.c.avg_charges).label("avg_charges"))
+        .group_by(bucket_idx)
+        .order_by(bucket_idx)
         .all()
     )
-    
-    # Bin into 6-month intervals in Python
-    # e.g., 1-6, 7-12, 13-18...
-    bins = {}
-    
-    for r in raw_results:
-        if r.tenure == 0: continue # Skip 0 tenure if exists
-        
-        # Calculate bucket index (0 for 1-6, 1 for 7-12, etc.)
-        bucket_idx = (r.tenure - 1) // 6
-        bucket_label = f"{bucket_idx * 6 + 1}-{bucket_idx * 6 + 6}m"
-        
-        if bucket_label not in bins:
-            bins[bucket_label] = {"sum": 0, "count": 0, "sort_key": bucket_idx}
-            
-        bins[bucket_label]["sum"] += r.avg_charges
-        bins[bucket_label]["count"] += 1
-        
-    # Average the buckets
-    output = []
-    for label, data in bins.items():
-        output.append({
-            "tenure": label,
-            "avg_charges": round(data["sum"] / data["count"], 2),
-            "_sort": data["sort_key"]
-        })
-        
-    # Sort by time
-    output.sort(key=lambda x: x["_sort"])
-    
-    return [{"tenure": x["tenure"], "avg_charges": x["avg_charges"]} for x in output]
 
-@router.get("/payment_stats")
-def payment_stats(db: Session = Depends(get_db)):
-    rows = db.query(Prediction).all()
-    
-    stats = {}
-    
-    for r in rows:
-        # Check if payment_method column exists/is populated. 
-        # Since we just added it, old rows might have None. Handle gracefully.
-        pm = r.payment_method or "Unknown"
-        if pm not in stats:
-            stats[pm] = {"churn": 0, "total": 0}
-            
-        stats[pm]["total"] += 1
-        if r.label == "Likely to Churn":
-            stats[pm]["churn"] += 1
-            
+    return [
+        {
+            "tenure": f"{r.bucket_idx * 6 + 1}-{r.bucket_idx * 6 + 6}m",
+            "avg_charges": round(r.avg_charges, 2)
+        }
+        for r in rows
+    ]
+
+@router.get("/trend_by_tenure")
+async def trend_by_tenure(db: AsyncSession = Depends(get_async_read_db)):
+    return await db.run_sync(trend_by_tenure_query)
+
+
+def payment_stats_query(db: Session):
+    stats = read_dimension(db, "payment_method")
+
     output = []
     for k, v in stats.items():
-        churn_rate = (v["churn"] / v["total"]) * 100 if v["total"] else 0
+        churn_rate = (v.churn / v.total) * 100 if v.total else 0
         output.append({
             "name": k,
-            "value": v["total"], 
+            "value": v.total,
             "churn_rate": round(churn_rate, 2)
         })
-        
+
     return output
+
+@router.get("/payment_stats")
+async def payment_stats(db: AsyncSession = Depends(get_async_read_db)):
+    return await db.run_sync(payment_stats_query)
@@ -1,142 +1,160 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Query
-from fastapi.responses import StreamingResponse
+from fastapi.responses import FileResponse
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 import pandas as pd
-import io
+import asyncio
+import os
+import tempfile
+import time
 
-from ..utils.model_loader import load_model
 from ..database.session import get_db
-from ..database.schema import Prediction
-from ..utils.ai_helper import summarize_batch
+from ..database.schema import BatchJob
+from ..utils.explainer import schedule_summary, summary_status
+from ..utils.batch_scoring import score_csv, NoRowsError, DEFAULT_CHUNK_SIZE
+from ..utils import jobs
 
 router = APIRouter(prefix="/predict", tags=["Batch Prediction"])
 
 
+# Plain `def` so FastAPI runs it in the threadpool instead of on the event loop;
+# large uploads should go through the /batch/jobs endpoints below.
 @router.post("/batch")
-async def batch_predict(
+def batch_predict(
     file: UploadFile = File(...),
     db: Session = Depends(get_db),
-    download: bool = Query(False)    # << NEW toggle
+    download: bool = Query(False),    # << NEW toggle
+    chunk_size: int = Query(DEFAULT_CHUNK_SIZE, ge=100, le=1_000_000)
 ):
     if not file.filename.endswith(".csv"):
         raise HTTPException(400, "Please upload a CSV file")
 
-    try:
-        df = pd.read_csv(file.file)
-    except Exception:
-        raise HTTPException(400, "Could not read CSV file")
-
-    required = [
-        "customerID","gender","SeniorCitizen","Partner","Dependents","tenure",
-        "PhoneService","MultipleLines","InternetService","OnlineSecurity",
-        "OnlineBackup","DeviceProtection","TechSupport","StreamingTV",
-        "StreamingMovies","Contract","PaperlessBilling","PaymentMethod",
-        "MonthlyCharges","TotalCharges"
-    ]
-
-    defaults = {
-        "gender":"Female","SeniorCitizen":0,"Partner":"No","Dependents":"No",
-        "tenure":0,"PhoneService":"Yes","MultipleLines":"No","InternetService":"DSL",
-        "OnlineSecurity":"No","OnlineBackup":"No","DeviceProtection":"No",
-        "TechSupport":"No","StreamingTV":"No","StreamingMovies":"No",
-        "PaperlessBilling":"Yes","TotalCharges":0
-    }
-
-    auto_filled = []
-
-    # 1. Fill missing columns with defaults
-    for col in required:
-        if col not in df.columns:
-            df[col] = defaults.get(col, None)
-            auto_filled.append(col)
-
-    # 2. Robust NaN filling for Categorical columns
-    # Select object columns that are in 'required' to avoid touching extra columns unnecessarily, 
-    # OR just touch everything relevant.
-    cat_cols = [c for c in required if c in df.columns and df[c].dtype == 'object']
-    for c in cat_cols:
-        # Fill NaN with empty string or mode-like default? 
-        # The model likely expects "No", "DSL" etc. Empty string might be treated as new category.
-        # Let's fill with defaults entry if available, else "No".
-        default_val = defaults.get(c, "No")
-        df[c] = df[c].fillna(default_val).astype(str).str.strip()
-
-    X = df[required].copy()
-
-    # 3. Robust NaN filling for Numeric columns
-    X["SeniorCitizen"] = pd.to_numeric(X["SeniorCitizen"], errors="coerce").fillna(0).astype(int)
-    X["tenure"] = pd.to_numeric(X["tenure"], errors="coerce").fillna(0).astype(int)
-    X["MonthlyCharges"] = pd.to_numeric(X["MonthlyCharges"], errors="coerce").fillna(0.0)
-    
-    # Calculate TotalCharges cleanly
-    # First coerce existing TotalCharges
-    X["TotalCharges"] = pd.to_numeric(X["TotalCharges"], errors="coerce")
-    # Then fill NaNs with Monthly * Tenure
-    mask_nan_total = X["TotalCharges"].isna()
-    X.loc[mask_nan_total, "TotalCharges"] = X.loc[mask_nan_total, "MonthlyCharges"] * X.loc[mask_nan_total, "tenure"]
-    # Final cleanup just in case
-    X["TotalCharges"] = X["TotalCharges"].fillna(0.0)
-
-    model = load_model()
-    probs = model.predict_proba(X)[:, 1]
-
-    df["churn_probability"] = probs
-    df["prediction_label"] = (df["churn_probability"] > 0.5).map(
-        {True: "Likely to Churn", False: "Safe Customer"}
-    )
-
-    results = []
-
-    for i, prob in enumerate(probs):
-        label = df["prediction_label"][i]
-
-        db.add(
-            Prediction(
-                customer_id=str(df["customerID"][i]),
-                tenure=int(X["tenure"][i]),
-                monthly_charges=float(X["MonthlyCharges"][i]),
-                contract=str(X["Contract"][i]),
-                payment_method=str(X["PaymentMethod"][i]), # <--- Added
-                probability=float(prob),
-                label=label,
-            )
-        )
-
-        results.append({
-            "row": int(i),
-            "customer_id": str(df["customerID"][i]),
-            "probability": round(float(prob), 3),
-            "label": label
-        })
-
-    db.commit()
-
-    # ---------- AI SUMMARY ----------
-    stats = {
-        "total_rows": len(results),
-        "likely_churn": int(sum(r["label"] == "Likely to Churn" for r in results)),
-        "safe": int(sum(r["label"] == "Safe Customer" for r in results)),
-    }
+    # Scored rows are streamed to a temp file chunk by chunk, so memory
+    # stays bounded by chunk_size rather than the upload size.
+    out = None
+    if download:
+        out = tempfile.NamedTemporaryFile("w", delete=False, suffix=".csv", newline="")
 
-    summary = summarize_batch(stats)
+    try:
+        result = score_csv(file.file, db, out=out, chunk_size=chunk_size, profile=not download)
+    except Exception as e:
+        if out is not None:
+            out.close()
+            os.remove(out.name)
+        if isinstance(e, (pd.errors.ParserError, pd.errors.EmptyDataError, UnicodeDecodeError)):
+            raise HTTPException(400, "Could not read CSV file")
+        if isinstance(e, NoRowsError):
+            raise HTTPException(400, "CSV file has no rows")
+        raise
 
     # ---------- CSV DOWNLOAD MODE ----------
+    # No summary here: the file is the whole response.
     if download:
-        buffer = io.StringIO()
-        df.to_csv(buffer, index=False)
-        buffer.seek(0)
-
-        return StreamingResponse(
-            buffer,
+        out.close()
+        return FileResponse(
+            out.name,
             media_type="text/csv",
-            headers={"Content-Disposition": "attachment; filename=churn_predictions.csv"},
+            filename="churn_predictions.csv",
+            background=BackgroundTask(os.remove, out.name),
         )
 
     # ---------- NORMAL JSON RESPONSE ----------
+    # The LLM summary of the segment profile is generated in the
+    # background; poll GET /predict/batch/summary/{summary_key} for it.
+    profile = result.segments.profile()
+    summary_key, summary_status, summary = schedule_summary(profile)
+
     return {
-        "processed": len(results),
-        "results_preview": results[:10],
+        "processed": result.processed,
+        "results_preview": result.preview,
+        "segments": profile,
+        "summary_key": summary_key,
+        "summary_status": summary_status,
         "summary": summary,
-        "auto_filled_columns": auto_filled,
+        "auto_filled_columns": result.auto_filled,
+        "persistence": result.persistence.to_dict(),
         "message": "Batch prediction completed successfully."
     }
+
+
+@router.get("/batch/summary/{summary_key}")
+async def get_batch_summary(
+    summary_key: str,
+    wait: float = Query(0, ge=0, le=30),   # long-poll up to `wait` seconds
+):
+    deadline = time.monotonic() + wait
+
+    while True:
+        status, summary = await run_in_threadpool(summary_status, summary_key)
+        if status != "pending" or time.monotonic() >= deadline:
+            break
+        await asyncio.sleep(0.25)
+
+    if status == "unknown":
+        raise HTTPException(404, "Summary not found")
+    return {"summary_key": summary_key, "summary_status": status, "summary": summary}
+
+
+# =========================================================
+# BACKGROUND BATCH JOBS
+# =========================================================
+def _get_job(job_id: str, db: Session):
+    job = db.get(BatchJob, job_id)
+    if not job:
+        raise HTTPException(404, "Job not found")
+    return job
+
+
+@router.post("/batch/jobs", status_code=202)
+def submit_batch_job(
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    chunk_size: int = Query(DEFAULT_CHUNK_SIZE, ge=100, le=1_000_000)
+):
+    if not file.filename.endswith(".csv"):
+        raise HTTPException(400, "Please upload a CSV file")
+
+    job = jobs.create_job(db, file.file, file.filename, chunk_size)
+    return jobs.job_to_dict(job)
+
+
+@router.get("/batch/jobs/{job_id}")
+def get_batch_job(job_id: str, db: Session = Depends(get_db)):
+    job = _get_job(job_id, db)
+
+    # Worker that owned it died (its heartbeat stopped); hand it to the
+    # pool again. _claim() lets only one process take it over.
+    if jobs.is_stale(job):
+        jobs.submit(job.id)
+
+    return jobs.job_to_dict(job)
+
+
+@router.post("/batch/jobs/{job_id}/cancel")
+def cancel_batch_job(job_id: str, db: Session = Depends(get_db)):
+    job = jobs.cancel_job(db, _get_job(job_id, db))
+    return jobs.job_to_dict(job)
+
+
+@router.delete("/batch/jobs/{job_id}")
+def delete_batch_job(job_id: str, db: Session = Depends(get_db)):
+    job = _get_job(job_id, db)
+    if job.status in jobs.ACTIVE_STATUSES:
+        raise HTTPException(409, f"Job is {job.status}; cancel it first")
+    jobs.delete_job(db, job)
+    return {"message": f"Deleted job {job_id}."}
+
+
+@router.get("/batch/jobs/{job_id}/result")
+def download_batch_job(job_id: str, db: Session = Depends(get_db)):
+    job = _get_job(job_id, db)
+
+    if job.status != "completed":
+        raise HTTPException(409, f"Job is {job.status}; results are available once it completes")
+
+    return FileResponse(
+        job.output_path,
+        media_type="text/csv",
+        filename=f"churn_predictions_{job.id}.csv",
+    )
@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from ..database.session import get_db
 from ..database.schema import Prediction
+from ..database import aggregates
 from .auth import require_admin
 
 router = APIRouter(prefix="/clear", tags=["Clear"])
@@ -10,6 +11,7 @@ router = APIRouter(prefix="/clear", tags=["Clear"])
 def clear_all_history(db: Session = Depends(get_db)):
     try:
         num_deleted = db.query(Prediction).delete()
+        aggregates.rebuild(db)  # resets counters to zero
         db.commit()
         return {"message": f"Successfully deleted {num_deleted} records."}
     except Exception as e:
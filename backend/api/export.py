@@ -0,0 +1,52 @@
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from ..database.db import ReadSessionLocal
+from ..utils.export import stream_export, check_format, resolve_columns, ExportError, FORMATS, DEFAULT_CHUNK_SIZE
+
+router = APIRouter(prefix="/export", tags=["Export"])
+
+
+def _stream(fmt, columns, filters, chunk_size):
+    # The session lives as long as the response body, not the request handler
+    db = ReadSessionLocal()
+    try:
+        yield from stream_export(db, fmt, columns, filters, chunk_size)
+    finally:
+        db.close()
+
+
+@router.get("/predictions")
+def export_predictions(
+    format: str = Query("parquet", description="parquet | arrow | csv (gzip)"),
+    columns: Optional[str] = Query(None, description="Comma-separated column names; default all"),
+    label: Optional[str] = None,
+    contract: Optional[str] = None,
+    min_probability: Optional[float] = Query(None, ge=0, le=1),
+    max_probability: Optional[float] = Query(None, ge=0, le=1),
+    start_date: Optional[datetime] = Query(None, description="created_at >= start_date (UTC)"),
+    end_date: Optional[datetime] = Query(None, description="created_at < end_date (UTC)"),
+    chunk_size: int = Query(DEFAULT_CHUNK_SIZE, ge=1000, le=1_000_000),
+):
+    selected = [c.strip() for c in columns.split(",") if c.strip()] if columns else None
+    try:
+        check_format(format)
+        selected = resolve_columns(selected)
+    except ExportError as e:
+        raise HTTPException(400, str(e))
+
+    filters = {
+        "label": label, "contract": contract,
+        "min_probability": min_probability, "max_probability": max_probability,
+        "start_date": start_date, "end_date": end_date,
+    }
+    media_type, extension = FORMATS[format]
+
+    return StreamingResponse(
+        _stream(format, selected, filters, chunk_size),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="predictions.{extension}"'},
+    )
@@ -1,27 +1,101 @@
-from fastapi import APIRouter, Depends, Query
+import base64
+import json
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query, HTTPException
+from sqlalchemy import tuple_
 from sqlalchemy.orm import Session
-from ..database.session import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..database.session import get_async_read_db
 from ..database.schema import Prediction
+from ..database.aggregates import read_dimension
+from ..database.customers import latest_prediction
+from ..database.filters import CREATED_AT, timestamp, prediction_filters
+from ..database import data_version
+from ..utils.explainer import explanation_status
 
 router = APIRouter(prefix="/history", tags=["History"])
 
-@router.get("/")
-def get_history(
-    page: int = Query(1, ge=1),
-    limit: int = Query(25, ge=1, le=100),
-    db: Session = Depends(get_db)
-):
-    skip = (page - 1) * limit
-
-    records = (
-        db.query(Prediction)
-        .order_by(Prediction.created_at.desc())
-        .offset(skip)
-        .limit(limit)
-        .all()
+# Totals for filtered listings, keyed by (filters, data version)
+_count_cache = OrderedDict()
+_count_lock = threading.Lock()
+COUNT_CACHE_SIZE = 256
+
+
+def encode_cursor(created_at: str, record_id: int):
+    raw = json.dumps([created_at, record_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str):
+    try:
+        created_at, record_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return str(created_at), int(record_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def count_records(db: Session, conditions, key):
+    # Exact totals for unfiltered / single label or contract listings come
+    # from the analytics aggregates; anything else is counted once per data
+    # version and cached.
+    simple = {k: v for k, v in key if v is not None}
+    if not simple:
+        row = read_dimension(db, "all").get("all")
+        return row.total if row else 0
+    if len(simple) == 1 and next(iter(simple)) in ("label", "contract"):
+        dimension, value = next(iter(simple.items()))
+        row = read_dimension(db, dimension).get(value)
+        return row.total if row else 0
+
+    cache_key = (key, data_version.current(db))
+    with _count_lock:
+        if cache_key in _count_cache:
+            _count_cache.move_to_end(cache_key)
+            return _count_cache[cache_key]
+
+    total = db.query(Prediction.id).filter(*conditions).count()
+
+    with _count_lock:
+        _count_cache[cache_key] = total
+        while len(_count_cache) > COUNT_CACHE_SIZE:
+            _count_cache.popitem(last=False)
+    return total
+
+
+def history_page_query(db: Session, cursor: Optional[str] = None, page: int = 1, limit: int = 25,
+                       label: Optional[str] = None, contract: Optional[str] = None,
+                       min_probability: Optional[float] = None, max_probability: Optional[float] = None,
+                       start_date: Optional[datetime] = None, end_date: Optional[datetime] = None):
+    conditions = prediction_filters(label, contract, min_probability, max_probability, start_date, end_date)
+
+    # Newest first, keyset on (created_at, id)
+    query = (
+        db.query(Prediction, CREATED_AT.label("created_at_key"))
+        .filter(*conditions)
+        .order_by(Prediction.created_at.desc(), Prediction.id.desc())
     )
+    if cursor is not None:
+        created_at, record_id = decode_cursor(cursor)
+        # Row-value comparison so the index range scan starts at the cursor
+        query = query.filter(tuple_(CREATED_AT, Prediction.id) < tuple_(created_at, record_id))
+    elif page > 1:
+        query = query.offset((page - 1) * limit)
 
-    total = db.query(Prediction).count()
+    rows = query.limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    key = (
+        ("label", label), ("contract", contract),
+        ("min_probability", min_probability), ("max_probability", max_probability),
+        ("start_date", start_date and timestamp(start_date)),
+        ("end_date", end_date and timestamp(end_date)),
+    )
+    total = count_records(db, conditions, key)
 
     serialized = [
         {
@@ -32,30 +106,43 @@ def get_history(
             "label": r.label,
             "created_at": r.created_at
         }
-        for r in records
+        for r, _ in rows
     ]
 
-    print("RECORDS >>>", serialized)   # 👈 DEBUG
-
     return {
-        "page": page,
+        "page": page if cursor is None else None,
         "limit": limit,
         "total_records": total,
+        "next_cursor": encode_cursor(rows[-1][1], rows[-1][0].id) if has_more else None,
         "records": serialized
     }
 
 
-@router.get("/{customer_id}")
-def get_history_detail(customer_id: str, db: Session = Depends(get_db)):
-    record = (
-        db.query(Prediction)
-        .filter(Prediction.customer_id == customer_id)
-        .order_by(Prediction.created_at.desc())
-        .first()
+@router.get("/")
+async def get_history(
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    page: int = Query(1, ge=1, description="OFFSET paging; prefer cursor for deep pages"),
+    limit: int = Query(25, ge=1, le=100),
+    label: Optional[str] = None,
+    contract: Optional[str] = None,
+    min_probability: Optional[float] = Query(None, ge=0, le=1),
+    max_probability: Optional[float] = Query(None, ge=0, le=1),
+    start_date: Optional[datetime] = Query(None, description="created_at >= start_date (UTC)"),
+    end_date: Optional[datetime] = Query(None, description="created_at < end_date (UTC)"),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    return await db.run_sync(
+        history_page_query, cursor=cursor, page=page, limit=limit, label=label, contract=contract,
+        min_probability=min_probability, max_probability=max_probability,
+        start_date=start_date, end_date=end_date,
     )
 
+
+@router.get("/{customer_id}")
+async def get_history_detail(customer_id: str, db: AsyncSession = Depends(get_async_read_db)):
+    record = await db.run_sync(latest_prediction, customer_id)
+
     if not record:
-        from fastapi import HTTPException
         raise HTTPException(status_code=404, detail="Prediction not found")
 
     return {
@@ -67,6 +154,8 @@ def get_history_detail(customer_id: str, db: Session = Depends(get_db)):
         "probability": round(record.probability, 3),
         "label": record.label,
         "explanation": record.explanation,
+        "explanation_status": explanation_status(record),
+        "model_version": record.model_version,
         "created_at": record.created_at
     }
 
@@ -0,0 +1,19 @@
+from fastapi import APIRouter
+
+from ..utils import ai_helper
+from ..utils.batcher import get_predict_batcher
+from ..utils.model_loader import get_active
+from ..utils.explanation_cache import get_explanation_cache
+from .response_cache import analytics_cache
+
+router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+@router.get("/")
+def get_metrics():
+    return {
+        "model": get_active().info(),
+        "predict_batcher": get_predict_batcher().stats(),
+        "explanation_cache": get_explanation_cache().stats(),
+        "llm_gateway": ai_helper.gateway.stats(),
+        "analytics_cache": analytics_cache.stats(),
+    }
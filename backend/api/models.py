@@ -0,0 +1,30 @@
+from fastapi import APIRouter, Depends, HTTPException
+
+from ..utils import model_loader
+from .auth import require_admin
+
+router = APIRouter(prefix="/models", tags=["Models"])
+
+
+@router.get("/")
+def list_models():
+    return {
+        "active": model_loader.get_active().info(),
+        "requested": model_loader.active_version_name(),
+        "versions": model_loader.list_versions(),
+    }
+
+
+@router.post("/{version}/activate", dependencies=[Depends(require_admin)])
+def activate_model(version: str):
+    # Switches this worker now; the others follow within MODEL_RELOAD_INTERVAL.
+    if not model_loader.valid_version_name(version):
+        raise HTTPException(status_code=400, detail="Invalid model version name")
+    if not model_loader.has_version(version):
+        raise HTTPException(status_code=404, detail=f"Unknown model version '{version}'")
+
+    try:
+        model = model_loader.promote(version)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to load model {version}: {e}")
+    return model.info()
@@ -1,78 +1,89 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
 from sqlalchemy.orm import Session
-import pandas as pd
+from sqlalchemy.ext.asyncio import AsyncSession
+import asyncio
+import time
 from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
 
 from .schemas import PredictRequest, PredictResponse
-from ..utils.model_loader import load_model
+from ..utils.batcher import get_predict_batcher
+from ..utils.features import prepare_row, request_features
+from ..utils.model_loader import get_active
 from ..database.schema import Prediction
-from ..database.session import get_db
-from ..utils.ai_helper import explain_single_customer
+from ..database.session import get_async_db
+from ..database.aggregates import record_prediction
+from ..utils.ai_helper import EXPLAIN_FALLBACK
+from ..utils.explainer import schedule_explanation, explanation_status
 
 router = APIRouter(prefix="/predict", tags=["Prediction"])
 
+
+async def score_features(features: dict):
+    # Concurrent requests are coalesced into one predict_proba call; the
+    # batcher scores through the compiled pipeline when available, on its
+    # own thread so the event loop keeps serving other requests.
+    # Returns (probability, model version).
+    return await get_predict_batcher().submit_async(features)
+
+
+async def local_reasons(features: dict):
+    # Top feature attributions from the served model (utils/attribution.py);
+    # no network call, so they come back with the prediction itself.
+    return (await run_in_threadpool(get_active().reasons_rows, [features]))[0]
+
+
+def save_prediction(db: Session, customer_id, tenure, monthly_charges, contract, payment_method, prob, label,
+                    model_version=None):
+    # Runs via AsyncSession.run_sync; the row and its aggregate deltas
+    # commit together.
+    record = Prediction(
+        customer_id=customer_id,
+        tenure=tenure,
+        monthly_charges=monthly_charges,
+        contract=contract,
+        payment_method=payment_method,
+        probability=prob,
+        label=label,
+        explanation_status="pending",
+        model_version=model_version,
+    )
+    db.add(record)
+    record_prediction(db, prob, monthly_charges, contract, payment_method, label)
+    db.commit()
+    return record.id
+
+
 # =========================================================
 # FULL INPUT PREDICTION
 # =========================================================
 @router.post("/", response_model=PredictResponse)
-def predict(data: PredictRequest, db: Session = Depends(get_db)):
-
-    model = load_model()
-
-    def safe_float(x):
-        try:
-            return float(x)
-        except:
-            return 0.0
+async def predict(data: PredictRequest, db: AsyncSession = Depends(get_async_db)):
 
     try:
+        features = prepare_row(request_features(data.model_dump()))
 
-        if data.total_charges in ["", " ", None]:
-            data.total_charges = data.monthly_charges * data.tenure
-
-        columns = [
-            "customerID","gender","SeniorCitizen","Partner","Dependents",
-            "tenure","PhoneService","MultipleLines","InternetService",
-            "OnlineSecurity","OnlineBackup","DeviceProtection","TechSupport",
-            "StreamingTV","StreamingMovies","Contract","PaperlessBilling",
-            "PaymentMethod","MonthlyCharges","TotalCharges"
-        ]
-
-        row = pd.DataFrame([[
-
-            data.customer_id, data.gender, int(data.senior_citizen),
-            data.partner, data.dependents, int(data.tenure),
-            data.phone_service, data.multiple_lines, data.internet_service,
-            data.online_security, data.online_backup, data.device_protection,
-            data.tech_support, data.streaming_tv, data.streaming_movies,
-            data.contract, data.paperless_billing, data.payment_method,
-            safe_float(data.monthly_charges), safe_float(data.total_charges)
-
-        ]], columns=columns)
-
-        prob = float(model.predict_proba(row)[0][1])
+        prob, model_version = await score_features(features)
         label = "Likely to Churn" if prob > 0.5 else "Safe Customer"
+        reasons = await local_reasons(features)
 
-        explanation = explain_single_customer(row.to_dict(), prob)
-
-        record = Prediction(
-            customer_id=data.customer_id,
-            tenure=data.tenure,
-            monthly_charges=data.monthly_charges,
-            contract=data.contract,
-            payment_method=data.payment_method, # <--- Added
-            probability=prob,
-            label=label,
-            explanation=explanation,
+        prediction_id = await db.run_sync(
+            save_prediction, data.customer_id, data.tenure, data.monthly_charges,
+            data.contract, data.payment_method, prob, label, model_version,
         )
 
-        db.add(record)
-        db.commit()
+        # LLM explanation is generated in the background; poll
+        # GET /predict/{prediction_id}/explanation for the text.
+        schedule_explanation(prediction_id, features, prob)
 
         return {
             "probability": round(prob, 3),
             "label": label,
-            "explanation": explanation
+            "prediction_id": prediction_id,
+            "model_version": model_version,
+            "reasons": reasons,
+            "explanation_status": "pending",
+            "explanation": None
         }
 
     except Exception as e:
@@ -83,8 +94,6 @@ def predict(data: PredictRequest, db: Session = Depends(get_db)):
 # SIMPLE (4-FIELD) PREDICTION
 # =========================================================
 
-model = load_model()
-
 class SimpleInput(BaseModel):
     customer_id: str
     tenure: int
@@ -94,49 +103,40 @@ class SimpleInput(BaseModel):
 
 
 @router.post("/simple")
-def predict_simple(data: SimpleInput, db: Session = Depends(get_db)):
-
-    estimated_total = data.tenure * data.monthly_charges
+async def predict_simple(data: SimpleInput, db: AsyncSession = Depends(get_async_db)):
 
-    defaults = {
-        "gender": "Female","SeniorCitizen": 0,"Partner": "No","Dependents": "No",
-        "PhoneService": "Yes","MultipleLines": "No","InternetService": "DSL",
-        "OnlineSecurity": "No","OnlineBackup": "No","DeviceProtection": "No",
-        "TechSupport": "No","StreamingTV": "No","StreamingMovies": "No",
-        "PaperlessBilling": "Yes"
-    }
-
-    features = {
-        **defaults,
+    # Everything not asked for takes the shared defaults; TotalCharges is
+    # estimated as tenure * monthly charges.
+    features = prepare_row({
         "customerID": data.customer_id,
         "tenure": data.tenure,
         "Contract": data.contract,
         "MonthlyCharges": data.monthly_charges,
         "PaymentMethod": data.payment_method,
-        "TotalCharges": round(estimated_total, 2),
-    }
-
-    df = pd.DataFrame([features])
-
-    prob = float(model.predict_proba(df)[0][1])
+    })
+
+    # The precomputed what-if grid answers when its measured error is
+    # within WHATIF_MAX_ERROR; otherwise (or off-grid) score normally.
+    prob = None
+    grid = get_active().serving_grid
+    if grid is not None:
+        prob, model_version = grid.lookup(data.tenure, data.contract, data.payment_method, data.monthly_charges), grid.version
+    if prob is None:
+        prob, model_version = await score_features(features)
     label = "Likely to Churn" if prob > 0.5 else "Safe Customer"
+    reasons = await local_reasons(features)
 
-    explanation = explain_single_customer(df.to_dict(), prob)
+    prediction_id = None
+    status = "unavailable"
 
     # Save to DB
     try:
-        record = Prediction(
-            customer_id=data.customer_id,
-            tenure=data.tenure,
-            monthly_charges=data.monthly_charges,
-            contract=data.contract,
-            payment_method=data.payment_method,
-            probability=prob,
-            label=label,
-            explanation=explanation,
+        prediction_id = await db.run_sync(
+            save_prediction, data.customer_id, data.tenure, data.monthly_charges,
+            data.contract, data.payment_method, prob, label, model_version,
         )
-        db.add(record)
-        db.commit()
+        status = "pending"
+        schedule_explanation(prediction_id, features, prob)
     except Exception as e:
         print(f"Failed to save prediction: {e}")
         # We don't block the response if saving fails, but good to log
@@ -144,5 +144,40 @@ def predict_simple(data: SimpleInput, db: Session = Depends(get_db)):
     return {
         "probability": round(prob, 3),
         "label": label,
-        "explanation": explanation
+        "prediction_id": prediction_id,
+        "model_version": model_version,
+        "reasons": reasons,
+        "explanation_status": status,
+        "explanation": None
+    }
+
+
+# =========================================================
+# EXPLANATION STATUS
+# =========================================================
+@router.get("/{prediction_id}/explanation")
+async def get_explanation(
+    prediction_id: int,
+    wait: float = Query(0, ge=0, le=30),   # long-poll up to `wait` seconds
+    db: AsyncSession = Depends(get_async_db)
+):
+    deadline = time.monotonic() + wait
+
+    while True:
+        record = await db.get(Prediction, prediction_id, populate_existing=True)
+        if not record:
+            raise HTTPException(status_code=404, detail="Prediction not found")
+
+        status = explanation_status(record)
+        if status != "pending" or time.monotonic() >= deadline:
+            break
+
+        # End the read transaction so the next poll sees the worker's commit
+        await db.rollback()
+        await asyncio.sleep(0.25)
+
+    return {
+        "prediction_id": record.id,
+        "explanation_status": status,
+        "explanation": record.explanation or (EXPLAIN_FALLBACK if status == "failed" else None)
     }
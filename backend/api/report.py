@@ -6,8 +6,8 @@ from reportlab.lib.styles import getSampleStyleSheet
 import tempfile
 
 from ..database.session import get_db
-from ..database.schema import Prediction
-from ..utils.ai_helper import explain_single_customer
+from ..database.customers import latest_prediction
+from ..utils.explainer import ensure_explanation
 
 router = APIRouter(prefix="/report", tags=["Reports"])
 
@@ -15,24 +15,13 @@ router = APIRouter(prefix="/report", tags=["Reports"])
 @router.get("/{customer_id}")
 def get_report(customer_id: str, db: Session = Depends(get_db)):
 
-    record = (
-        db.query(Prediction)
-        .filter(Prediction.customer_id == customer_id)
-        .order_by(Prediction.created_at.desc())
-        .first()
-    )
+    record = latest_prediction(db, customer_id)
 
     if not record:
         raise HTTPException(404, "No prediction found for this customer")
 
-    features = {
-        "customer_id": record.customer_id,
-        "tenure": record.tenure,
-        "contract": record.contract,
-        "monthly_charges": record.monthly_charges,
-    }
-
-    explanation = explain_single_customer(features, record.probability)
+    # Reuse the stored explanation; rows without one get it generated in the background.
+    explanation = ensure_explanation(record)
 
     return {
         "customer_id": record.customer_id,
@@ -42,6 +31,7 @@ def get_report(customer_id: str, db: Session = Depends(get_db)):
         "tenure": record.tenure,
         "monthly_charges": record.monthly_charges,
         "explanation": explanation,
+        "explanation_status": "pending" if explanation is None else "ready",
         "created_at": record.created_at,
     }
 
@@ -49,16 +39,15 @@ def get_report(customer_id: str, db: Session = Depends(get_db)):
 @router.get("/{customer_id}/pdf")
 def get_report_pdf(customer_id: str, db: Session = Depends(get_db)):
 
-    record = (
-        db.query(Prediction)
-        .filter(Prediction.customer_id == customer_id)
-        .order_by(Prediction.created_at.desc())
-        .first()
-    )
+    record = latest_prediction(db, customer_id)
 
     if not record:
         raise HTTPException(404, "No prediction found")
 
+    explanation = ensure_explanation(record) or (
+        "The AI explanation is still being generated. Download the report again in a few moments."
+    )
+
     styles = getSampleStyleSheet()
     temp = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
     doc = SimpleDocTemplate(temp.name)
@@ -73,14 +62,7 @@ def get_report_pdf(customer_id: str, db: Session = Depends(get_db)):
         Paragraph(f"Monthly Charges: {record.monthly_charges}", styles["Normal"]),
         Spacer(1, 12),
         Paragraph("<b>Explanation</b>", styles["Heading2"]),
-        Paragraph(explain_single_customer(
-            {
-                "contract": record.contract,
-                "tenure": record.tenure,
-                "monthly_charges": record.monthly_charges,
-            },
-            record.probability,
-        ), styles["Normal"])
+        Paragraph(explanation, styles["Normal"])
     ]
 
     doc.build(story)
@@ -0,0 +1,97 @@
+import threading
+import time
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+
+from ..database.db import AsyncReadSessionLocal
+from ..database import data_version
+
+
+class ResponseCache:
+    """Per-process cache of GET responses keyed by URL and data version.
+
+    Entries are only served while the predictions data version they were
+    computed under is still current, so writes invalidate them without
+    any explicit purge; the version doubles as the ETag.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def get(self, key, version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self.hits += 1
+                return entry
+            self.misses += 1
+            return None
+
+    def put(self, key, version, body, media_type):
+        with self._lock:
+            self._entries[key] = (version, body, media_type, time.time())
+
+    def stats(self):
+        now = time.time()
+        with self._lock:
+            ages = [now - e[3] for e in self._entries.values()]
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "not_modified": self.not_modified,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "max_age_seconds": round(max(ages), 3) if ages else 0.0,
+                "avg_age_seconds": round(sum(ages) / len(ages), 3) if ages else 0.0,
+            }
+
+
+analytics_cache = ResponseCache()
+
+
+async def _read_version():
+    async with AsyncReadSessionLocal() as db:
+        return await db.run_sync(data_version.current)
+
+
+class VersionedCacheRoute(APIRoute):
+    # Route class for routers whose GET responses depend only on the
+    # predictions table (see analytics.py).
+    cache = analytics_cache
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        cache = self.cache
+
+        async def cached_handler(request: Request):
+            if request.method != "GET":
+                return await handler(request)
+
+            # Read the version before computing so a concurrent write can
+            # only make the stored entry stale, never mislabelled.
+            version = await _read_version()
+            etag = f'W/"{version}"'
+            headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+            if etag in request.headers.get("if-none-match", ""):
+                cache.not_modified += 1
+                return Response(status_code=304, headers=headers)
+
+            key = (request.url.path, str(request.query_params))
+            entry = cache.get(key, version)
+            if entry is not None:
+                return Response(content=entry[1], media_type=entry[2], headers=headers)
+
+            response = await handler(request)
+            if response.status_code == 200:
+                cache.put(key, version, response.body, response.media_type)
+                response.headers.update(headers)
+            return response
+
+        return cached_handler
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List
+from typing import Any, Dict, List, Optional
 
 
 class PredictRequest(BaseModel):
@@ -32,3 +32,15 @@ class PredictResponse(BaseModel):
     probability: float
     label: str
     reasons: List[str] = []
+    prediction_id: Optional[int] = None
+    model_version: Optional[str] = None
+    explanation_status: Optional[str] = None
+    explanation: Optional[str] = None
+
+
+class CounterfactualRequest(BaseModel):
+    customer: PredictRequest
+    # Explicit variants, e.g. [{"contract": "One year"}, {"payment_method": "Credit card (automatic)"}]
+    changes: List[Dict[str, Any]] = []
+    # Every combination of these values, e.g. {"contract": ["One year", "Two year"], "tenure": [12, 24]}
+    vary: Dict[str, List[Any]] = {}
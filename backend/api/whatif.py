@@ -0,0 +1,97 @@
+from fastapi import APIRouter, HTTPException, Query
+from starlette.concurrency import run_in_threadpool
+
+from ..database.aggregates import bucket_label
+from ..utils.counterfactual import CounterfactualError, expand, score_variants
+from ..utils import whatif
+from ..utils.features import prepare_row
+from ..utils.model_loader import get_active
+from .predict import score_features
+from .schemas import CounterfactualRequest
+
+router = APIRouter(prefix="/whatif", tags=["What-if"])
+
+# Read-only what-if scoring: the simple form (tenure, contract, monthly
+# charges, payment method) from the precomputed grid when it is accurate
+# enough for the model (see utils/whatif.py), and counterfactual variants of a full customer record
+# (utils/counterfactual.py). Nothing is persisted.
+
+
+async def _grid():
+    # Built on first use (off the event loop); scoring only uses the grid
+    # through ActiveModel.serving_grid
+    grid = await run_in_threadpool(lambda: get_active().whatif)
+    if grid is None:
+        raise HTTPException(status_code=503, detail="What-if grid is disabled (WHATIF_GRID=0)")
+    return grid
+
+
+def _result(prob, model_version, source, grid):
+    return {
+        "probability": round(prob, 4),
+        "label": "Likely to Churn" if prob > 0.5 else "Safe Customer",
+        "risk_bucket": bucket_label(prob),
+        "source": source,
+        "model_version": model_version,
+        "max_error": grid.error["max"] if grid is not None else 0.0,
+    }
+
+
+@router.get("/")
+async def whatif_info():
+    return (await _grid()).info()
+
+
+@router.get("/score")
+async def whatif_score(
+    tenure: int = Query(..., ge=0),
+    contract: str = Query(...),
+    monthly_charges: float = Query(..., ge=0),
+    payment_method: str = Query(...),
+    exact: bool = Query(False),   # score with the model instead of the grid
+):
+    if not whatif.ENABLED:
+        raise HTTPException(status_code=503, detail="What-if grid is disabled (WHATIF_GRID=0)")
+    # None unless the grid's error is within WHATIF_MAX_ERROR
+    grid = None if exact else await run_in_threadpool(lambda: get_active().serving_grid)
+    prob = grid.lookup(tenure, contract, payment_method, monthly_charges) if grid is not None else None
+    if prob is not None:
+        return _result(prob, grid.version, "grid", grid)
+
+    # Outside the grid, grid too inaccurate, or asked for: one real model call
+    prob, model_version = await score_features(prepare_row({
+        "tenure": tenure, "Contract": contract, "MonthlyCharges": monthly_charges, "PaymentMethod": payment_method,
+    }))
+    return _result(prob, model_version, "model", None)
+
+
+@router.get("/surface")
+async def whatif_surface(
+    contract: str = Query("Month-to-month"),
+    payment_method: str = Query("Electronic check"),
+):
+    # Whole tenure x monthly-charges probability surface in one response;
+    # the values are model scores at the grid knots.
+    grid = await _grid()
+    if contract not in grid.contracts or payment_method not in grid.payment_methods:
+        raise HTTPException(status_code=400, detail=f"Known contracts: {grid.contracts}; "
+                                                    f"payment methods: {grid.payment_methods}")
+    return {
+        "model_version": grid.version,
+        "contract": contract,
+        "payment_method": payment_method,
+        "tenure": grid.tenure.tolist(),
+        "monthly_charges": grid.charges.tolist(),
+        "probability": grid.surface(contract, payment_method).round(4).tolist(),
+        "error": grid.error,
+    }
+
+
+@router.post("/counterfactual")
+async def counterfactual(data: CounterfactualRequest):
+    # All variants are scored in one vectorized call off the event loop
+    try:
+        variants = expand(data.changes, data.vary)
+        return await run_in_threadpool(score_variants, get_active(), data.customer.model_dump(), variants)
+    except CounterfactualError as e:
+        raise HTTPException(status_code=400, detail=str(e))
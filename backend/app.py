@@ -1,19 +1,42 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 import os
 from pathlib import Path
 
-from .database.db import Base, engine
-from .api import predict, history, batch, analytics, report, clear, auth
+from .database.db import engine, SessionLocal, async_engine, async_read_engine
+from .database import aggregates
+from .database.migrations import upgrade
+from .api import predict, history, batch, analytics, report, clear, auth, metrics, export, models, whatif
+from .utils import jobs, model_loader
 
 # Load .env explicitly from backend directory
 env_path = Path(__file__).resolve().parent / ".env"
 load_dotenv(dotenv_path=env_path, override=True)
 
-app = FastAPI(title="Customer Churn API")
+upgrade(engine)
 
-Base.metadata.create_all(bind=engine)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load and warm up the active model before taking traffic, then follow
+    # the registry's ACTIVE pointer for hot swaps
+    model_loader.start()
+
+    # Backfill analytics aggregates for databases created before they existed
+    with SessionLocal() as db:
+        aggregates.ensure_built(db)
+
+    # Pick up batch jobs interrupted by a restart
+    jobs.resume_jobs()
+    yield
+    jobs.shutdown()
+    await async_engine.dispose()
+    await async_read_engine.dispose()
+
+
+app = FastAPI(title="Customer Churn API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -34,6 +57,10 @@ app.include_router(analytics.router)
 app.include_router(report.router)
 app.include_router(clear.router)
 app.include_router(auth.router)
+app.include_router(export.router)
+app.include_router(models.router)
+app.include_router(whatif.router)
+app.include_router(metrics.router)
 
 @app.get("/")
 def root():
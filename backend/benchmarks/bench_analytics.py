@@ -0,0 +1,126 @@
+# Latency of every /analytics endpoint on a large predictions table,
+# before (original full-scan implementations, no secondary indexes) and
+# after (aggregate / pushed-down queries with indexes).
+#
+#   python -m backend.benchmarks.bench_analytics [n_rows] [repeats]
+
+import os
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine, func, inspect, text
+from sqlalchemy.orm import sessionmaker
+
+from backend.api import analytics
+from backend.database.db import Base
+from backend.database.schema import Prediction
+from backend.database.bulk import bulk_insert_predictions
+from backend.benchmarks.bench_bulk_insert import make_frame
+
+
+# ----- original implementations -----
+
+def legacy_summary(db):
+    total = db.query(Prediction).count()
+    high_risk = db.query(Prediction).filter(Prediction.probability > 0.5).count()
+    revenue = db.query(func.sum(Prediction.monthly_charges)).filter(Prediction.probability > 0.5).scalar() or 0.0
+    return total, high_risk, revenue
+
+
+def legacy_probability_distribution(db):
+    counts = [0] * 5
+    for p in [p.probability for p in db.query(Prediction).all()]:
+        if p <= 0.2: counts[0] += 1
+        elif p <= 0.4: counts[1] += 1
+        elif p <= 0.6: counts[2] += 1
+        elif p <= 0.8: counts[3] += 1
+        else: counts[4] += 1
+    return counts
+
+
+def legacy_by_attribute(db, attr):
+    stats = {}
+    for r in db.query(Prediction).all():
+        k = getattr(r, attr) or "Unknown"
+        s = stats.setdefault(k, [0, 0])
+        s[1] += 1
+        s[0] += r.label == "Likely to Churn"
+    return stats
+
+
+def legacy_trend_by_tenure(db):
+    rows = db.query(Prediction.tenure, func.avg(Prediction.monthly_charges)).group_by(Prediction.tenure).all()
+    bins = {}
+    for tenure, avg in rows:
+        if tenure == 0:
+            continue
+        b = bins.setdefault((tenure - 1) // 6, [0.0, 0])
+        b[0] += avg
+        b[1] += 1
+    return bins
+
+
+LEGACY = {
+    "summary": legacy_summary,
+    "probability_distribution": legacy_probability_distribution,
+    "churn_by_contract": lambda db: legacy_by_attribute(db, "contract"),
+    "top_risk": analytics.top_risk_query,
+    "scatter_data": analytics.scatter_data_query,
+    "trend_by_tenure": legacy_trend_by_tenure,
+    "payment_stats": lambda db: legacy_by_attribute(db, "payment_method"),
+}
+
+CURRENT = {
+    "summary": analytics.analytics_summary_query,
+    "probability_distribution": analytics.probability_distribution_query,
+    "churn_by_contract": analytics.churn_by_contract_query,
+    "top_risk": analytics.top_risk_query,
+    "scatter_data": analytics.scatter_data_query,
+    "trend_by_tenure": analytics.trend_by_tenure_query,
+    "payment_stats": analytics.payment_stats_query,
+}
+
+
+def timed(fn, db, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        db.expire_all()
+        start = time.perf_counter()
+        fn(db)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(n=1_000_000, repeats=3):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+
+        print(f"Seeding {n} predictions ...")
+        for offset in range(0, n, 200_000):
+            bulk_insert_predictions(db, make_frame(min(200_000, n - offset), seed=offset))
+
+        indexes = [i for i in Prediction.__table__.indexes if i.name != "ix_predictions_id"]
+
+        for index in indexes:
+            index.drop(bind=engine)
+        db.execute(text("ANALYZE"))
+        before = {name: timed(fn, db, repeats) for name, fn in LEGACY.items()}
+
+        for index in indexes:
+            index.create(bind=engine)
+        db.execute(text("ANALYZE"))
+        after = {name: timed(fn, db, repeats) for name, fn in CURRENT.items()}
+
+        print(f"{'endpoint':>26} {'before ms':>11} {'after ms':>10} {'speedup':>9}")
+        for name in CURRENT:
+            b, a = before[name] * 1000, after[name] * 1000
+            print(f"{name:>26} {b:>11.1f} {a:>10.2f} {b / a:>8.0f}x")
+        db.close()
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    main(*args)
@@ -0,0 +1,85 @@
+# Local feature attribution latency (utils/attribution.py): one row, as
+# /predict fills PredictResponse.reasons, and a 100k-row batch, as
+# batch_predict attributes a chunk.
+#
+#   python -m backend.benchmarks.bench_attribution [model.pkl ...]
+#
+# Without arguments the served model is used; each argument is a pipeline
+# artifact to load instead. The input is backend/data/churn.csv replicated
+# to 100k rows. For every model the script also checks that base + the
+# contributions reproduce the model output (log-odds for logistic
+# regression) on the first 2,000 rows.
+
+import statistics
+import sys
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from backend.utils.features import prepare_frame, prepare_row
+from backend.utils.model_loader import ActiveModel, get_active
+
+DATA_PATH = "backend/data/churn.csv"
+BATCH_ROWS = 100_000
+SINGLE_RUNS = 500
+
+
+def check(model, encoded):
+    attributor = model.attributor
+    base, contributions = attributor.explain(encoded)
+    total = base + contributions.sum(axis=1)
+    probs = model.compiled.predict_proba(encoded)
+    expected = np.log(probs / (1 - probs)) if attributor.units == "log-odds" else probs
+    error = float(np.abs(total - expected).max())
+    assert error < 1e-6, f"attributions don't add up to the model output (max error {error})"
+    return error
+
+
+def bench(model, frame):
+    attributor = model.attributor
+    if attributor is None:
+        print(f"{model.version}: no attribution method")
+        return
+
+    rows = [prepare_row(r) for r in frame.head(SINGLE_RUNS).to_dict("records")]
+    X, _ = prepare_frame(frame.copy())
+    encoded = model.pipeline[:-1].transform(X)
+    encoded = encoded.toarray() if hasattr(encoded, "toarray") else np.asarray(encoded)
+    error = check(model, encoded[:2000])
+
+    model.reasons_rows(rows[:5])  # warm up
+    single = []
+    for row in rows:
+        start = time.perf_counter()
+        model.reasons_rows([row])
+        single.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    attributor.explain(encoded)
+    explain_s = time.perf_counter() - start
+    start = time.perf_counter()
+    attributor.reasons(encoded)
+    reasons_s = time.perf_counter() - start
+    start = time.perf_counter()
+    model.compiled.predict_proba(encoded)
+    predict_s = time.perf_counter() - start
+
+    print(f"{type(attributor.estimator).__name__} ({attributor.method}, max sum error {error:.1e})")
+    print(f"  single row reasons   median {statistics.median(single) * 1e3:7.3f} ms   "
+          f"p99 {np.quantile(single, 0.99) * 1e3:7.3f} ms")
+    print(f"  {len(encoded):,} rows  explain {explain_s:6.2f} s   reasons {reasons_s:6.2f} s   "
+          f"({len(encoded) / reasons_s:,.0f} rows/s; predict_proba {predict_s:.2f} s)")
+
+
+def main(paths):
+    base = pd.read_csv(DATA_PATH).drop(columns=["Churn"])
+    frame = base.iloc[np.resize(np.arange(len(base)), BATCH_ROWS)].reset_index(drop=True)
+    models = [ActiveModel(p, joblib.load(p), {}) for p in paths] or [get_active()]
+    for model in models:
+        bench(model, frame)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,100 @@
+# Peak memory of batch scoring as the upload grows: whole-file vs chunked.
+#
+#   python -m backend.benchmarks.bench_batch_memory [rows ...]
+#
+# Each run happens in a fresh subprocess (so ru_maxrss is per run) against a
+# throwaway SQLite database; the input is backend/data/churn.csv replicated.
+
+import io
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+DATA_PATH = "backend/data/churn.csv"
+
+
+def make_csv(path, n_rows):
+    base = pd.read_csv(DATA_PATH).drop(columns=["Churn"])
+    with open(path, "w", newline="") as f:
+        written = 0
+        while written < n_rows:
+            part = base.head(n_rows - written)
+            part.to_csv(f, index=False, header=(written == 0))
+            written += len(part)
+
+
+def make_session(db_path):
+    from backend.database.db import Base
+    from backend.database import schema  # noqa: F401
+
+    engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)()
+
+
+def run_legacy(csv_path, db):
+    # The pre-streaming implementation: whole file in memory + StringIO output.
+    from backend.utils.batch_scoring import score_chunk, persist_chunk
+    from backend.utils.features import prepare_frame
+
+    df = pd.read_csv(csv_path)
+    X, _ = prepare_frame(df)
+    score_chunk(df, X)
+    persist_chunk(db, df, X)
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False)
+    return len(df)
+
+
+def run_stream(csv_path, db, chunk_size):
+    from backend.utils.batch_scoring import score_csv
+
+    with tempfile.TemporaryFile("w+", newline="") as out, open(csv_path) as src:
+        return score_csv(src, db, out=out, chunk_size=chunk_size).processed
+
+
+def child(mode, csv_path, chunk_size):
+    from backend.utils.model_loader import load_model
+    load_model()
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = make_session(os.path.join(tmp, "bench.db"))
+        start = time.perf_counter()
+        if mode == "legacy":
+            rows = run_legacy(csv_path, db)
+        else:
+            rows = run_stream(csv_path, db, chunk_size)
+        elapsed = time.perf_counter() - start
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"{rows} {elapsed:.2f} {baseline / 1024:.1f} {peak / 1024:.1f}")
+
+
+def main(sizes, chunk_size=20_000):
+    print(f"{'rows':>10} {'mode':>8} {'seconds':>9} {'peak RSS MB':>12} {'over model MB':>14}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            csv_path = os.path.join(tmp, f"bench_{n}.csv")
+            make_csv(csv_path, n)
+            for mode in ("legacy", "stream"):
+                out = subprocess.run(
+                    [sys.executable, "-m", "backend.benchmarks.bench_batch_memory", "--child", mode, csv_path, str(chunk_size)],
+                    capture_output=True, text=True, check=True,
+                ).stdout.split()
+                rows, elapsed, baseline, peak = out[-4:]
+                print(f"{rows:>10} {mode:>8} {float(elapsed):>9.2f} {float(peak):>12.1f} {float(peak) - float(baseline):>14.1f}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        child(sys.argv[2], sys.argv[3], int(sys.argv[4]))
+    else:
+        main([int(a) for a in sys.argv[1:]] or [10_000, 50_000, 200_000])
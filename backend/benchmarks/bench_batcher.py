@@ -0,0 +1,40 @@
+# Throughput of concurrent single predictions with and without micro-batching.
+#
+#   python -m backend.benchmarks.bench_batcher [n_requests] [n_threads]
+
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.utils.batcher import MicroBatcher
+from backend.utils.model_loader import predict_rows
+from backend.benchmarks.bench_single_row import load_rows
+
+
+def run(batcher, rows, n_threads):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=n_threads) as pool:
+        probs = list(pool.map(batcher.submit, rows))
+    return probs, time.perf_counter() - start
+
+
+def main(n=2000, n_threads=64):
+    rows = load_rows(n)
+    expected = predict_rows(rows)
+
+    for window_ms in (0.0, 1.0, 2.0, 5.0):
+        batcher = MicroBatcher(predict_rows, window_ms=window_ms, max_batch_size=128)
+        probs, elapsed = run(batcher, rows, n_threads)
+        assert all(abs(a - b) < 1e-12 for a, b in zip(probs, expected)), "batched scores differ"
+
+        stats = batcher.stats()
+        print(
+            f"window={window_ms:4.1f}ms  {len(rows) / elapsed:8.0f} req/s  "
+            f"avg batch={stats['avg_batch_size']:6.1f}  "
+            f"avg wait={stats['avg_queue_wait_ms']:6.2f}ms  max wait={stats['max_queue_wait_ms']:6.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    main(*args)
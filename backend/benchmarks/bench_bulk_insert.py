@@ -0,0 +1,83 @@
+# Persistence throughput: per-row ORM objects vs bulk_insert_predictions.
+#
+#   python -m backend.benchmarks.bench_bulk_insert [rows ...]
+#
+# Rows are synthetic scored predictions written to a throwaway SQLite file.
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.database.db import Base
+from backend.database.schema import Prediction
+from backend.database.bulk import bulk_insert_predictions, PREDICTION_COLUMNS
+
+
+def make_frame(n, seed=0):
+    rng = np.random.default_rng(seed)
+    probs = rng.random(n)
+    return pd.DataFrame({
+        "customer_id": [f"C{i:08d}" for i in range(n)],
+        "tenure": rng.integers(0, 73, n),
+        "monthly_charges": rng.uniform(18, 120, n).round(2),
+        "contract": rng.choice(["Month-to-month", "One year", "Two year"], n),
+        "payment_method": rng.choice(
+            ["Electronic check", "Mailed check", "Bank transfer (automatic)", "Credit card (automatic)"], n
+        ),
+        "probability": probs,
+        "label": np.where(probs > 0.5, "Likely to Churn", "Safe Customer"),
+        "model_version": "bench",
+    })[PREDICTION_COLUMNS]
+
+
+def orm_loop(db, frame):
+    # The original batch_predict persistence: one ORM object per row.
+    start = time.perf_counter()
+    for i in range(len(frame)):
+        db.add(
+            Prediction(
+                customer_id=str(frame["customer_id"][i]),
+                tenure=int(frame["tenure"][i]),
+                monthly_charges=float(frame["monthly_charges"][i]),
+                contract=str(frame["contract"][i]),
+                payment_method=str(frame["payment_method"][i]),
+                probability=float(frame["probability"][i]),
+                label=frame["label"][i],
+            )
+        )
+    db.commit()
+    return time.perf_counter() - start
+
+
+def fresh_session(tmp, name):
+    engine = create_engine(f"sqlite:///{os.path.join(tmp, name)}")
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)()
+
+
+def main(sizes, batch_size=10_000):
+    print(f"{'rows':>10} {'ORM loop s':>11} {'ORM rows/s':>11} {'bulk s':>8} {'bulk rows/s':>12} {'speedup':>8}")
+    for n in sizes:
+        frame = make_frame(n)
+        with tempfile.TemporaryDirectory() as tmp:
+            db = fresh_session(tmp, "orm.db")
+            orm_s = orm_loop(db, frame)
+            db.close()
+
+            db = fresh_session(tmp, "bulk.db")
+            result = bulk_insert_predictions(db, frame, batch_size=batch_size)
+            assert db.query(Prediction).count() == n
+            db.close()
+
+        print(f"{n:>10} {orm_s:>11.2f} {n / orm_s:>11.0f} {result.seconds:>8.2f} "
+              f"{result.rows_per_second:>12.0f} {orm_s / result.seconds:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [10_000, 100_000, 1_000_000])
@@ -0,0 +1,49 @@
+# Counterfactual scoring: N variants of one customer scored one row at a
+# time (what N calls to /predict/ cost in model time alone, before the DB
+# insert and LLM call each of them also triggered) vs utils/counterfactual
+# scoring them as one matrix.
+#
+#   python -m backend.benchmarks.bench_counterfactual [variants ...]
+
+import itertools
+import sys
+import time
+
+from backend.api.schemas import PredictRequest
+from backend.utils.counterfactual import score_variants
+from backend.utils.features import prepare_row, request_features
+from backend.utils.model_loader import get_active
+
+CONTRACTS = ["Month-to-month", "One year", "Two year"]
+PAYMENT_METHODS = ["Electronic check", "Mailed check", "Bank transfer (automatic)", "Credit card (automatic)"]
+
+
+def make_variants(n):
+    steps = -(-n // 12)
+    charges = [20 + 100 * i / steps for i in range(steps)]
+    vary = {"contract": CONTRACTS, "payment_method": PAYMENT_METHODS, "monthly_charges": charges}
+    return [dict(zip(vary, values)) for values in itertools.product(*vary.values())][:n]
+
+
+def main(sizes):
+    model = get_active()
+    customer = PredictRequest(tenure=3, monthly_charges=85.0, total_charges=255.0,
+                              internet_service="Fiber optic").model_dump()
+    score_variants(model, customer, make_variants(12))
+
+    print(f"{'variants':>9} {'one by one ms':>14} {'one matrix ms':>14} {'speedup':>8}")
+    for n in sizes:
+        variants = make_variants(n)
+
+        start = time.perf_counter()
+        for variant in variants:
+            model.predict_rows([prepare_row(request_features({**customer, **variant}))])
+        single_ms = (time.perf_counter() - start) * 1000
+
+        runs = [score_variants(model, customer, variants)["elapsed_ms"] for _ in range(5)]
+        batch_ms = sorted(runs)[len(runs) // 2]
+        print(f"{len(variants):>9} {single_ms:>14.1f} {batch_ms:>14.1f} {single_ms / batch_ms:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [12, 120, 600, 1000])
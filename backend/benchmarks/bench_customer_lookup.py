@@ -0,0 +1,82 @@
+# Latest-prediction-per-customer lookup (history detail, reports) on a large
+# predictions table, with and without ix_predictions_customer_created_at_id.
+#
+#   python -m backend.benchmarks.bench_customer_lookup [n_rows] [lookups]
+#
+# Every customer has ~5 predictions so "latest" actually has to choose.
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from backend.database.db import Base
+from backend.database.schema import Prediction
+from backend.database.bulk import bulk_insert_predictions
+from backend.database.customers import latest_prediction
+from backend.benchmarks.bench_bulk_insert import make_frame
+
+INDEX = "ix_predictions_customer_created_at_id"
+PER_CUSTOMER = 5
+
+
+def legacy_lookup(db, customer_id):
+    return (
+        db.query(Prediction)
+        .filter(Prediction.customer_id == customer_id)
+        .order_by(Prediction.created_at.desc())
+        .first()
+    )
+
+
+def timed(fn, db, ids):
+    start = time.perf_counter()
+    for customer_id in ids:
+        db.expire_all()
+        fn(db, customer_id)
+    return (time.perf_counter() - start) / len(ids)
+
+
+def main(n=1_000_000, lookups=200):
+    customers = max(n // PER_CUSTOMER, 1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+
+        print(f"Seeding {n} predictions for {customers} customers ...")
+        for offset in range(0, n, 200_000):
+            frame = make_frame(min(200_000, n - offset), seed=offset)
+            frame["customer_id"] = [f"C{(offset + i) % customers:08d}" for i in range(len(frame))]
+            bulk_insert_predictions(db, frame)
+        db.execute(text("UPDATE predictions SET created_at = datetime('2025-01-01', '+' || (id / 10) || ' seconds')"))
+        db.commit()
+
+        rng = random.Random(0)
+        ids = [f"C{rng.randrange(customers):08d}" for _ in range(lookups)]
+
+        index = next(i for i in Prediction.__table__.indexes if i.name == INDEX)
+        index.drop(bind=engine)
+        db.execute(text("ANALYZE"))
+        before = timed(legacy_lookup, db, ids[:max(lookups // 20, 1)])
+
+        index.create(bind=engine)
+        db.execute(text("ANALYZE"))
+        after = timed(latest_prediction, db, ids)
+
+        for customer_id in ids[:20]:
+            assert legacy_lookup(db, customer_id).created_at == latest_prediction(db, customer_id).created_at
+
+        print(f"full scan: {before * 1000:9.2f} ms/lookup")
+        print(f"indexed:   {after * 1000:9.3f} ms/lookup  ({before / after:.0f}x)")
+        db.close()
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    main(*args)
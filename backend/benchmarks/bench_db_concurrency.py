@@ -0,0 +1,128 @@
+# Mixed read/write load against one SQLite file from several processes,
+# like gunicorn workers: writers bulk-insert scored chunks while readers
+# hit the dashboard queries (analytics summary, trend, first history page).
+#
+#   python -m backend.benchmarks.bench_db_concurrency [seconds] [writers] [readers]
+#
+# "legacy" is the original engine (rollback journal, synchronous=FULL,
+# pysqlite's 5 s lock wait, readers share the write pool); "tuned" is
+# db.create_db_engine's defaults with a query_only read engine.
+
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from backend.database.db import Base, create_db_engine, sqlite_pragmas
+
+LEGACY_PRAGMAS = {"journal_mode": "DELETE", "synchronous": "FULL", "busy_timeout": "5000"}
+SEED_ROWS = 200_000
+WRITE_CHUNK = 5_000
+
+
+def _engines(url, config):
+    if config == "legacy":
+        engine = create_db_engine(url, pragmas=LEGACY_PRAGMAS)
+        return engine, engine
+    return create_db_engine(url), create_db_engine(url, read_only=True)
+
+
+def writer(url, config, seconds, seed, results):
+    from backend.database.bulk import bulk_insert_predictions
+    from backend.benchmarks.bench_bulk_insert import make_frame
+
+    engine, _ = _engines(url, config)
+    db = sessionmaker(bind=engine)()
+    frame = make_frame(WRITE_CHUNK, seed=seed)
+    rows, errors, latencies = 0, 0, []
+    deadline = time.time() + seconds
+    while time.time() < deadline:
+        start = time.perf_counter()
+        try:
+            bulk_insert_predictions(db, frame)
+            rows += len(frame)
+        except OperationalError:
+            db.rollback()
+            errors += 1
+        latencies.append(time.perf_counter() - start)
+    db.close()
+    results.put(("write", rows, errors, latencies))
+
+
+def reader(url, config, seconds, results):
+    from backend.api import analytics, history
+
+    _, read_engine = _engines(url, config)
+    db = sessionmaker(bind=read_engine)()
+    ops, errors, latencies = 0, 0, []
+    deadline = time.time() + seconds
+    while time.time() < deadline:
+        start = time.perf_counter()
+        try:
+            analytics.analytics_summary_query(db)
+            analytics.trend_by_tenure_query(db)
+            history.history_page_query(db)
+            ops += 1
+        except OperationalError:
+            errors += 1
+        db.rollback()
+        latencies.append(time.perf_counter() - start)
+    db.close()
+    results.put(("read", ops, errors, latencies))
+
+
+def run(config, seconds, writers, readers):
+    from backend.database.bulk import bulk_insert_predictions
+    from backend.benchmarks.bench_bulk_insert import make_frame
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        engine, _ = _engines(url, config)
+        Base.metadata.create_all(bind=engine)
+        with sessionmaker(bind=engine)() as db:
+            bulk_insert_predictions(db, make_frame(SEED_ROWS))
+        engine.dispose()
+
+        ctx = multiprocessing.get_context("spawn")
+        results = ctx.Queue()
+        procs = [ctx.Process(target=writer, args=(url, config, seconds, i, results)) for i in range(writers)]
+        procs += [ctx.Process(target=reader, args=(url, config, seconds, results)) for _ in range(readers)]
+        for p in procs:
+            p.start()
+        collected = [results.get() for _ in procs]
+        for p in procs:
+            p.join()
+
+    summary = {}
+    for kind in ("write", "read"):
+        parts = [c for c in collected if c[0] == kind]
+        lat = np.array([l for c in parts for l in c[3]]) * 1000
+        summary[kind] = {
+            "ops": sum(c[1] for c in parts),
+            "errors": sum(c[2] for c in parts),
+            "p50_ms": float(np.percentile(lat, 50)) if len(lat) else 0.0,
+            "p95_ms": float(np.percentile(lat, 95)) if len(lat) else 0.0,
+            "max_ms": float(lat.max()) if len(lat) else 0.0,
+        }
+    return summary
+
+
+def main(seconds=15, writers=2, readers=4):
+    print(f"{seconds}s, {writers} writer / {readers} reader processes, tuned pragmas: {sqlite_pragmas()}")
+    print(f"{'config':>7} {'rows/s':>9} {'w err':>6} {'reads/s':>8} {'r err':>6} "
+          f"{'read p50':>9} {'read p95':>9} {'read max':>9}")
+    for config in ("legacy", "tuned"):
+        s = run(config, seconds, writers, readers)
+        w, r = s["write"], s["read"]
+        print(f"{config:>7} {w['ops'] / seconds:>9.0f} {w['errors']:>6} {r['ops'] / seconds:>8.1f} {r['errors']:>6} "
+              f"{r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} {r['max_ms']:>9.1f}")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    main(*args)
@@ -0,0 +1,68 @@
+# Export throughput and peak memory per format as the predictions table grows.
+#
+#   python -m backend.benchmarks.bench_export [rows ...]
+#
+# Each export runs in a fresh subprocess (so ru_maxrss is per run) and writes
+# to /dev/null; peak RSS should stay flat as the table grows.
+
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.database.db import Base
+from backend.database.bulk import bulk_insert_predictions
+from backend.benchmarks.bench_bulk_insert import make_frame
+
+
+def seed(db_path, n):
+    engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(bind=engine)
+    with sessionmaker(bind=engine)() as db:
+        for offset in range(0, n, 200_000):
+            bulk_insert_predictions(db, make_frame(min(200_000, n - offset), seed=offset))
+
+
+def child(fmt, db_path):
+    from backend.utils.export import stream_export
+
+    db = sessionmaker(bind=create_engine(f"sqlite:///{db_path}"))()
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    written = 0
+    with open(os.devnull, "wb") as out:
+        for block in stream_export(db, fmt):
+            out.write(block)
+            written += len(block)
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"{elapsed:.2f} {written} {baseline / 1024:.1f} {peak / 1024:.1f}")
+
+
+def main(sizes):
+    print(f"{'rows':>10} {'format':>8} {'seconds':>8} {'rows/s':>10} {'MB out':>8} {'peak RSS MB':>12} {'over base MB':>13}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            db_path = os.path.join(tmp, f"bench_{n}.db")
+            seed(db_path, n)
+            for fmt in ("parquet", "arrow", "csv"):
+                out = subprocess.run(
+                    [sys.executable, "-m", "backend.benchmarks.bench_export", "--child", fmt, db_path],
+                    capture_output=True, text=True, check=True,
+                ).stdout.split()
+                elapsed, written, baseline, peak = out[-4:]
+                elapsed, peak = float(elapsed), float(peak)
+                print(f"{n:>10} {fmt:>8} {elapsed:>8.2f} {n / elapsed:>10.0f} {int(written) / 2**20:>8.1f} "
+                      f"{peak:>12.1f} {peak - float(baseline):>13.1f}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        child(sys.argv[2], sys.argv[3])
+    else:
+        main([int(a) for a in sys.argv[1:]] or [250_000, 1_000_000])
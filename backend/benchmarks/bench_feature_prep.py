@@ -0,0 +1,135 @@
+# Input preparation throughput and peak memory: the previous per-column
+# cleaning (several astype(str) copies, written back into the upload frame)
+# vs utils/features.prepare_frame.
+#
+#   python -m backend.benchmarks.bench_feature_prep [rows ...]
+#
+# The input is backend/data/churn.csv replicated to `rows` (default 1M),
+# with a few percent of values blanked to NaN so the fill paths run (not in
+# Contract, PaymentMethod or TotalCharges: the old code filled those with
+# "No" / "No" / 0, they now take the shared defaults). Each mode runs in a
+# fresh subprocess; "extra MB" is peak RSS during preparation over the RSS
+# once the frame is built (the peak is reset via /proc/self/clear_refs).
+# The script also checks that both produce the same model input, and that
+# prepare_row agrees with prepare_frame row by row.
+
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from backend.utils.features import FEATURE_COLUMNS, REQUIRED_COLUMNS, prepare_frame, prepare_row
+
+DATA_PATH = "backend/data/churn.csv"
+
+
+LEGACY_DEFAULTS = {
+    "gender": "Female", "SeniorCitizen": 0, "Partner": "No", "Dependents": "No",
+    "tenure": 0, "PhoneService": "Yes", "MultipleLines": "No", "InternetService": "DSL",
+    "OnlineSecurity": "No", "OnlineBackup": "No", "DeviceProtection": "No",
+    "TechSupport": "No", "StreamingTV": "No", "StreamingMovies": "No",
+    "PaperlessBilling": "Yes", "TotalCharges": 0,
+}
+
+
+def legacy_clean(df: pd.DataFrame):
+    # The cleaning batch scoring used before utils/features.py
+    auto_filled = []
+    for col in REQUIRED_COLUMNS:
+        if col not in df.columns:
+            df[col] = LEGACY_DEFAULTS.get(col, None)
+            auto_filled.append(col)
+
+    cat_cols = [c for c in REQUIRED_COLUMNS if df[c].dtype == 'object']
+    for c in cat_cols:
+        df[c] = df[c].fillna(LEGACY_DEFAULTS.get(c, "No")).astype(str).str.strip()
+
+    X = df[REQUIRED_COLUMNS].copy()
+    X["SeniorCitizen"] = pd.to_numeric(X["SeniorCitizen"], errors="coerce").fillna(0).astype(int)
+    X["tenure"] = pd.to_numeric(X["tenure"], errors="coerce").fillna(0).astype(int)
+    X["MonthlyCharges"] = pd.to_numeric(X["MonthlyCharges"], errors="coerce").fillna(0.0)
+    X["TotalCharges"] = pd.to_numeric(X["TotalCharges"], errors="coerce")
+    mask_nan_total = X["TotalCharges"].isna()
+    X.loc[mask_nan_total, "TotalCharges"] = X.loc[mask_nan_total, "MonthlyCharges"] * X.loc[mask_nan_total, "tenure"]
+    X["TotalCharges"] = X["TotalCharges"].fillna(0.0)
+    return X, auto_filled
+
+
+def make_frame(n_rows, seed=0):
+    base = pd.read_csv(DATA_PATH).drop(columns=["Churn"])
+    df = base.iloc[np.resize(np.arange(len(base)), n_rows)].reset_index(drop=True)
+    rng = np.random.default_rng(seed)
+    for col in ["Partner", "InternetService", "SeniorCitizen", "tenure", "MonthlyCharges"]:
+        df.loc[rng.random(n_rows) < 0.03, col] = np.nan
+    return df
+
+
+def same_input(a: pd.DataFrame, b: pd.DataFrame):
+    for col in FEATURE_COLUMNS:
+        left, right = a[col].to_numpy(), b[col].to_numpy()
+        if left.dtype == object or right.dtype == object:
+            left, right = left.astype(str), right.astype(str)
+        if not np.array_equal(left, right):
+            return False
+    return True
+
+
+def check(n_rows=50_000):
+    df = make_frame(n_rows)
+    legacy, _ = legacy_clean(df.copy())
+    new, _ = prepare_frame(df.copy())
+    assert same_input(legacy, new), "prepare_frame differs from the previous cleaning"
+
+    sample = df.sample(500, random_state=0)
+    rows = pd.DataFrame([prepare_row(r) for r in sample.to_dict("records")], index=sample.index)
+    assert same_input(rows, new.loc[sample.index]), "prepare_row differs from prepare_frame"
+    print(f"parity ok on {n_rows:,} rows (+500 via prepare_row)")
+
+
+def rss_mb():
+    # (current, peak) resident set size from /proc/self/status
+    values = {}
+    with open("/proc/self/status") as f:
+        for line in f:
+            name, _, rest = line.partition(":")
+            if name in ("VmRSS", "VmHWM"):
+                values[name] = int(rest.split()[0]) / 1024
+    return values["VmRSS"], values["VmHWM"]
+
+
+def child(mode, n_rows):
+    df = make_frame(n_rows)
+    with open("/proc/self/clear_refs", "w") as f:
+        f.write("5")
+    baseline, _ = rss_mb()
+    prepare = legacy_clean if mode == "legacy" else prepare_frame
+
+    start = time.perf_counter()
+    X, _ = prepare(df)
+    elapsed = time.perf_counter() - start
+
+    _, peak = rss_mb()
+    print(f"{len(X)} {elapsed:.3f} {peak - baseline:.1f} {X.memory_usage(deep=True).sum() / 2**20:.1f}")
+
+
+def main(sizes):
+    check()
+    print(f"{'rows':>10} {'mode':>8} {'seconds':>8} {'rows/s':>12} {'extra MB':>9} {'output MB':>10}")
+    for n in sizes:
+        for mode in ("legacy", "features"):
+            out = subprocess.run(
+                [sys.executable, "-m", "backend.benchmarks.bench_feature_prep", "--child", mode, str(n)],
+                capture_output=True, text=True, check=True,
+            ).stdout.split()
+            rows, elapsed, extra, size = out[-4:]
+            print(f"{int(rows):>10,} {mode:>8} {float(elapsed):>8.2f} {int(rows) / float(elapsed):>12,.0f} "
+                  f"{float(extra):>9.1f} {float(size):>10.1f}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        child(sys.argv[2], int(sys.argv[3]))
+    else:
+        main([int(a) for a in sys.argv[1:]] or [1_000_000])
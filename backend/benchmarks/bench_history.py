@@ -0,0 +1,112 @@
+# /history page latency at page 1 and page 10,000 on a large predictions
+# table: the original OFFSET + COUNT(*) query with no created_at index vs
+# keyset pagination on (created_at, id) with cached totals.
+#
+#   python -m backend.benchmarks.bench_history [n_rows] [repeats]
+
+import os
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from backend.api import history
+from backend.database.filters import CREATED_AT
+from backend.database.db import Base
+from backend.database.schema import Prediction
+from backend.database.bulk import bulk_insert_predictions
+from backend.benchmarks.bench_bulk_insert import make_frame
+
+LIMIT = 25
+PAGES = [1, 10_000]
+NEW_INDEXES = [
+    "ix_predictions_created_at_id",
+    "ix_predictions_label_created_at_id",
+    "ix_predictions_contract_created_at_id",
+]
+
+
+def legacy_page(db, page, **_):
+    records = (
+        db.query(Prediction)
+        .order_by(Prediction.created_at.desc())
+        .offset((page - 1) * LIMIT)
+        .limit(LIMIT)
+        .all()
+    )
+    total = db.query(Prediction).count()
+    return records, total
+
+
+def keyset_page(db, page, cursor=None, label=None):
+    return history.history_page_query(db, cursor=cursor, limit=LIMIT, label=label)
+
+
+def cursor_for(db, page, label=None):
+    # The next_cursor a client would hold after walking to `page`
+    if page == 1:
+        return None
+    query = db.query(Prediction.id, CREATED_AT).order_by(
+        Prediction.created_at.desc(), Prediction.id.desc()
+    )
+    if label is not None:
+        query = query.filter(Prediction.label == label)
+    record_id, created_at = query.offset((page - 1) * LIMIT - 1).first()
+    return history.encode_cursor(created_at, record_id)
+
+
+def timed(fn, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(n=1_000_000, repeats=3):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+
+        print(f"Seeding {n} predictions ...")
+        for offset in range(0, n, 200_000):
+            bulk_insert_predictions(db, make_frame(min(200_000, n - offset), seed=offset))
+        # Spread timestamps out, ten predictions per second
+        db.execute(text("UPDATE predictions SET created_at = datetime('2025-01-01', '+' || (id / 10) || ' seconds')"))
+        db.commit()
+
+        indexes = {i.name: i for i in Prediction.__table__.indexes}
+        for name in NEW_INDEXES:
+            indexes[name].drop(bind=engine)
+        db.execute(text("ANALYZE"))
+        before = {
+            (page, label): timed(lambda: (db.expire_all(), legacy_page(db, page)), repeats)
+            for page in PAGES for label in (None,)
+        }
+
+        for name in NEW_INDEXES:
+            indexes[name].create(bind=engine)
+        db.execute(text("ANALYZE"))
+        after = {}
+        for label in (None, "Likely to Churn"):
+            for page in PAGES:
+                cursor = cursor_for(db, page, label)
+                after[(page, label)] = timed(
+                    lambda: (db.expire_all(), keyset_page(db, page, cursor, label)), repeats
+                )
+
+        print(f"{'page':>8} {'filter':>18} {'offset ms':>10} {'keyset ms':>10}")
+        for (page, label), a in after.items():
+            b = before.get((page, label))
+            b_text = f"{b * 1000:>10.1f}" if b is not None else f"{'-':>10}"
+            print(f"{page:>8} {label or '-':>18} {b_text} {a * 1000:>10.2f}")
+        db.close()
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    main(*args)
@@ -0,0 +1,81 @@
+# KNN scoring throughput: sklearn brute-force predict_proba vs the indexed
+# engine (utils/knn_engine.py), single-threaded and on KNN_THREADS threads.
+#
+#   python -m backend.benchmarks.bench_knn_engine [rows]
+#
+# The input is backend/data/churn.csv replicated to `rows` (default 1M),
+# cleaned and encoded once; only the neighbour search + voting is timed.
+#
+# Parity checks (the script exits non-zero if one fails):
+#   * on the 7,043 distinct rows the engine's neighbour sets equal
+#     sklearn's kneighbors;
+#   * probabilities equal sklearn's predict_proba exactly, on every row and
+#     for every thread count.
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from backend.utils.features import prepare_frame
+from backend.utils.knn_engine import KNNEngine, THREADS, build_engine
+from backend.utils.model_loader import load_model
+
+DATA_PATH = "backend/data/churn.csv"
+
+
+def encode(pipeline, n_rows):
+    base, _ = prepare_frame(pd.read_csv(DATA_PATH).drop(columns=["Churn"]))
+    encoded = pipeline[:-1].transform(base)
+    encoded = np.asarray(encoded.toarray() if hasattr(encoded, "toarray") else encoded, dtype=np.float64)
+    return encoded, np.resize(encoded, (n_rows, encoded.shape[1]))
+
+
+def timed(fn, X):
+    start = time.perf_counter()
+    result = fn(X)
+    return result, time.perf_counter() - start
+
+
+def main(n_rows=1_000_000):
+    estimator = load_model().steps[-1][1]
+    engine = build_engine(estimator)
+    if engine is None:
+        sys.exit(f"{type(estimator).__name__} is not served by the KNN engine")
+
+    distinct, X = encode(load_model(), n_rows)
+    print(f"{n_rows:,} rows, {len(estimator._fit_X):,} training rows x {X.shape[1]} features, k={engine.k}")
+
+    # Neighbour sets against sklearn on the distinct rows
+    _, idx = engine.kneighbors(distinct)
+    _, sk_idx = estimator.kneighbors(distinct)
+    neighbor_mismatch = int((np.sort(idx, axis=1) != np.sort(sk_idx, axis=1)).any(axis=1).sum())
+    candidates, _ = engine.tree.query(distinct, k=engine.n_candidates)
+    ambiguous = int(engine.ambiguous(distinct, candidates).sum())
+
+    sk_proba, sk_s = timed(estimator.predict_proba, X)
+    print(f"{'sklearn brute':<22} {sk_s:8.2f}s  {n_rows / sk_s:12,.0f} rows/s")
+
+    results = {}
+    for threads in sorted({1, THREADS}):
+        runner = KNNEngine(estimator, threads=threads)
+        proba, seconds = timed(runner.predict_proba, X)
+        results[threads] = proba
+        print(f"{f'engine ({threads} thread)':<22} {seconds:8.2f}s  {n_rows / seconds:12,.0f} rows/s"
+              f"  {sk_s / seconds:5.1f}x")
+
+    differing = int((results[1] != sk_proba).any(axis=1).sum())
+    same_across_threads = all(np.array_equal(results[1], p) for p in results.values())
+
+    print(f"rows sent to sklearn (k-th neighbour within rounding of the next): {ambiguous:,} of {len(distinct):,}")
+    print(f"neighbour set mismatches vs sklearn: {neighbor_mismatch}")
+    print(f"rows differing from sklearn: {differing:,}")
+
+    if neighbor_mismatch or differing or not same_across_threads:
+        sys.exit("parity check failed")
+    print("parity ok")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
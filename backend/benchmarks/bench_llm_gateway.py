@@ -0,0 +1,127 @@
+# LLM calls against the fake server (fake_llm_server.py): the previous
+# direct calls vs utils/llm_gateway.py.
+#
+#   python -m backend.benchmarks.bench_llm_gateway [n_requests] [n_distinct]
+#
+# A burst of `n_requests` (default 80) prompts, `n_distinct` (default 25) of
+# them different, arrives at once. "direct" is the old path: the sync Groq
+# client called from the 4 explainer threads, no retries. "gateway" submits
+# everything to one LLMGateway. The server has 400 ms latency, takes at most
+# 8 open requests and 300 requests/minute, and answers 5% of requests with a
+# random 429. A second run points a gateway with a 1 s timeout at a server
+# with 3 s latency to show the fallback path.
+
+import asyncio
+import json
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from groq import AsyncGroq, Groq
+
+from backend.utils.llm_gateway import LLMGateway, LLMUnavailable
+
+MODEL = "llama-3.1-8b-instant"
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(*args):
+    port = free_port()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "backend.benchmarks.fake_llm_server", "--port", str(port), *args],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    for _ in range(100):
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+            return proc, f"http://127.0.0.1:{port}"
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError("fake LLM server did not start")
+
+
+def server_stats(url):
+    with urllib.request.urlopen(f"{url}/stats") as resp:
+        return json.load(resp)
+
+
+def prompts(n, distinct):
+    return [[{"role": "user", "content": f"Explain customer profile #{i % distinct}"}] for i in range(n)]
+
+
+def direct(url, burst):
+    client = Groq(api_key="fake", base_url=url, max_retries=0)
+
+    def call(messages):
+        try:
+            client.chat.completions.create(model=MODEL, messages=messages, temperature=0.4)
+            return True
+        except Exception:  # 429s and timeouts alike
+            return False
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        ok = sum(pool.map(call, burst))
+    return ok, time.perf_counter() - start
+
+
+def through_gateway(url, requests, **options):
+    gateway = LLMGateway(AsyncGroq(api_key="fake", base_url=url, max_retries=0), **options)
+
+    async def call(messages):
+        try:
+            await gateway.complete(messages, temperature=0.4, model=MODEL)
+            return True
+        except LLMUnavailable:
+            return False
+
+    async def run_all():
+        return await asyncio.gather(*(call(m) for m in requests))
+
+    start = time.perf_counter()
+    ok = sum(gateway.run(run_all()))
+    return ok, time.perf_counter() - start, gateway.stats()
+
+
+def main(n=80, distinct=25):
+    burst = prompts(n, distinct)
+    proc, url = start_server("--latency-ms", "400", "--max-concurrent", "8", "--rate-per-minute", "300",
+                             "--error-rate", "0.05")
+    try:
+        ok, elapsed = direct(url, burst)
+        seen = server_stats(url)
+        print(f"direct   {ok:>3}/{n} answered  {elapsed:6.2f} s  upstream {seen['requests']:>3}  "
+              f"429s {seen['requests'] - seen['ok']:>3}")
+
+        ok, elapsed, stats = through_gateway(url, burst, max_concurrency=4, rate_per_minute=240, burst=8,
+                                             timeout_s=15, max_retries=4, backoff_s=0.2)
+        after = server_stats(url)
+        requests = after["requests"] - seen["requests"]
+        errors = (after["requests"] - after["ok"]) - (seen["requests"] - seen["ok"])
+        print(f"gateway  {ok:>3}/{n} answered  {elapsed:6.2f} s  upstream {requests:>3}  429s {errors:>3}  "
+              f"coalesced {stats['coalesced']}  retries {stats['retries']}  "
+              f"avg rate wait {stats['avg_rate_wait_ms']} ms")
+    finally:
+        proc.kill()
+
+    proc, url = start_server("--latency-ms", "3000", "--jitter-ms", "0", "--error-rate", "0")
+    try:
+        ok, elapsed, stats = through_gateway(url, burst[:distinct], max_concurrency=4, rate_per_minute=0,
+                                             timeout_s=1.0)
+        print(f"timeout  {ok:>3}/{distinct} answered  {elapsed:6.2f} s  timeouts {stats['timeouts']} "
+              f"(callers get their fallback text after the 1 s budget)")
+    finally:
+        proc.kill()
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:]])
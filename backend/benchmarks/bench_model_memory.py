@@ -0,0 +1,96 @@
+# Per-worker memory and load time of the model: private unpickle vs the
+# memory-mapped artifact model_loader uses.
+#
+#   python -m backend.benchmarks.bench_model_memory [workers] [scale ...]
+#
+# `workers` processes (like gunicorn workers) each load the model, run the
+# warm-up inference and then report RSS, PSS (shared pages split between
+# the processes mapping them) and USS (private pages) from
+# /proc/self/smaps_rollup while all of them are alive. `scale` replicates the
+# KNN training matrix to stand in for bigger retrained models.
+
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+import joblib
+import numpy as np
+
+from backend.utils.model_loader import MODEL_PATH
+
+
+def smaps():
+    values = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+                values[parts[0][:-1]] = int(parts[1]) / 1024
+    return {
+        "rss": values.get("Rss", 0.0),
+        "pss": values.get("Pss", 0.0),
+        "uss": values.get("Private_Clean", 0.0) + values.get("Private_Dirty", 0.0),
+    }
+
+
+def make_artifact(tmp, scale):
+    path = os.path.join(tmp, f"model_x{scale}.joblib")
+    pipeline = joblib.load(MODEL_PATH)
+    knn = pipeline.steps[-1][1]
+    knn._fit_X = np.tile(knn._fit_X, (scale, 1))
+    knn._y = np.tile(knn._y, scale)
+    joblib.dump(pipeline, path)  # uncompressed, like model_loader.mmap_artifact
+    return path
+
+
+def worker(path, mmap, barrier, results):
+    from backend.utils.model_loader import ActiveModel
+
+    before = smaps()
+    start = time.perf_counter()
+    pipeline = joblib.load(path, mmap_mode="r" if mmap else None)
+    loaded = time.perf_counter() - start
+    ActiveModel("bench", pipeline, {}).warm_up()
+
+    barrier.wait()
+    after = smaps()
+    results.put((loaded, before, after))
+    barrier.wait()
+
+
+def run(path, mmap, workers):
+    ctx = multiprocessing.get_context("spawn")
+    barrier = ctx.Barrier(workers)
+    results = ctx.Queue()
+    procs = [ctx.Process(target=worker, args=(path, mmap, barrier, results)) for _ in range(workers)]
+    for p in procs:
+        p.start()
+    collected = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+    return collected
+
+
+def main(workers=4, scales=(1, 50)):
+    print(f"{workers} workers; MB per worker (mean), delta = after load - before load")
+    print(f"{'model MB':>9} {'mode':>7} {'load ms':>8} {'RSS':>7} {'PSS':>7} {'USS':>7} {'dPSS':>7} {'dUSS':>7} {'sum PSS':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in scales:
+            path = make_artifact(tmp, scale)
+            size = os.path.getsize(path) / 2**20
+            for mode, mmap in (("pickle", False), ("mmap", True)):
+                runs = run(path, mmap, workers)
+                mean = lambda key, which: np.mean([r[which][key] for r in runs])
+                load_ms = np.mean([r[0] for r in runs]) * 1000
+                print(
+                    f"{size:>9.1f} {mode:>7} {load_ms:>8.1f} {mean('rss', 2):>7.1f} {mean('pss', 2):>7.1f} "
+                    f"{mean('uss', 2):>7.1f} {mean('pss', 2) - mean('pss', 1):>7.1f} "
+                    f"{mean('uss', 2) - mean('uss', 1):>7.1f} {sum(r[2]['pss'] for r in runs):>8.1f}"
+                )
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    main(args[0] if args else 4, tuple(args[1:]) or (1, 50))
@@ -0,0 +1,92 @@
+# Segment profile cost (utils/segments.py): one groupby per scored chunk
+# over all four segment keys, vs grouping the whole scored upload once per
+# dimension afterwards.
+#
+#   python -m backend.benchmarks.bench_segments [rows ...]
+#
+# The input is backend/data/churn.csv replicated to `rows` (default 1M),
+# prepared and given random probabilities; the profile is built in chunks of
+# batch_scoring.DEFAULT_CHUNK_SIZE. The script checks that both give the
+# same per-dimension tables.
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from backend.utils.batch_scoring import DEFAULT_CHUNK_SIZE
+from backend.utils.features import prepare_frame
+from backend.utils.segments import (
+    DIMENSIONS, MEASURES, SERVICE_BUNDLES, TENURE_BANDS, TENURE_EDGES, SegmentProfile, service_bundle,
+)
+
+DATA_PATH = "backend/data/churn.csv"
+
+
+def make_input(n_rows, seed=0):
+    base = pd.read_csv(DATA_PATH).drop(columns=["Churn"])
+    X, _ = prepare_frame(base.iloc[np.resize(np.arange(len(base)), n_rows)].reset_index(drop=True))
+    probs = np.random.default_rng(seed).random(n_rows)
+    return X, probs
+
+
+def per_dimension(X, probs):
+    # Full scored frame, then one groupby per dimension
+    monthly = X["MonthlyCharges"].to_numpy()
+    frame = pd.DataFrame({
+        "contract": X["Contract"].astype(str),
+        "payment_method": X["PaymentMethod"].astype(str),
+        "tenure_band": [TENURE_BANDS[i] for i in np.searchsorted(TENURE_EDGES, X["tenure"].to_numpy())],
+        "service_bundle": [SERVICE_BUNDLES[b] for b in service_bundle(X)],
+        "rows": 1,
+        "likely_churn": (probs > 0.5).astype(np.int64),
+        "probability": probs,
+        "monthly_revenue": monthly,
+        "revenue_at_risk": probs * monthly,
+    })
+    return {dim: frame.groupby(dim)[MEASURES].sum() for dim in DIMENSIONS}
+
+
+def chunked(X, probs):
+    profile = SegmentProfile()
+    for start in range(0, len(X), DEFAULT_CHUNK_SIZE):
+        part = X.iloc[start:start + DEFAULT_CHUNK_SIZE]
+        p = probs[start:start + DEFAULT_CHUNK_SIZE]
+        profile.add(part, p, p > 0.5)
+    return profile.profile()
+
+
+def same(profile, reference):
+    for dim in DIMENSIONS:
+        ref = reference[dim]
+        for entry in profile["segments"][dim]:
+            row = ref.loc[entry["segment"]]
+            if entry["rows"] != row["rows"] or entry["likely_churn"] != row["likely_churn"]:
+                return False
+            if abs(entry["revenue_at_risk"] - row["revenue_at_risk"]) > 0.01:
+                return False
+        if len(profile["segments"][dim]) != len(ref):
+            return False
+    return True
+
+
+def main(sizes):
+    print(f"{'rows':>10} {'per-dimension s':>16} {'chunked profile s':>18}")
+    for n in sizes:
+        X, probs = make_input(n)
+
+        start = time.perf_counter()
+        reference = per_dimension(X, probs)
+        reference_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        profile = chunked(X, probs)
+        profile_s = time.perf_counter() - start
+
+        assert same(profile, reference), "chunked profile differs from per-dimension groupbys"
+        print(f"{n:>10,} {reference_s:>16.3f} {profile_s:>18.3f}")
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [1_000_000])
@@ -0,0 +1,59 @@
+# Parity check + micro-benchmark for the compiled single-row scoring path.
+#
+#   python -m backend.benchmarks.bench_single_row [n_rows]
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from backend.utils.model_loader import load_model, load_compiled_model
+
+DATA_PATH = "backend/data/churn.csv"
+
+
+def load_rows(n):
+    df = pd.read_csv(DATA_PATH).drop(columns=["Churn"]).head(n)
+    df["TotalCharges"] = pd.to_numeric(df["TotalCharges"], errors="coerce").fillna(0.0)
+    return df.to_dict(orient="records")
+
+
+def main(n=1000):
+    model = load_model()
+    compiled = load_compiled_model()
+    if compiled is None:
+        print("Model pipeline could not be compiled.")
+        sys.exit(1)
+
+    rows = load_rows(n)
+
+    # ----- PARITY -----
+    expected = model.predict_proba(pd.DataFrame(rows))[:, 1]
+    actual = compiled.predict_proba(compiled.encode_many(rows))
+    single = np.array([compiled.predict_row(r) for r in rows])
+
+    if not (np.array_equal(expected, actual) and np.array_equal(expected, single)):
+        diff = np.abs(expected - single).max()
+        print(f"PARITY FAILED: max abs diff {diff}")
+        sys.exit(1)
+    print(f"Parity OK on {len(rows)} rows")
+
+    # ----- LATENCY -----
+    start = time.perf_counter()
+    for r in rows:
+        float(model.predict_proba(pd.DataFrame([r]))[0][1])
+    pipeline_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for r in rows:
+        compiled.predict_row(r)
+    compiled_s = time.perf_counter() - start
+
+    print(f"sklearn pipeline: {pipeline_s / len(rows) * 1e6:8.1f} us/row")
+    print(f"compiled path:    {compiled_s / len(rows) * 1e6:8.1f} us/row")
+    print(f"speedup:          {pipeline_s / compiled_s:8.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
@@ -0,0 +1,54 @@
+# What-if grid: build cost, interpolation error against the real model and
+# lookup latency vs a model call, for a few charge-knot spacings.
+#
+#   python -m backend.benchmarks.bench_whatif [artifact.pkl]
+#
+# Defaults to the served model; pass another fitted pipeline (e.g. one
+# from ml/train_models.py) to compare. Error is measured on the grid's own
+# 2,000 random simple-form inputs (utils/whatif.py).
+
+import sys
+import time
+
+import joblib
+import numpy as np
+
+from backend.utils.features import prepare_row
+from backend.utils.model_loader import ActiveModel, get_active
+from backend.utils.whatif import ScoringGrid
+
+STEPS = [2.0, 1.0, 0.5, 0.25]
+
+
+def per_call_us(fn, calls=2000):
+    start = time.perf_counter()
+    for i in range(calls):
+        fn(i)
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main(artifact=None):
+    model = ActiveModel("bench", joblib.load(artifact), {}) if artifact else get_active()
+    print(f"model {model.version} ({type(model.pipeline.steps[-1][1]).__name__})")
+
+    rng = np.random.default_rng(1)
+    queries = [(int(t), c, p, float(m)) for t, c, p, m in zip(
+        rng.integers(0, 73, 2000), rng.choice(["Month-to-month", "One year", "Two year"], 2000),
+        rng.choice(["Electronic check", "Mailed check"], 2000), rng.uniform(18, 120, 2000),
+    )]
+    rows = [prepare_row({"tenure": t, "Contract": c, "PaymentMethod": p, "MonthlyCharges": m})
+            for t, c, p, m in queries]
+    model_us = per_call_us(lambda i: model.predict_rows([rows[i]]))
+
+    print(f"{'step':>6} {'cells':>8} {'build ms':>9} {'max err':>8} {'p99 err':>8} {'mean err':>9} "
+          f"{'labels':>7} {'lookup us':>10} {'model us':>9}")
+    for step in STEPS:
+        grid = ScoringGrid(model, charge_step=step)
+        lookup_us = per_call_us(lambda i: grid.lookup(*queries[i]))
+        e = grid.error
+        print(f"{step:>6} {grid.probabilities.size:>8,} {grid.build_ms:>9.0f} {e['max']:>8.4f} {e['p99']:>8.4f} "
+              f"{e['mean']:>9.4f} {e['label_agreement']:>7.2%} {lookup_us:>10.1f} {model_us:>9.1f}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else None)
@@ -0,0 +1,120 @@
+# Local stand-in for the Groq chat completions API, for exercising
+# utils/llm_gateway.py without a key or network:
+#
+#   python -m backend.benchmarks.fake_llm_server [--port 8900] [--latency-ms 400] ...
+#   GROQ_API_KEY=fake GROQ_BASE_URL=http://127.0.0.1:8900 uvicorn backend.app:app
+#
+# POST /openai/v1/chat/completions answers after --latency-ms (+- jitter)
+# with a canned completion. It answers 429 (with Retry-After) when more than
+# --max-concurrent requests are open, when its own --rate-per-minute bucket
+# is empty, or at random with --error-rate. GET /stats reports what it saw.
+
+import argparse
+import asyncio
+import hashlib
+import random
+import time
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+class FakeLLM:
+    def __init__(self, latency_ms, jitter_ms, rate_per_minute, burst, max_concurrent, error_rate, seed=0):
+        self.latency = latency_ms / 1000.0
+        self.jitter = jitter_ms / 1000.0
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst
+        self.max_concurrent = max_concurrent
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.open = 0
+        self.stats = {"requests": 0, "ok": 0, "rate_limited": 0, "overloaded": 0, "random_429": 0,
+                      "max_concurrent_seen": 0}
+
+    def _take_token(self):
+        if self.rate <= 0:
+            return True
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return True
+        return False
+
+    def _too_many(self, reason, retry_after):
+        self.stats[reason] += 1
+        return JSONResponse(
+            {"error": {"message": f"Rate limit reached ({reason})", "type": "requests", "code": "rate_limit_exceeded"}},
+            status_code=429, headers={"retry-after": f"{retry_after:.2f}"},
+        )
+
+    async def completions(self, request: Request):
+        body = await request.json()
+        self.stats["requests"] += 1
+
+        if self.open >= self.max_concurrent:
+            return self._too_many("overloaded", 0.1)
+        if not self._take_token():
+            return self._too_many("rate_limited", (1.0 - self.tokens) / self.rate)
+        if self.random.random() < self.error_rate:
+            return self._too_many("random_429", 0.05)
+
+        self.open += 1
+        self.stats["max_concurrent_seen"] = max(self.stats["max_concurrent_seen"], self.open)
+        try:
+            await asyncio.sleep(max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter)))
+        finally:
+            self.open -= 1
+
+        prompt = body["messages"][-1]["content"]
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8]
+        self.stats["ok"] += 1
+        return JSONResponse({
+            "id": f"chatcmpl-{digest}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": f"- Fake answer {digest}\n- {len(prompt)} prompt chars"},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": 12, "total_tokens": len(prompt) // 4 + 12},
+        })
+
+    async def get_stats(self):
+        return self.stats
+
+
+def make_app(**options):
+    fake = FakeLLM(**options)
+    app = FastAPI(title="Fake LLM")
+    app.add_api_route("/openai/v1/chat/completions", fake.completions, methods=["POST"])
+    app.add_api_route("/stats", fake.get_stats, methods=["GET"])
+    return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fake Groq chat completions server")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency-ms", type=float, default=400)
+    parser.add_argument("--jitter-ms", type=float, default=100)
+    parser.add_argument("--rate-per-minute", type=float, default=300)
+    parser.add_argument("--burst", type=float, default=10)
+    parser.add_argument("--max-concurrent", type=int, default=8)
+    parser.add_argument("--error-rate", type=float, default=0.05)
+    args = parser.parse_args(argv)
+
+    app = make_app(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, rate_per_minute=args.rate_per_minute,
+                   burst=args.burst, max_concurrent=args.max_concurrent, error_rate=args.error_rate)
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
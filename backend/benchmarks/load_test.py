@@ -0,0 +1,82 @@
+# HTTP load test against a running server: a dashboard-style mix of
+# analytics, history and single predictions at increasing concurrency.
+#
+#   uvicorn backend.app:app --port 8000          (one worker)
+#   python -m backend.benchmarks.load_test [base_url] [seconds] [concurrency ...]
+#
+# Each level runs `concurrency` client tasks in a closed loop for `seconds`
+# and reports throughput and latency percentiles.
+
+import asyncio
+import random
+import sys
+import time
+
+import httpx
+import numpy as np
+
+CONTRACTS = ["Month-to-month", "One year", "Two year"]
+PAYMENTS = ["Electronic check", "Mailed check", "Bank transfer (automatic)", "Credit card (automatic)"]
+
+
+def request_mix(rng):
+    roll = rng.random()
+    if roll < 0.30:
+        return "GET", "/analytics/summary", None
+    if roll < 0.45:
+        return "GET", "/analytics/trend_by_tenure", None
+    if roll < 0.75:
+        return "GET", "/history/", {"limit": 25, "contract": rng.choice(CONTRACTS), "min_probability": rng.random() / 2}
+    if roll < 0.90:
+        return "GET", f"/history/C{rng.randrange(100):04d}", None
+    return "POST", "/predict/simple", {
+        "customer_id": f"C{rng.randrange(100):04d}",
+        "tenure": rng.randrange(73),
+        "contract": rng.choice(CONTRACTS),
+        "monthly_charges": round(rng.uniform(18, 120), 2),
+        "payment_method": rng.choice(PAYMENTS),
+    }
+
+
+async def client_loop(client, deadline, seed, latencies, errors):
+    rng = random.Random(seed)
+    while time.perf_counter() < deadline:
+        method, path, payload = request_mix(rng)
+        start = time.perf_counter()
+        try:
+            if method == "GET":
+                r = await client.get(path, params=payload)
+            else:
+                r = await client.post(path, json=payload)
+            if r.status_code >= 500:
+                errors.append(r.status_code)
+        except httpx.HTTPError as e:
+            errors.append(type(e).__name__)
+        latencies.append(time.perf_counter() - start)
+
+
+async def run_level(base_url, seconds, concurrency):
+    latencies, errors = [], []
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        deadline = time.perf_counter() + seconds
+        await asyncio.gather(*[
+            client_loop(client, deadline, seed, latencies, errors) for seed in range(concurrency)
+        ])
+    lat = np.array(latencies) * 1000
+    return len(lat) / seconds, np.percentile(lat, 50), np.percentile(lat, 95), len(errors)
+
+
+async def main(base_url="http://127.0.0.1:8000", seconds=10, levels=(1, 8, 32, 128)):
+    print(f"{'clients':>8} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'errors':>7}")
+    for concurrency in levels:
+        rps, p50, p95, errors = await run_level(base_url, seconds, concurrency)
+        print(f"{concurrency:>8} {rps:>8.1f} {p50:>8.1f} {p95:>8.1f} {errors:>7}")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    base_url = args[0] if args else "http://127.0.0.1:8000"
+    seconds = int(args[1]) if len(args) > 1 else 10
+    levels = tuple(int(a) for a in args[2:]) or (1, 8, 32, 128)
+    asyncio.run(main(base_url, seconds, levels))
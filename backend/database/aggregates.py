@@ -0,0 +1,158 @@
+import numpy as np
+import pandas as pd
+from sqlalchemy import func, case
+from sqlalchemy.dialects import sqlite, postgresql
+from sqlalchemy.orm import Session
+
+from .schema import Prediction, PredictionAggregate
+from . import data_version
+
+# Materialized counts behind the /analytics endpoints. Every write to
+# `predictions` adds its deltas here in the same transaction, so the
+# dashboard reads a handful of rows instead of scanning the table. The
+# same calls bump the predictions data version that response caches use.
+
+BUCKET_EDGES = [0.2, 0.4, 0.6, 0.8]
+BUCKET_LABELS = ["0–0.2", "0.2–0.4", "0.4–0.6", "0.6–0.8", "0.8–1.0"]
+
+COUNTERS = ["total", "churn", "revenue", "revenue_at_risk"]
+
+
+def bucket_label(probability: float):
+    return BUCKET_LABELS[int(np.searchsorted(BUCKET_EDGES, probability, side="left"))]
+
+
+def _row(dimension, key, total, churn, revenue, revenue_at_risk):
+    return {
+        "dimension": dimension,
+        "key": str(key),
+        "total": int(total),
+        "churn": int(churn),
+        "revenue": float(revenue),
+        "revenue_at_risk": float(revenue_at_risk),
+    }
+
+
+def _keys(probability, contract, payment_method, label):
+    return [
+        ("all", "all"),
+        ("probability_bucket", bucket_label(probability)),
+        ("contract", contract or "Unknown"),
+        ("payment_method", payment_method or "Unknown"),
+        ("label", label or "Unknown"),
+    ]
+
+
+def _upsert(db: Session, rows):
+    if not rows:
+        return
+
+    dialect = db.get_bind().dialect.name
+    insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    table = PredictionAggregate.__table__
+
+    stmt = insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["dimension", "key"],
+        set_={c: table.c[c] + stmt.excluded[c] for c in COUNTERS},
+    )
+    db.execute(stmt, rows)
+    data_version.bump(db)
+
+
+def record_prediction(db: Session, probability: float, monthly_charges: float,
+                      contract: str, payment_method: str, label: str):
+    churn = probability > 0.5
+    monthly = monthly_charges or 0.0
+    _upsert(db, [
+        _row(dimension, key, 1, churn, monthly, monthly if churn else 0.0)
+        for dimension, key in _keys(probability, contract, payment_method, label)
+    ])
+
+
+def record_predictions(db: Session, frame: pd.DataFrame):
+    # `frame` has the `predictions` columns; one groupby per dimension.
+    if frame.empty:
+        return
+
+    churn = frame["probability"].to_numpy() > 0.5
+    monthly = frame["monthly_charges"].fillna(0.0).to_numpy(dtype=float)
+    values = pd.DataFrame({
+        "total": 1,
+        "churn": churn.astype(int),
+        "revenue": monthly,
+        "revenue_at_risk": np.where(churn, monthly, 0.0),
+    })
+
+    keys = {
+        "all": np.full(len(frame), "all", dtype=object),
+        "probability_bucket": np.asarray(BUCKET_LABELS, dtype=object)[
+            np.searchsorted(BUCKET_EDGES, frame["probability"].to_numpy(), side="left")
+        ],
+        "contract": frame["contract"].fillna("Unknown").to_numpy(),
+        "payment_method": frame["payment_method"].fillna("Unknown").to_numpy(),
+        "label": frame["label"].fillna("Unknown").to_numpy(),
+    }
+
+    rows = []
+    for dimension, key in keys.items():
+        grouped = values.groupby(key).sum()
+        for k, r in zip(grouped.index, grouped.itertuples(index=False)):
+            rows.append(_row(dimension, k, r.total, r.churn, r.revenue, r.revenue_at_risk))
+    _upsert(db, rows)
+
+
+def reset(db: Session):
+    db.query(PredictionAggregate).delete()
+    data_version.bump(db)
+
+
+def rebuild(db: Session):
+    # Recompute everything from `predictions` (backfill / repair).
+    reset(db)
+
+    churn = Prediction.probability > 0.5
+    bucket = case(
+        *[(Prediction.probability <= edge, label) for edge, label in zip(BUCKET_EDGES, BUCKET_LABELS)],
+        else_=BUCKET_LABELS[-1],
+    )
+    dimensions = {
+        "all": None,
+        "probability_bucket": bucket,
+        "contract": func.coalesce(Prediction.contract, "Unknown"),
+        "payment_method": func.coalesce(Prediction.payment_method, "Unknown"),
+        "label": func.coalesce(Prediction.label, "Unknown"),
+    }
+
+    rows = []
+    for dimension, key in dimensions.items():
+        columns = [
+            func.count(Prediction.id),
+            func.sum(case((churn, 1), else_=0)),
+            func.sum(func.coalesce(Prediction.monthly_charges, 0.0)),
+            func.sum(case((churn, func.coalesce(Prediction.monthly_charges, 0.0)), else_=0.0)),
+        ]
+        if key is None:
+            result = db.query(*columns).all()
+            rows += [_row(dimension, "all", *(v or 0 for v in r)) for r in result]
+        else:
+            result = db.query(key, *columns).group_by(key).all()
+            rows += [_row(dimension, r[0], *(v or 0 for v in r[1:])) for r in result]
+
+    _upsert(db, rows)
+
+
+def ensure_built(db: Session):
+    if db.get(PredictionAggregate, ("all", "all")) is None:
+        rebuild(db)
+        db.commit()
+
+
+def read_dimension(db: Session, dimension: str):
+    rows = (
+        db.query(PredictionAggregate)
+        .filter(PredictionAggregate.dimension == dimension)
+        .order_by(PredictionAggregate.key)
+        .all()
+    )
+    return {r.key: r for r in rows}
@@ -0,0 +1,60 @@
+import os
+import time
+
+import pandas as pd
+from sqlalchemy.orm import Session
+
+from .schema import Prediction
+from .aggregates import record_predictions
+
+PREDICTION_COLUMNS = [
+    "customer_id", "tenure", "monthly_charges", "contract",
+    "payment_method", "probability", "label", "model_version",
+]
+
+DEFAULT_BATCH_SIZE = int(os.getenv("BULK_INSERT_BATCH_SIZE", "10000"))
+
+
+class BulkInsertResult:
+    def __init__(self, rows=0, seconds=0.0):
+        self.rows = rows
+        self.seconds = seconds
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def __iadd__(self, other):
+        self.rows += other.rows
+        self.seconds += other.seconds
+        return self
+
+    def to_dict(self):
+        return {
+            "rows": self.rows,
+            "seconds": round(self.seconds, 4),
+            "rows_per_second": round(self.rows_per_second, 1),
+        }
+
+
+def bulk_insert_predictions(db: Session, frame: pd.DataFrame, batch_size: int = DEFAULT_BATCH_SIZE,
+                            commit: bool = True):
+    """Insert a scored frame into `predictions` with executemany.
+
+    `frame` holds the PREDICTION_COLUMNS; rows are written through a Core
+    INSERT in transactions of `batch_size` rows, bypassing the ORM unit of
+    work entirely; analytics aggregates are updated in the same transaction.
+    With commit=False everything stays in the caller's transaction.
+    """
+    start = time.perf_counter()
+    insert = Prediction.__table__.insert()
+    frame = frame[PREDICTION_COLUMNS]
+
+    for offset in range(0, len(frame), batch_size):
+        batch = frame.iloc[offset:offset + batch_size]
+        db.execute(insert, batch.to_dict("records"))
+        record_predictions(db, batch)
+        if commit:
+            db.commit()
+
+    return BulkInsertResult(len(frame), time.perf_counter() - start)
@@ -0,0 +1,14 @@
+from sqlalchemy.orm import Session
+
+from .schema import Prediction
+
+
+def latest_prediction(db: Session, customer_id: str):
+    # Newest prediction for a customer; a single descending seek on
+    # ix_predictions_customer_created_at_id (id breaks same-second ties).
+    return (
+        db.query(Prediction)
+        .filter(Prediction.customer_id == customer_id)
+        .order_by(Prediction.created_at.desc(), Prediction.id.desc())
+        .first()
+    )
@@ -0,0 +1,26 @@
+from sqlalchemy.dialects import sqlite, postgresql
+from sqlalchemy.orm import Session
+
+from .schema import DataVersion
+
+PREDICTIONS = "predictions"
+
+
+def bump(db: Session, name: str = PREDICTIONS):
+    # Runs inside the writer's transaction, so readers never see new rows
+    # under an old version.
+    dialect = db.get_bind().dialect.name
+    insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    table = DataVersion.__table__
+
+    stmt = insert(table).values(name=name, version=1)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["name"],
+        set_={"version": table.c.version + 1},
+    )
+    db.execute(stmt)
+
+
+def current(db: Session, name: str = PREDICTIONS):
+    row = db.get(DataVersion, name)
+    return row.version if row else 0
@@ -1,13 +1,125 @@
-from sqlalchemy import create_engine
+import os
+from pathlib import Path
+
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./churn.db"
+# Engine settings come from the environment (backend/.env is loaded here so
+# they are in place before the engines are created at import time):
+#
+#   DATABASE_URL            default sqlite:///./churn.db
+#   DATABASE_READ_URL       read replica for analytics/history; defaults to
+#                           DATABASE_URL (for SQLite: a query_only pool on the
+#                           same file, which WAL lets run beside the writer)
+#   DATABASE_ASYNC_URL      async driver URL; derived from DATABASE_URL
+#   DATABASE_ASYNC_READ_URL (sqlite -> sqlite+aiosqlite, postgresql -> +asyncpg)
+#   DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE
+#   SQLITE_JOURNAL_MODE     default WAL
+#   SQLITE_SYNCHRONOUS      default NORMAL (safe with WAL)
+#   SQLITE_CACHE_SIZE       PRAGMA cache_size; negative = KiB, default -65536
+#   SQLITE_MMAP_SIZE        bytes, default 268435456
+#   SQLITE_BUSY_TIMEOUT_MS  default 5000
+
+env_path = Path(__file__).resolve().parent.parent / ".env"
+load_dotenv(dotenv_path=env_path, override=True)
+
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./churn.db")
+SQLALCHEMY_READ_DATABASE_URL = os.getenv("DATABASE_READ_URL", SQLALCHEMY_DATABASE_URL)
+
+
+def sqlite_pragmas(read_only: bool = False):
+    pragmas = {
+        "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+        "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+        "cache_size": os.getenv("SQLITE_CACHE_SIZE", "-65536"),
+        "mmap_size": os.getenv("SQLITE_MMAP_SIZE", "268435456"),
+        "busy_timeout": os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"),
+    }
+    if read_only:
+        # journal_mode is a property of the file, set by the writer
+        del pragmas["journal_mode"]
+        pragmas["query_only"] = "ON"
+    return pragmas
+
+
+def pool_options():
+    return {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "-1")),
+        "pool_pre_ping": True,
+    }
+
+
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+
+def async_url(url: str):
+    scheme, rest = url.split("://", 1)
+    return f"{ASYNC_DRIVERS.get(scheme.split('+')[0], scheme)}://{rest}"
+
+
+def _sqlite_options(url: str, pragmas: dict):
+    options = {}
+    if ":memory:" not in url and not url.endswith("://"):
+        options = pool_options()
+        options.pop("pool_pre_ping")
+    busy_ms = float(pragmas.get("busy_timeout", 5000))
+    options["connect_args"] = {"check_same_thread": False, "timeout": busy_ms / 1000}
+    return options
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+
+def _apply_pragmas(engine, pragmas: dict):
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, _):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+def create_db_engine(url: str, read_only: bool = False, pragmas: dict = None):
+    if not url.startswith("sqlite"):
+        return create_engine(url, **pool_options())
+
+    pragmas = sqlite_pragmas(read_only) if pragmas is None else pragmas
+    engine = create_engine(url, **_sqlite_options(url, pragmas))
+    _apply_pragmas(engine, pragmas)
+    return engine
+
+
+def create_async_db_engine(url: str, read_only: bool = False, pragmas: dict = None):
+    if not url.startswith("sqlite"):
+        return create_async_engine(url, **pool_options())
+
+    pragmas = sqlite_pragmas(read_only) if pragmas is None else pragmas
+    engine = create_async_engine(url, **_sqlite_options(url, pragmas))
+    _apply_pragmas(engine.sync_engine, pragmas)
+    return engine
+
+
+engine = create_db_engine(SQLALCHEMY_DATABASE_URL)
+
+# Separate pool for dashboard reads (analytics, history) so they never queue
+# behind batch writers for a connection.
+read_engine = create_db_engine(SQLALCHEMY_READ_DATABASE_URL, read_only=True)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+# Async engines for the event-loop routes (analytics, history, auth, predict)
+async_engine = create_async_db_engine(
+    os.getenv("DATABASE_ASYNC_URL", async_url(SQLALCHEMY_DATABASE_URL))
+)
+async_read_engine = create_async_db_engine(
+    os.getenv("DATABASE_ASYNC_READ_URL", async_url(SQLALCHEMY_READ_DATABASE_URL)), read_only=True
+)
+
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+AsyncReadSessionLocal = async_sessionmaker(async_read_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
 
 Base = declarative_base()
@@ -0,0 +1,35 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import String, type_coerce
+
+from .schema import Prediction
+
+# created_at is compared as its stored text form ("YYYY-MM-DD HH:MM:SS", the
+# format CURRENT_TIMESTAMP writes) so cursors and date filters match rows
+# exactly and can use ix_predictions_created_at_id.
+CREATED_AT = type_coerce(Prediction.created_at, String)
+
+
+def timestamp(value: datetime):
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def prediction_filters(label=None, contract=None, min_probability=None, max_probability=None,
+                       start_date=None, end_date=None):
+    # WHERE clauses shared by /history and the exports; start inclusive, end exclusive.
+    conditions = []
+    if label is not None:
+        conditions.append(Prediction.label == label)
+    if contract is not None:
+        conditions.append(Prediction.contract == contract)
+    if min_probability is not None:
+        conditions.append(Prediction.probability >= min_probability)
+    if max_probability is not None:
+        conditions.append(Prediction.probability <= max_probability)
+    if start_date is not None:
+        conditions.append(CREATED_AT >= timestamp(start_date))
+    if end_date is not None:
+        conditions.append(CREATED_AT < timestamp(end_date))
+    return conditions
@@ -0,0 +1,26 @@
+from sqlalchemy import inspect, text
+
+from .db import Base
+from . import schema  # noqa: F401  (registers models on Base)
+
+
+def upgrade(engine):
+    # create_all() only creates missing tables, so columns and indexes added
+    # to existing models are brought in here for databases created earlier.
+    Base.metadata.create_all(bind=engine)
+
+    inspector = inspect(engine)
+
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            existing = {c["name"] for c in inspector.get_columns(table.name)}
+
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                col_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {col_type}"))
+                print(f"Added column '{column.name}' to '{table.name}'.")
+
+            for index in table.indexes:
+                index.create(bind=conn, checkfirst=True)
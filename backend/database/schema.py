@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, func
+from sqlalchemy import Column, Integer, String, Float, DateTime, Index, func
 from .db import Base
 
 class Prediction(Base):
@@ -8,13 +8,82 @@ class Prediction(Base):
     customer_id = Column(String, nullable=True)
     tenure = Column(Integer)
     monthly_charges = Column(Float)
-    contract = Column(String)
-    payment_method = Column(String) # <--- Added
-    probability = Column(Float)
-    label = Column(String)
+    contract = Column(String, index=True)
+    payment_method = Column(String, index=True) # <--- Added
+    probability = Column(Float, index=True)
+    label = Column(String, index=True)
     explanation = Column(String, nullable=True)
+    explanation_status = Column(String, nullable=True)  # "pending" | "ready" | "failed"
+    model_version = Column(String, nullable=True, index=True)  # registry version that scored the row
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    __table_args__ = (
+        # Tenure index that also covers trend_by_tenure's AVG(monthly_charges)
+        Index("ix_predictions_tenure_charges", "tenure", "monthly_charges"),
+        # Keyset pagination for /history, unfiltered and by label / contract
+        Index("ix_predictions_created_at_id", "created_at", "id"),
+        Index("ix_predictions_label_created_at_id", "label", "created_at", "id"),
+        Index("ix_predictions_contract_created_at_id", "contract", "created_at", "id"),
+        # Latest prediction per customer (history detail, reports)
+        Index("ix_predictions_customer_created_at_id", "customer_id", "created_at", "id"),
+    )
+
+class PredictionAggregate(Base):
+    # Running totals over `predictions`, maintained by every write path
+    __tablename__ = "prediction_aggregates"
+
+    dimension = Column(String, primary_key=True)  # all | probability_bucket | contract | payment_method | label
+    key = Column(String, primary_key=True)
+    total = Column(Integer, default=0)
+    churn = Column(Integer, default=0)  # probability > 0.5
+    revenue = Column(Float, default=0.0)  # sum of monthly_charges
+    revenue_at_risk = Column(Float, default=0.0)  # sum of monthly_charges where probability > 0.5
+
+class DataVersion(Base):
+    # Bumped by every write to `predictions`; response caches key on it
+    __tablename__ = "data_versions"
+
+    name = Column(String, primary_key=True)
+    version = Column(Integer, default=0)
+
+class ExplanationCacheEntry(Base):
+    __tablename__ = "explanation_cache"
+
+    key = Column(String, primary_key=True)  # sha256 of kind + canonical features
+    kind = Column(String)
+    value = Column(String)
+    created_at = Column(Float, index=True)  # unix time, for TTL / size pruning
+
+class BatchSummaryState(Base):
+    # Batch summaries still being generated or that failed; rows go away
+    # once the text is in the explanation cache
+    __tablename__ = "batch_summary_state"
+
+    key = Column(String, primary_key=True)  # explanation-cache key of the summary
+    status = Column(String)  # pending | failed
+    updated_at = Column(Float, index=True)  # unix time
+
+class BatchJob(Base):
+    __tablename__ = "batch_jobs"
+
+    id = Column(String, primary_key=True)  # uuid4 hex
+    filename = Column(String)
+    status = Column(String, index=True)  # queued | running | completed | failed | cancelled
+    input_path = Column(String)
+    output_path = Column(String, nullable=True)
+    chunk_size = Column(Integer)
+    total_rows = Column(Integer, nullable=True)
+    rows_scored = Column(Integer, default=0)
+    rows_persisted = Column(Integer, default=0)
+    likely_churn = Column(Integer, default=0)
+    output_bytes = Column(Integer, default=0)  # committed size of the output file, for resume
+    cancel_requested = Column(Integer, default=0)
+    heartbeat = Column(Float, nullable=True)  # unix time, refreshed while a worker runs the job
+    owner = Column(String, nullable=True)  # claim token of the worker running it
+    error = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
 class User(Base):
     __tablename__ = "users"
 
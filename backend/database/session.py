@@ -1,4 +1,4 @@
-from .db import SessionLocal
+from .db import SessionLocal, ReadSessionLocal, AsyncSessionLocal, AsyncReadSessionLocal
 
 def get_db():
     db = SessionLocal()
@@ -6,3 +6,22 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def get_read_db():
+    # Read-only session for dashboard queries (analytics, history)
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_async_read_db():
+    async with AsyncReadSessionLocal() as db:
+        yield db
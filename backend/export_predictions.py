@@ -0,0 +1,56 @@
+import sys
+import os
+import argparse
+from datetime import datetime
+
+# Add current directory to path so we can import backend modules
+sys.path.append(os.getcwd())
+
+from backend.database.db import ReadSessionLocal
+from backend.utils.export import stream_export, check_format, resolve_columns, ExportError, FORMATS, DEFAULT_CHUNK_SIZE
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the predictions table as Parquet, Arrow or gzip CSV.")
+    parser.add_argument("output", help="Output file, or - for stdout")
+    parser.add_argument("--format", choices=list(FORMATS), default="parquet")
+    parser.add_argument("--columns", help="Comma-separated column names (default: all)")
+    parser.add_argument("--label")
+    parser.add_argument("--contract")
+    parser.add_argument("--min-probability", type=float)
+    parser.add_argument("--max-probability", type=float)
+    parser.add_argument("--start-date", type=datetime.fromisoformat, help="created_at >= START (UTC)")
+    parser.add_argument("--end-date", type=datetime.fromisoformat, help="created_at < END (UTC)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    try:
+        check_format(args.format)
+        columns = resolve_columns([c.strip() for c in args.columns.split(",")] if args.columns else None)
+    except ExportError as e:
+        sys.exit(f"Error: {e}")
+
+    filters = {
+        "label": args.label, "contract": args.contract,
+        "min_probability": args.min_probability, "max_probability": args.max_probability,
+        "start_date": args.start_date, "end_date": args.end_date,
+    }
+
+    db = ReadSessionLocal()
+    out = sys.stdout.buffer if args.output == "-" else open(args.output, "wb")
+    try:
+        written = 0
+        for block in stream_export(db, args.format, columns, filters, args.chunk_size):
+            out.write(block)
+            written += len(block)
+    finally:
+        db.close()
+        if out is not sys.stdout.buffer:
+            out.close()
+
+    if out is not sys.stdout.buffer:
+        print(f"Wrote {written} bytes to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,12 @@
-import sqlite3
+import sys
 import os
 
-db_path = "churn.db"
+# Add current directory to path so we can import backend modules
+sys.path.append(os.getcwd())
 
-if not os.path.exists(db_path):
-    print("Database not found.")
-else:
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    
-    try:
-        cursor.execute("ALTER TABLE predictions ADD COLUMN explanation TEXT")
-        conn.commit()
-        print("Successfully added 'explanation' column to 'predictions' table.")
-    except sqlite3.OperationalError as e:
-        if "duplicate column name" in str(e).lower():
-            print("Column 'explanation' already exists.")
-        else:
-            print(f"Error: {e}")
-    finally:
-        conn.close()
+from backend.database.db import engine
+from backend.database.migrations import upgrade
+
+if __name__ == "__main__":
+    upgrade(engine)
+    print("Database schema is up to date.")
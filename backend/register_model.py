@@ -0,0 +1,52 @@
+import sys
+import os
+import argparse
+
+# Add current directory to path so we can import backend modules
+sys.path.append(os.getcwd())
+
+from backend.utils import model_loader
+
+
+def parse_metric(text):
+    name, _, value = text.partition("=")
+    try:
+        return name, float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected name=value, got '{text}'")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Register a fitted pipeline in the model registry.")
+    parser.add_argument("artifact", nargs="?", help="Path to a joblib-dumped sklearn pipeline")
+    parser.add_argument("--version", help="Version name, e.g. 2026-01-knn-k7")
+    parser.add_argument("--metric", action="append", type=parse_metric, default=[], help="name=value, repeatable")
+    parser.add_argument("--notes")
+    parser.add_argument("--activate", action="store_true", help="Serve this version (workers switch within MODEL_RELOAD_INTERVAL)")
+    parser.add_argument("--list", action="store_true", help="List registered versions and exit")
+    args = parser.parse_args()
+
+    if args.list:
+        active = model_loader.active_version_name()
+        for meta in model_loader.list_versions():
+            marker = "*" if meta["version"] == active else " "
+            print(f"{marker} {meta['version']:<30} {meta.get('estimator', ''):<24} {meta.get('created_at', '')} {meta.get('metrics', {})}")
+        return
+
+    if not args.artifact or not args.version:
+        parser.error("artifact and --version are required")
+
+    try:
+        metadata = model_loader.register(
+            args.artifact, args.version, metrics=dict(args.metric), notes=args.notes, activate=args.activate
+        )
+    except ValueError as e:
+        sys.exit(f"Error: {e}")
+
+    print(f"Registered {metadata['version']} ({metadata['estimator']}, sha256 {metadata['sha256'][:12]})")
+    if args.activate:
+        print("Activated.")
+
+
+if __name__ == "__main__":
+    main()
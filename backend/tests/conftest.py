@@ -0,0 +1,22 @@
+import os
+import tempfile
+
+import pytest
+
+# Point the app at a throwaway SQLite file before backend.database creates
+# its engines, and keep the model watcher and what-if grid out of the way.
+_tmp = tempfile.mkdtemp(prefix="churn-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp}/churn.db"
+os.environ.setdefault("MODEL_RELOAD_INTERVAL", "0")
+os.environ.setdefault("WHATIF_GRID", "0")
+os.environ.setdefault("MODEL_MMAP_DIR", f"{_tmp}/mmap")
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+
+    from backend.app import app
+
+    with TestClient(app) as c:
+        yield c
@@ -0,0 +1,25 @@
+from backend.database.db import SessionLocal
+from backend.database.schema import Prediction
+
+HEADER = "customerID,tenure,Contract,MonthlyCharges,PaymentMethod\n"
+
+
+def upload(client, text):
+    return client.post("/predict/batch", files={"file": ("batch.csv", text.encode(), "text/csv")})
+
+
+def test_header_only_csv_is_rejected(client):
+    resp = upload(client, HEADER)
+    assert resp.status_code == 400
+    assert resp.json()["detail"] == "CSV file has no rows"
+
+
+def test_blank_customer_ids_get_the_default(client):
+    resp = upload(client, HEADER + "BATCH-1,5,Month-to-month,70,Electronic check\n"
+                                   ",12,One year,55,Mailed check\n")
+    assert resp.status_code == 200
+    assert [r["customer_id"] for r in resp.json()["results_preview"]] == ["BATCH-1", "Unknown"]
+
+    with SessionLocal() as db:
+        ids = {p.customer_id for p in db.query(Prediction).order_by(Prediction.id.desc()).limit(2)}
+    assert ids == {"BATCH-1", "Unknown"}
@@ -0,0 +1,54 @@
+import threading
+
+import pytest
+
+from backend.utils.batcher import MicroBatcher
+
+
+def score(rows):
+    # Rejects any batch containing a "bad" row, like a model call would
+    if any(row.get("bad") for row in rows):
+        raise ValueError("bad row")
+    return [row["x"] / 10 for row in rows]
+
+
+def submit_together(batcher, rows):
+    results = [None] * len(rows)
+    start = threading.Barrier(len(rows))
+
+    def call(i):
+        start.wait()
+        try:
+            results[i] = batcher.submit(rows[i])
+        except ValueError as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(len(rows))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def test_batches_concurrent_rows():
+    batcher = MicroBatcher(score, window_ms=50, max_batch_size=64)
+    assert submit_together(batcher, [{"x": i} for i in range(8)]) == [i / 10 for i in range(8)]
+    assert batcher.stats()["batches"] < 8
+
+
+def test_bad_row_fails_only_its_own_request():
+    batcher = MicroBatcher(score, window_ms=50, max_batch_size=64)
+    rows = [{"x": i, "bad": i == 3} for i in range(8)]
+    results = submit_together(batcher, rows)
+
+    assert isinstance(results[3], ValueError)
+    assert [r for i, r in enumerate(results) if i != 3] == [i / 10 for i in range(8) if i != 3]
+    assert batcher.stats()["split_batches"] >= 1
+
+
+def test_single_row_error_propagates():
+    batcher = MicroBatcher(score, window_ms=1)
+    with pytest.raises(ValueError):
+        batcher.submit({"x": 1, "bad": True})
+    assert batcher.submit({"x": 2}) == 0.2
@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.compose import ColumnTransformer
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+from backend.utils.compiled_model import CompiledPipeline
+from backend.utils.features import CATEGORICAL, FEATURE_COLUMNS, NUMERIC, prepare_row
+from backend.utils.model_loader import load_model
+
+DATA_PATH = "backend/data/churn.csv"
+
+
+@pytest.fixture(scope="module")
+def rows():
+    # 300 rows of churn.csv (including the blank TotalCharges ones), plus
+    # unseen categories and missing or unparseable numbers
+    df = pd.read_csv(DATA_PATH).drop(columns=["Churn"])
+    sample = pd.concat([df[df["TotalCharges"].str.strip() == ""], df.sample(300, random_state=0)])
+    raw = sample.to_dict(orient="records")
+    raw[0]["Contract"] = "Three year"
+    raw[1]["PaymentMethod"] = "Cash"
+    raw[2]["InternetService"] = ""
+    raw[3]["tenure"] = None
+    raw[4]["MonthlyCharges"] = float("nan")
+    raw[5]["TotalCharges"] = "n/a"
+    del raw[6]["SeniorCitizen"]
+    return [prepare_row(r) for r in raw]
+
+
+def scaled_logistic(rows):
+    # A second pipeline shape: scaled numerics, unknown categories ignored
+    frame = pd.DataFrame(rows)
+    pipeline = Pipeline([
+        ("preprocess", ColumnTransformer([
+            ("cat", OneHotEncoder(handle_unknown="ignore"), CATEGORICAL),
+            ("num", StandardScaler(), NUMERIC),
+        ])),
+        ("logistic", LogisticRegression(max_iter=1000)),
+    ])
+    return pipeline.fit(frame[FEATURE_COLUMNS], np.arange(len(frame)) % 2)
+
+
+# The served KNN scores exactly; linear models may differ by an ulp
+# between a one-row and a batch BLAS call
+@pytest.mark.parametrize("make_pipeline, atol", [(lambda rows: load_model(), 0.0), (scaled_logistic, 1e-12)],
+                         ids=["served", "scaled"])
+def test_matches_sklearn_pipeline(rows, make_pipeline, atol):
+    pipeline = make_pipeline(rows)
+    compiled = CompiledPipeline(pipeline)
+    frame = pd.DataFrame(rows)
+
+    encoded = pipeline[:-1].transform(frame)
+    encoded = encoded.toarray() if hasattr(encoded, "toarray") else encoded
+    np.testing.assert_array_equal(compiled.encode_many(rows), encoded)
+
+    expected = pipeline.predict_proba(frame)[:, 1]
+    np.testing.assert_allclose(compiled.predict_proba(compiled.encode_many(rows)), expected, rtol=0, atol=atol)
+    np.testing.assert_allclose([compiled.predict_row(r) for r in rows], expected, rtol=0, atol=atol)
+
+
+def test_unknown_category_raises_when_encoder_does():
+    pipeline = load_model()
+    encoder = pipeline.steps[0][1].named_transformers_["cat"]
+    encoder.handle_unknown = "error"
+    try:
+        compiled = CompiledPipeline(pipeline)
+    finally:
+        encoder.handle_unknown = "ignore"
+    row = prepare_row({"Contract": "Three year"})
+    with pytest.raises(ValueError, match="Contract"):
+        compiled.encode(row)
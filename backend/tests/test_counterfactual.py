@@ -0,0 +1,25 @@
+import pytest
+
+CUSTOMER = {"customer_id": "CF-1", "tenure": 10, "contract": "Month-to-month", "monthly_charges": 80.0}
+
+
+def test_scores_variants(client):
+    resp = client.post("/whatif/counterfactual", json={
+        "customer": CUSTOMER, "changes": [{"tenure": "24"}], "vary": {"contract": ["One year", "Two year"]},
+    })
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["count"] == 3
+    assert {"tenure": 24} in [v["changes"] for v in body["variants"]]
+
+
+@pytest.mark.parametrize("change, field", [
+    ({"tenure": "abc"}, "tenure"),
+    ({"tenure": 2.5}, "tenure"),
+    ({"monthly_charges": None}, "monthly_charges"),
+    ({"contract": 12}, "contract"),
+])
+def test_rejects_unparseable_values(client, change, field):
+    resp = client.post("/whatif/counterfactual", json={"customer": CUSTOMER, "changes": [change]})
+    assert resp.status_code == 400
+    assert field in resp.json()["detail"]
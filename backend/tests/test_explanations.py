@@ -0,0 +1,132 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from backend.database.db import SessionLocal
+from backend.database.schema import Prediction
+from backend.utils import ai_helper
+from backend.utils.explainer import ensure_explanation, schedule_summary
+from backend.utils.explanation_cache import get_explanation_cache
+
+
+class StubClient:
+    """Sync stand-in for the Groq client: answers `text`, or raises `error`.
+
+    Calls block until `release` is set, so a test can look at the pending state.
+    """
+
+    def __init__(self, text="- Stub explanation", error=None):
+        self.text = text
+        self.error = error
+        self.calls = 0
+        self.release = threading.Event()
+        self.release.set()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        self.calls += 1
+        self.release.wait(10)
+        if self.error is not None:
+            raise self.error
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=self.text))])
+
+
+@pytest.fixture
+def stub():
+    previous = ai_helper.client
+    stub = StubClient()
+    ai_helper.set_client(stub)
+    get_explanation_cache().clear()
+    yield stub
+    stub.release.set()
+    ai_helper.set_client(previous)
+
+
+def predict(client, tenure):
+    # A distinct profile per test, so explanations never come from the cache
+    resp = client.post("/predict/", json={"customer_id": f"T-{tenure}", "tenure": tenure, "monthly_charges": 70.0})
+    assert resp.status_code == 200
+    return resp.json()
+
+
+def explanation(client, prediction_id, wait=0):
+    resp = client.get(f"/predict/{prediction_id}/explanation", params={"wait": wait})
+    assert resp.status_code == 200
+    return resp.json()
+
+
+def stored(prediction_id):
+    with SessionLocal() as db:
+        return db.get(Prediction, prediction_id)
+
+
+def test_pending_then_ready(client, stub):
+    stub.release.clear()
+    body = predict(client, 3)
+    assert body["explanation_status"] == "pending"
+    assert explanation(client, body["prediction_id"])["explanation_status"] == "pending"
+
+    stub.release.set()
+    result = explanation(client, body["prediction_id"], wait=5)
+    assert result == {"prediction_id": body["prediction_id"], "explanation_status": "ready",
+                      "explanation": "- Stub explanation"}
+    assert stored(body["prediction_id"]).explanation_status == "ready"
+
+
+def test_failure_is_recorded_and_retried(client, stub):
+    stub.error = ValueError("upstream broke")
+    body = predict(client, 5)
+
+    result = explanation(client, body["prediction_id"], wait=5)
+    assert result["explanation_status"] == "failed"
+    assert result["explanation"] == ai_helper.EXPLAIN_FALLBACK
+    record = stored(body["prediction_id"])
+    assert record.explanation_status == "failed" and record.explanation is None
+
+    stub.error = None
+    assert ensure_explanation(record) is None  # queued again
+    result = explanation(client, body["prediction_id"], wait=5)
+    assert result["explanation_status"] == "ready"
+    assert result["explanation"] == "- Stub explanation"
+    assert stub.calls == 2
+
+
+def test_long_poll_returns_when_ready(client, stub):
+    stub.release.clear()
+    body = predict(client, 7)
+    threading.Timer(0.5, stub.release.set).start()
+
+    start = time.monotonic()
+    result = explanation(client, body["prediction_id"], wait=10)
+    elapsed = time.monotonic() - start
+
+    assert result["explanation_status"] == "ready"
+    assert 0.3 < elapsed < 5
+
+
+def summary(client, key, wait=0):
+    resp = client.get(f"/predict/batch/summary/{key}", params={"wait": wait})
+    return resp.status_code, resp.json()
+
+
+def test_summary_state_survives_cache_clear(client, stub):
+    stub.release.clear()
+    key, status, _ = schedule_summary({"rows": 11, "segments": {}})
+    assert status == "pending"
+
+    get_explanation_cache().clear()  # what /clear and pruning do to the cache
+    assert summary(client, key) == (200, {"summary_key": key, "summary_status": "pending", "summary": None})
+
+    stub.release.set()
+    code, body = summary(client, key, wait=5)
+    assert (code, body["summary_status"], body["summary"]) == (200, "ready", "- Stub explanation")
+
+
+def test_failed_summary(client, stub):
+    stub.error = ValueError("upstream broke")
+    key, _, _ = schedule_summary({"rows": 12, "segments": {}})
+    code, body = summary(client, key, wait=5)
+    assert (code, body["summary_status"], body["summary"]) == (200, "failed", ai_helper.SUMMARY_FALLBACK)
+    assert summary(client, "0" * 64)[0] == 404
@@ -0,0 +1,88 @@
+import io
+import os
+import threading
+import time
+
+import pytest
+
+from backend.database.db import SessionLocal
+from backend.database.schema import BatchJob, Prediction
+from backend.utils import jobs
+
+CSV = "customerID,tenure,Contract,MonthlyCharges,PaymentMethod\n" + "".join(
+    f"JOB-{i},{i % 72},Month-to-month,{20 + i % 90},Electronic check\n" for i in range(250)
+)
+
+
+@pytest.fixture
+def db(client, tmp_path, monkeypatch):
+    # `client` so the app has created the schema; jobs run in-process
+    monkeypatch.setattr(jobs, "JOB_DIR", tmp_path)
+    monkeypatch.setattr(jobs, "submit", lambda job_id: None)
+    with SessionLocal() as session:
+        yield session
+
+
+def new_job(db):
+    return jobs.create_job(db, io.BytesIO(CSV.encode()), "jobs.csv", chunk_size=100)
+
+
+def test_runs_to_completion_and_delete_removes_files(db):
+    job = new_job(db)
+    jobs.run_job(job.id)
+    db.refresh(job)
+    assert (job.status, job.rows_persisted, job.owner is not None) == ("completed", 250, True)
+    assert not os.path.exists(job.input_path)
+    with open(job.output_path) as f:
+        assert len(f.readlines()) == 251
+
+    output = job.output_path
+    jobs.delete_job(db, job)
+    assert not os.path.exists(output)
+    assert db.get(BatchJob, job.id) is None
+
+
+def test_slow_job_keeps_its_claim(db, monkeypatch):
+    monkeypatch.setattr(jobs, "STALE_SECONDS", 0.4)
+    job = new_job(db)
+    owner = jobs._claim(db, job.id)
+    stop = threading.Event()
+    threading.Thread(target=jobs._keep_alive, args=(job.id, owner, stop), daemon=True).start()
+    try:
+        time.sleep(1.0)  # a chunk taking longer than STALE_SECONDS
+        db.refresh(job)
+        assert not jobs.is_stale(job)
+        assert jobs._claim(db, job.id) is None
+    finally:
+        stop.set()
+
+    time.sleep(0.6)  # heartbeat stopped: the job is up for grabs
+    db.refresh(job)
+    assert jobs.is_stale(job)
+    assert jobs._claim(db, job.id) not in (None, owner)
+
+
+def test_worker_that_lost_the_job_writes_nothing(db):
+    job = new_job(db)
+    owner = jobs._claim(db, job.id)
+    db.query(BatchJob).filter(BatchJob.id == job.id).update({"owner": "someone-else"})  # taken over
+    db.commit()
+
+    before = db.query(Prediction).filter(Prediction.customer_id.like("JOB-%")).count()
+    jobs._process(db, db.get(BatchJob, job.id), owner)
+    db.refresh(job)
+    assert (job.status, job.rows_persisted, job.output_bytes) == ("running", 0, 0)
+    assert db.query(Prediction).filter(Prediction.customer_id.like("JOB-%")).count() == before
+    assert os.path.getsize(job.output_path) == 0
+
+
+def test_expired_jobs_are_removed(db, monkeypatch):
+    job = new_job(db)
+    jobs.run_job(job.id)
+    db.refresh(job)
+    output = job.output_path
+
+    assert jobs.expire_jobs(db) == 0
+    assert jobs.expire_jobs(db, now=time.time() + jobs.RETENTION_SECONDS + 60) == 1
+    assert not os.path.exists(output)
+    assert db.get(BatchJob, job.id) is None
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+import scipy.sparse as sp
+from sklearn.linear_model import LogisticRegression
+from sklearn.neighbors import KNeighborsClassifier
+
+from backend.utils.knn_engine import KNNEngine, build_engine
+
+
+@pytest.fixture(scope="module")
+def lattice():
+    # Small integer lattice with duplicated points: queries on and between
+    # the knots have many exactly tied neighbours; a 1e-13 nudge makes
+    # near-ties that only sklearn's own rounding can order
+    rng = np.random.default_rng(0)
+    knots = np.array([(x, y, z) for x in range(4) for y in range(4) for z in range(3)], dtype=float)
+    fit_X = np.vstack([knots, knots[rng.choice(len(knots), 20)]])
+    y = rng.integers(0, 2, len(fit_X))
+    queries = np.vstack([
+        knots,
+        (knots[:-1] + knots[1:]) / 2,
+        knots + 1e-13,
+        rng.uniform(0, 3, (200, 3)),
+    ])
+    return fit_X, y, queries
+
+
+@pytest.mark.parametrize("k", [1, 3, 5, 8])
+@pytest.mark.parametrize("threads, block_rows", [(1, 4096), (3, 16)])
+def test_matches_sklearn_with_ties(lattice, k, threads, block_rows):
+    fit_X, y, queries = lattice
+    estimator = KNeighborsClassifier(n_neighbors=k).fit(fit_X, y)
+    engine = KNNEngine(estimator, threads=threads, block_rows=block_rows)
+
+    candidates, _ = engine.tree.query(queries, k=engine.n_candidates)
+    assert engine.ambiguous(queries, candidates).sum() > len(queries) // 4  # the fallback is exercised
+
+    dist, idx = engine.kneighbors(queries)
+    sk_dist, sk_idx = estimator.kneighbors(queries)
+    np.testing.assert_array_equal(np.sort(idx, axis=1), np.sort(sk_idx, axis=1))
+    np.testing.assert_allclose(dist, sk_dist, rtol=0, atol=1e-7)
+    np.testing.assert_array_equal(engine.predict_proba(queries), estimator.predict_proba(queries))
+
+
+def test_matches_sklearn_on_random_data():
+    rng = np.random.default_rng(1)
+    X = rng.normal(size=(2000, 6))
+    y = rng.integers(0, 3, len(X))
+    estimator = KNeighborsClassifier(n_neighbors=7, metric="minkowski", p=2).fit(X, y)
+    queries = rng.normal(size=(500, 6))
+    np.testing.assert_array_equal(build_engine(estimator).predict_proba(queries), estimator.predict_proba(queries))
+
+
+@pytest.mark.parametrize("estimator, X", [
+    (KNeighborsClassifier(weights="distance"), None),
+    (KNeighborsClassifier(metric="manhattan"), None),
+    (KNeighborsClassifier(p=1), None),
+    (KNeighborsClassifier(), "sparse"),
+    (KNeighborsClassifier(n_neighbors=50), "small"),
+    (LogisticRegression(), None),
+])
+def test_unsupported_estimators(estimator, X):
+    rng = np.random.default_rng(2)
+    data = rng.normal(size=(40 if X == "small" else 100, 4))
+    estimator.fit(sp.csr_matrix(data) if X == "sparse" else data, rng.integers(0, 2, len(data)))
+    assert build_engine(estimator) is None
+
+
+def test_disabled():
+    estimator = KNeighborsClassifier().fit(np.eye(10), np.arange(10) % 2)
+    assert build_engine(estimator, use_engine=False) is None
+    assert build_engine(estimator) is not None
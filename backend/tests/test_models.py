@@ -0,0 +1,38 @@
+import pytest
+
+from backend.api.auth import require_admin
+from backend.app import app
+from backend.utils import model_loader
+
+
+@pytest.fixture
+def registry(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(model_loader, "REGISTRY_DIR", tmp_path / "registry")
+    app.dependency_overrides[require_admin] = lambda: None
+    model_loader.register(model_loader.MODEL_PATH, "v1")
+    yield tmp_path / "registry"
+    app.dependency_overrides.pop(require_admin)
+    monkeypatch.undo()
+    model_loader.activate()
+
+
+@pytest.mark.parametrize("version, status", [
+    ("%2E%2E", 400), ("...", 400), (".hidden", 400), ("a%5Cb", 400), ("v2", 404),
+])
+def test_rejects_bad_or_unknown_versions(client, registry, version, status):
+    resp = client.post(f"/models/{version}/activate")
+    assert resp.status_code == status
+    assert not (registry / "ACTIVE").exists()
+
+
+def test_activates_registered_version(client, registry):
+    resp = client.post("/models/v1/activate")
+    assert resp.status_code == 200
+    assert resp.json()["version"] == "v1"
+    assert (registry / "ACTIVE").read_text() == "v1"
+
+
+def test_register_rejects_path_like_names(registry):
+    for version in ("../escape", "a/b", ""):
+        with pytest.raises(ValueError):
+            model_loader.register(model_loader.MODEL_PATH, version)
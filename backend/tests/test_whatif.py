@@ -0,0 +1,29 @@
+import pytest
+
+from backend.utils import whatif
+from backend.utils.model_loader import ActiveModel, load_model
+
+
+@pytest.fixture
+def model(monkeypatch):
+    monkeypatch.setattr(whatif, "ENABLED", True)
+    return ActiveModel("test", load_model(), {})
+
+
+def test_inaccurate_grid_is_not_built(model, monkeypatch):
+    monkeypatch.setattr(whatif, "MAX_ERROR", 0.01)
+    assert model.serving_grid is None
+    assert model._whatif is None
+    assert model._whatif_check["max"] > 0.01
+
+
+def test_accurate_grid_serves(model, monkeypatch):
+    monkeypatch.setattr(whatif, "MAX_ERROR", 1.0)
+    grid = model.serving_grid
+    assert grid is not None and grid.accurate
+    assert grid.lookup(5, "Month-to-month", "Electronic check", 70.0) is not None
+
+
+def test_check_agrees_with_full_grid(model):
+    check = whatif.check_error(model)
+    assert (check["max"] <= whatif.MAX_ERROR) == model.whatif.accurate
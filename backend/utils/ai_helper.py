@@ -1,9 +1,13 @@
+import asyncio
+import json
 import os
-from groq import Groq
-import os
+from groq import AsyncGroq
 from pathlib import Path
 from dotenv import load_dotenv
 
+from .explanation_cache import get_explanation_cache, cache_key, ID_FIELDS
+from .llm_gateway import LLMGateway, LLMUnavailable
+
 # load .env from the same directory as this file (backend/utils/)
 # OR better: from the backend root. 
 # ai_helper is in backend/utils, .env is in backend/.
@@ -11,16 +15,54 @@ env_path = Path(__file__).resolve().parent.parent / ".env"
 load_dotenv(dotenv_path=env_path, override=True)
 
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+# e.g. http://127.0.0.1:8900 for backend/benchmarks/fake_llm_server.py
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL") or None
 client = None
 
 if GROQ_API_KEY:
-    client = Groq(api_key=GROQ_API_KEY)
+    # Retries and timeouts are the gateway's job (utils/llm_gateway.py)
+    client = AsyncGroq(api_key=GROQ_API_KEY, base_url=GROQ_BASE_URL, max_retries=0)
 else:
     print("⚠️ GROQ_API_KEY is not set. AI explanations will be disabled.")
 
 MODEL = "llama-3.1-8b-instant"
 
-def explain_single_customer(features: dict, probability: float):
+EXPLAIN_FALLBACK = "AI explanation is temporarily unavailable. Please try again shortly."
+SUMMARY_FALLBACK = "AI summary is temporarily unavailable. Please try again shortly."
+
+gateway = LLMGateway.from_env(client)
+
+def set_client(new_client):
+    # Swap the chat client, e.g. for a local stub that mimics
+    # client.chat.completions.create(...) in tests.
+    global client
+    client = new_client
+    gateway.client = new_client
+
+def explain_single_customer(features: dict, probability: float, fallback: str = EXPLAIN_FALLBACK):
+    # Blocking wrapper; the call itself runs on the gateway loop
+    return gateway.run(explain_single_customer_async(features, probability, fallback))
+
+async def explain_single_customer_async(features: dict, probability: float, fallback: str = EXPLAIN_FALLBACK):
+    """LLM explanation of one prediction; await on the gateway loop.
+
+    Returns `fallback` if the LLM doesn't answer in time (LLMUnavailable is
+    raised instead when fallback is None). Fallbacks are never cached.
+    """
+    if not client:
+        return "AI Explanation is currently unavailable (Missing API Key)."
+
+    # Identical profiles (ignoring customer ID) with the same rounded
+    # probability share one explanation.
+    cache = get_explanation_cache()
+    key = cache_key(f"explain:{MODEL}", features, probability)
+    cached = await asyncio.to_thread(cache.get, key)
+    if cached is not None:
+        return cached
+
+    # Keep IDs out of the prompt so the cached text fits every matching profile
+    features = {k: v for k, v in features.items() if k not in ID_FIELDS}
+
     prompt = f"""
 You are an analyst. Explain why a telecom customer may or may not churn.
 
@@ -35,40 +77,62 @@ Write 4–6 short bullet points:
 - keep simple and non-technical
 """
 
-    if not client:
-        return "AI Explanation is currently unavailable (Missing API Key)."
+    try:
+        explanation = await gateway.complete([{"role": "user", "content": prompt}], temperature=0.4, model=MODEL)
+    except LLMUnavailable:
+        if fallback is None:
+            raise
+        return fallback
+    await asyncio.to_thread(cache.put, key, explanation, "explain")
+    return explanation
+
+
+def summary_key(profile: dict):
+    # Explanation-cache key of the summary for a batch segment profile
+    return cache_key(f"summary:{MODEL}", profile)
+
+
+def summarize_batch(profile: dict, fallback: str = SUMMARY_FALLBACK):
+    # Blocking wrapper; the call itself runs on the gateway loop
+    return gateway.run(summarize_batch_async(profile, fallback))
 
-    resp = client.chat.completions.create(
-        model=MODEL,
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.4,
-    )
 
-    return resp.choices[0].message.content.strip()
+async def summarize_batch_async(profile: dict, fallback: str = SUMMARY_FALLBACK):
+    # `profile` is the batch segment profile (utils/segments.py); fallback
+    # handling as in explain_single_customer_async
+    if not client:
+        return "AI Summary is currently unavailable (Missing API Key)."
 
+    cache = get_explanation_cache()
+    key = summary_key(profile)
+    cached = await asyncio.to_thread(cache.get, key)
+    if cached is not None:
+        return cached
 
-def summarize_batch(stats: dict):
+    segments = json.dumps(profile, separators=(",", ":"))
     prompt = f"""
 You are a telecom churn analyst.
 
-Dataset summary:
-{stats}
+Scored batch profile (JSON). churn_rate is the share of customers predicted
+to churn; revenue_at_risk is the expected monthly revenue lost to churn.
+"segments" breaks the batch down by contract, payment method, tenure band
+and service bundle; "top_segments" are the combinations with the most
+revenue at risk:
+{segments}
 
 Explain in 6–8 bullet points:
-- % likely churn customers
-- which segments are risky
+- % likely churn customers and the monthly revenue at risk
+- which segments are risky, citing their numbers
 - common reasons churn occurs
 - suggested retention actions
 - short actionable insights for business
 """
 
-    if not client:
-        return "AI Summary is currently unavailable (Missing API Key)."
-
-    resp = client.chat.completions.create(
-        model=MODEL,
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.5,
-    )
-
-    return resp.choices[0].message.content.strip()
+    try:
+        summary = await gateway.complete([{"role": "user", "content": prompt}], temperature=0.5, model=MODEL)
+    except LLMUnavailable:
+        if fallback is None:
+            raise
+        return fallback
+    await asyncio.to_thread(cache.put, key, summary, "summary")
+    return summary
@@ -0,0 +1,218 @@
+import os
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.tree import DecisionTreeClassifier
+
+from .features import prepare_frame
+
+# Local, vectorized feature attributions for the served pipeline; they fill
+# PredictResponse.reasons without a network call. Attributions are computed
+# on the encoded matrix and summed back onto the input columns (one-hot
+# groups -> their column), one row per scored row:
+#
+#   logistic regression  coef * (x - background mean), in log-odds
+#   random forest / tree path contributions: the change in the churn
+#   decision tree        fraction at every split along each row's path,
+#                        averaged over trees (precomputed per node, so a
+#                        row costs one lookup per tree), in probability
+#   KNN                  neighbour evidence: each neighbour's label minus
+#                        the training churn rate, weighted like the vote
+#                        and shared among the input columns on which it
+#                        matches the row (rarer shared categories count
+#                        more), in probability
+#
+# In every case base + contributions.sum() equals the model output (the
+# log-odds for logistic regression).
+
+BACKGROUND_PATH = os.getenv("ATTRIBUTION_BACKGROUND", "backend/data/churn.csv")
+BLOCK_ROWS = 4096
+TOP_REASONS = 3
+
+
+def _background_mean(model):
+    # Mean encoded row of the reference data; zeros if it's unavailable
+    try:
+        frame, _ = prepare_frame(pd.read_csv(BACKGROUND_PATH).drop(columns=["Churn"], errors="ignore"))
+    except (OSError, ValueError, KeyError) as e:
+        print(f"⚠️ Attribution background unavailable ({e}); using a zero baseline")
+        return np.zeros(model.compiled.n_features)
+    encoded = model.pipeline[:-1].transform(frame)
+    return np.asarray(encoded.mean(axis=0)).ravel()
+
+
+class Attributor:
+    def __init__(self, model):
+        compiled = model.compiled
+        self.estimator = estimator = compiled.estimator
+        self.positive = list(estimator.classes_).index(estimator.classes_[-1])
+
+        # Input columns and the encoded indices that belong to each
+        self.inputs = [col for col, _, _ in compiled.onehot] + [col for col, _, _, _ in compiled.numeric]
+        self.group = np.zeros((compiled.n_features, len(self.inputs)))
+        self.categories = {}
+        for i, (col, table, _) in enumerate(compiled.onehot):
+            self.group[list(table.values()), i] = 1.0
+            self.categories[i] = (np.asarray(list(table.values())), np.asarray(list(table), dtype=object))
+        self.numeric = {}
+        for i, (col, idx, mean, scale) in enumerate(compiled.numeric, start=len(compiled.onehot)):
+            self.group[idx, i] = 1.0
+            self.numeric[i] = (idx, mean, scale)
+
+        if isinstance(estimator, LogisticRegression) and estimator.coef_.shape[0] == 1:
+            self.method, self.units = "linear", "log-odds"
+            self._init_linear(_background_mean(model))
+        elif isinstance(estimator, (RandomForestClassifier, ExtraTreesClassifier, DecisionTreeClassifier)):
+            self.method, self.units = "tree_path", "probability"
+            self._init_trees()
+        elif isinstance(estimator, KNeighborsClassifier):
+            self.method, self.units = "neighbors", "probability"
+            self._init_neighbors(compiled.engine)
+        else:
+            raise ValueError(f"No attribution method for {type(estimator).__name__}")
+
+    # ---- logistic regression ----
+    def _init_linear(self, background):
+        self.coef = self.estimator.coef_[0]
+        self.background = background
+        self.base = float(self.estimator.intercept_[0] + background @ self.coef)
+
+    def _linear(self, X):
+        return ((X - self.background) * self.coef) @ self.group
+
+    # ---- tree ensembles ----
+    def _init_trees(self):
+        # Per tree, the summed contributions along the path to every node,
+        # so a row's attribution is one lookup per tree on its leaf (apply).
+        self.trees = getattr(self.estimator, "estimators_", [self.estimator])
+        input_of = self.group.argmax(axis=1)
+        self.node_tables, roots = [], []
+        for tree in self.trees:
+            t = tree.tree_
+            value = t.value[:, 0, :]
+            churn = value[:, self.positive] / value.sum(axis=1)
+            parent = np.full(t.node_count, -1)
+            for children in (t.children_left, t.children_right):
+                inner = children >= 0
+                parent[children[inner]] = np.flatnonzero(inner)
+
+            table = np.zeros((t.node_count, len(self.inputs)))
+            # Breadth-first from the root: a node's path sum is its parent's
+            # plus the step into it
+            level = np.array([0])
+            while len(level):
+                children = np.concatenate([t.children_left[level], t.children_right[level]])
+                children = children[children >= 0]
+                if len(children):
+                    table[children] = table[parent[children]]
+                    table[children, input_of[t.feature[parent[children]]]] += churn[children] - churn[parent[children]]
+                level = children
+            self.node_tables.append((table / len(self.trees)).astype(np.float32))
+            roots.append(churn[0])
+        self.base = float(np.mean(roots))
+
+    def _tree_path(self, X):
+        # Tree.apply per tree: the forest's own apply() goes through joblib,
+        # which costs more than the lookups for a single row
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        out = np.zeros((len(X), len(self.inputs)))
+        for tree, table in zip(self.trees, self.node_tables):
+            out += table[tree.tree_.apply(X)]
+        return out
+
+    # ---- KNN ----
+    def _init_neighbors(self, engine):
+        est = self.estimator
+        self.engine = engine
+        self.fit_X = np.asarray(est._fit_X)
+        self.neighbor_churn = (np.asarray(est._y) == self.positive).astype(float)
+        self.base = float(self.neighbor_churn.mean())
+        # Numeric inputs: similarity decays with the gap in training std units
+        spread = self.fit_X.std(axis=0) @ self.group
+        self.numeric_spread = np.where(spread > 0, spread, 1.0)
+        self.is_numeric = np.zeros(len(self.inputs), dtype=bool)
+        self.is_numeric[list(self.numeric)] = True
+        # Matching on a common category says little: weight matches by
+        # 1 - the category's share of the training data
+        self.frequency = np.where(self.group[:, self.is_numeric].any(axis=1), 0.0, self.fit_X.mean(axis=0))
+
+    def _neighbors(self, X):
+        est = self.estimator
+        dist, idx = self.engine.kneighbors(X) if self.engine is not None else est.kneighbors(X)
+        if est.weights == "distance":
+            with np.errstate(divide="ignore"):
+                weights = 1.0 / dist
+            exact = np.isinf(weights).any(axis=1)
+            weights[exact] = dist[exact] == 0.0
+        else:
+            weights = np.ones_like(dist)
+        weights /= weights.sum(axis=1, keepdims=True)
+
+        gaps = np.abs(X[:, None, :] - self.fit_X[idx]) @ self.group          # (rows, k, inputs)
+        similarity = np.where(self.is_numeric, np.exp(-gaps / self.numeric_spread), gaps == 0)
+        similarity *= (1.0 - (X * self.frequency) @ self.group)[:, None, :]
+        total = similarity.sum(axis=2, keepdims=True)
+        share = np.divide(similarity, total, out=np.full_like(similarity, 1 / len(self.inputs)), where=total > 0)
+
+        evidence = weights * (self.neighbor_churn[idx] - self.base)           # (rows, k)
+        return np.einsum("rk,rkf->rf", evidence, share)
+
+    # ---- public ----
+    def explain(self, X):
+        """(base, contributions) for an encoded matrix; contributions has
+        one column per entry of `inputs`."""
+        X = np.asarray(X, dtype=np.float64)
+        method = {"linear": self._linear, "tree_path": self._tree_path, "neighbors": self._neighbors}[self.method]
+        parts = [method(X[i:i + BLOCK_ROWS]) for i in range(0, len(X), BLOCK_ROWS)]
+        return self.base, np.vstack(parts) if parts else np.zeros((0, len(self.inputs)))
+
+    def _values(self, X, i):
+        # Display value of input column i for every row (object array)
+        if i in self.categories:
+            idx, names = self.categories[i]
+            block = X[:, idx]
+            return np.where(block.max(axis=1) > 0, names[block.argmax(axis=1)], "unknown")
+        idx, mean, scale = self.numeric[i]
+        # Format the distinct values only
+        distinct, inverse = np.unique(np.round(X[:, idx] * scale + mean, 2), return_inverse=True)
+        return np.array([f"{v:g}" for v in distinct], dtype=object)[inverse]
+
+    def reasons(self, X, top: int = TOP_REASONS):
+        """Top `top` reasons per row, strongest first, as short sentences."""
+        X = np.asarray(X, dtype=np.float64)
+        if not len(X):
+            return []
+        _, contributions = self.explain(X)
+        top = min(top, len(self.inputs))
+        order = np.argsort(-np.abs(contributions), axis=1, kind="stable")[:, :top]
+        picked = np.take_along_axis(contributions, order, axis=1)
+
+        # Sentences are assembled column by column on object arrays
+        used = np.unique(order)
+        values = np.stack([self._values(X, i) for i in used]).astype(object)
+        names = np.array([f"{name} = " for name in self.inputs], dtype=object)
+        rows = np.arange(len(X))
+        phrases = np.empty(order.shape, dtype=object)
+        for k in range(top):
+            phrases[:, k] = (names[order[:, k]] + values[np.searchsorted(used, order[:, k]), rows]
+                             + np.where(picked[:, k] > 0, " raises churn risk", " lowers churn risk").astype(object))
+
+        # Near-zero contributions sort last; drop them
+        kept = (np.abs(picked) >= 1e-9).sum(axis=1)
+        phrases = phrases.tolist()
+        if (kept == top).all():
+            return phrases
+        return [row[:n] for row, n in zip(phrases, kept.tolist())]
+
+
+def build_attributor(model):
+    if model.compiled is None:
+        return None
+    try:
+        return Attributor(model)
+    except ValueError as e:
+        print(f"⚠️ Local attributions unavailable: {e}")
+        return None
@@ -0,0 +1,129 @@
+import os
+
+import pandas as pd
+
+from .features import prepare_frame
+from .model_loader import get_active
+from .segments import SegmentProfile
+from ..database.bulk import bulk_insert_predictions, BulkInsertResult, DEFAULT_BATCH_SIZE
+
+DEFAULT_CHUNK_SIZE = 50_000
+
+# Attribution reasons per scored row (utils/attribution.py)
+BATCH_REASONS = os.getenv("BATCH_REASONS", "1") != "0"
+
+
+class NoRowsError(ValueError):
+    pass
+
+
+def score_chunk(df: pd.DataFrame, X: pd.DataFrame):
+    model = get_active()
+    probs, reasons = model.score_frame(X, reasons=BATCH_REASONS)
+    df.attrs["model_version"] = model.version
+
+    df["churn_probability"] = probs
+    df["prediction_label"] = (df["churn_probability"] > 0.5).map(
+        {True: "Likely to Churn", False: "Safe Customer"}
+    )
+    if reasons is not None:
+        df["churn_reasons"] = ["; ".join(r) for r in reasons]
+    return df
+
+
+def persist_chunk(db, df: pd.DataFrame, X: pd.DataFrame, batch_size: int = DEFAULT_BATCH_SIZE,
+                  commit: bool = True):
+    frame = pd.DataFrame({
+        "customer_id": df["customerID"].astype(str),
+        "tenure": X["tenure"].astype(int),
+        "monthly_charges": X["MonthlyCharges"].astype(float),
+        "contract": X["Contract"].astype(str),
+        "payment_method": X["PaymentMethod"].astype(str),
+        "probability": df["churn_probability"].astype(float),
+        "label": df["prediction_label"],
+        "model_version": df.attrs.get("model_version"),
+    })
+    return bulk_insert_predictions(db, frame, batch_size=batch_size, commit=commit)
+
+
+class BatchResult:
+    def __init__(self, preview_size=10, profile: bool = True):
+        self.processed = 0
+        self.likely_churn = 0
+        self.auto_filled = []
+        self.preview = []
+        self.preview_size = preview_size
+        self.persistence = BulkInsertResult()
+        self.segments = SegmentProfile() if profile else None
+
+    def add(self, df: pd.DataFrame, X: pd.DataFrame = None):
+        if len(self.preview) < self.preview_size:
+            head = df.head(self.preview_size - len(self.preview))
+            reasons = head["churn_reasons"] if "churn_reasons" in head else [""] * len(head)
+            for offset, (cid, prob, label, why) in enumerate(
+                zip(head["customerID"], head["churn_probability"], head["prediction_label"], reasons)
+            ):
+                self.preview.append({
+                    "row": self.processed + offset,
+                    "customer_id": str(cid),
+                    "probability": round(float(prob), 3),
+                    "label": label,
+                    "reasons": why.split("; ") if why else [],
+                })
+
+        likely = (df["prediction_label"] == "Likely to Churn").to_numpy()
+        if self.segments is not None and X is not None:
+            self.segments.add(X, df["churn_probability"].to_numpy(), likely)
+        self.processed += len(df)
+        self.likely_churn += int(likely.sum())
+
+    @property
+    def safe(self):
+        return self.processed - self.likely_churn
+
+    def stats(self):
+        return {
+            "total_rows": self.processed,
+            "likely_churn": self.likely_churn,
+            "safe": self.safe,
+        }
+
+
+def iter_scored_chunks(source, chunk_size: int = DEFAULT_CHUNK_SIZE, skip_rows: int = 0):
+    # Yields (scored chunk, model input, auto-filled columns); `skip_rows`
+    # data rows are skipped so an interrupted job can pick up where it stopped.
+    skip = range(1, skip_rows + 1) if skip_rows else None
+
+    for df in pd.read_csv(source, chunksize=chunk_size, skiprows=skip):
+        if df.empty:  # header-only file
+            continue
+        X, auto_filled = prepare_frame(df)
+        score_chunk(df, X)
+        yield df, X, auto_filled
+
+
+def score_csv(source, db, out=None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+              insert_batch_size: int = DEFAULT_BATCH_SIZE, profile: bool = True):
+    """Stream a CSV through cleaning, scoring and persistence chunk by chunk.
+
+    Only one chunk of `chunk_size` rows is held at a time; when `out` is
+    given the scored rows are appended to it as CSV as they are produced.
+    With `profile` the segment profile (utils/segments.py) is built on the
+    way.
+    """
+    result = BatchResult(profile=profile)
+
+    for i, (df, X, auto_filled) in enumerate(iter_scored_chunks(source, chunk_size)):
+        if i == 0:
+            result.auto_filled = auto_filled
+
+        result.persistence += persist_chunk(db, df, X, batch_size=insert_batch_size)
+
+        if out is not None:
+            df.to_csv(out, index=False, header=(i == 0))
+
+        result.add(df, X)
+
+    if result.processed == 0:
+        raise NoRowsError("CSV file has no rows")
+    return result
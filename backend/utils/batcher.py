@@ -0,0 +1,153 @@
+import asyncio
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from starlette.concurrency import run_in_threadpool
+
+from .model_loader import score_rows
+
+
+class MicroBatcher:
+    """Coalesces concurrent single-row predictions into one vectorized call.
+
+    Requests are queued; a worker thread takes the first waiting request,
+    keeps collecting until `window_ms` has passed or `max_batch_size` rows
+    are queued, scores them together and resolves each caller's future.
+    A window of 0 disables batching and scores inline.
+    """
+
+    def __init__(self, score_fn, window_ms: float = 2.0, max_batch_size: int = 64):
+        self.score_fn = score_fn
+        self.window = window_ms / 1000.0
+        self.max_batch_size = max(1, max_batch_size)
+
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+        self._batches = 0
+        self._rows = 0
+        self._max_batch = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._split_batches = 0
+
+    @classmethod
+    def from_env(cls, score_fn):
+        return cls(
+            score_fn,
+            window_ms=float(os.getenv("PREDICT_BATCH_WINDOW_MS", "2")),
+            max_batch_size=int(os.getenv("PREDICT_BATCH_MAX_SIZE", "64")),
+        )
+
+    def submit(self, row: dict):
+        if self.window <= 0:
+            return self.score_fn([row])[0]
+        return self._enqueue(row).result()
+
+    async def submit_async(self, row: dict):
+        # Same as submit() for async endpoints: scoring happens on the worker
+        # thread (or the threadpool when batching is off), never on the loop.
+        if self.window <= 0:
+            return (await run_in_threadpool(self.score_fn, [row]))[0]
+        return await asyncio.wrap_future(self._enqueue(row))
+
+    def _enqueue(self, row: dict):
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((row, future, time.perf_counter()))
+        return future
+
+    def _ensure_worker(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="predict-batcher", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.perf_counter() + self.window
+
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            started = time.perf_counter()
+            self._record(batch, started)
+
+            try:
+                probs = self.score_fn([row for row, _, _ in batch])
+            except Exception as e:
+                if len(batch) == 1:
+                    _resolve(batch[0][1], error=e)
+                else:
+                    self._score_each(batch)
+                continue
+
+            for (_, future, _), prob in zip(batch, probs):
+                _resolve(future, prob)
+
+    def _score_each(self, batch):
+        # The batch call failed: retry row by row so only the requests
+        # whose own rows fail get the error
+        self._split_batches += 1
+        for row, future, _ in batch:
+            try:
+                _resolve(future, self.score_fn([row])[0])
+            except Exception as e:
+                _resolve(future, error=e)
+
+    def _record(self, batch, started):
+        self._batches += 1
+        self._rows += len(batch)
+        self._max_batch = max(self._max_batch, len(batch))
+        for _, _, enqueued in batch:
+            wait = started - enqueued
+            self._wait_total += wait
+            self._wait_max = max(self._wait_max, wait)
+
+    def stats(self):
+        return {
+            "window_ms": self.window * 1000.0,
+            "max_batch_size": self.max_batch_size,
+            "batches": self._batches,
+            "rows": self._rows,
+            "avg_batch_size": round(self._rows / self._batches, 2) if self._batches else 0.0,
+            "largest_batch": self._max_batch,
+            "split_batches": self._split_batches,
+            "avg_queue_wait_ms": round(self._wait_total / self._rows * 1000.0, 3) if self._rows else 0.0,
+            "max_queue_wait_ms": round(self._wait_max * 1000.0, 3),
+            "queued": self._queue.qsize(),
+        }
+
+
+def _resolve(future, result=None, error=None):
+    # A caller that gave up (cancelled its await) has a cancelled future
+    if future.cancelled():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+predict_batcher = None
+_batcher_lock = threading.Lock()
+
+def get_predict_batcher():
+    global predict_batcher
+    with _batcher_lock:
+        if predict_batcher is None:
+            predict_batcher = MicroBatcher.from_env(score_rows)
+    return predict_batcher
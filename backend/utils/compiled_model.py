@@ -0,0 +1,100 @@
+import numpy as np
+from sklearn.preprocessing import OneHotEncoder, StandardScaler, FunctionTransformer
+
+from .knn_engine import build_engine
+
+
+class CompiledPipeline:
+    """Scores feature dicts without pandas or the ColumnTransformer.
+
+    The one-hot / scaling steps of the fitted pipeline are flattened into
+    lookup tables so a row can be written straight into a NumPy vector and
+    handed to the final estimator. KNN estimators are scored through an
+    indexed neighbour search (see knn_engine.py) built here, at load time,
+    unless `knn_engine` is False.
+    """
+
+    def __init__(self, pipeline, knn_engine: bool = True):
+        preprocess = pipeline.steps[0][1]
+        self.estimator = pipeline.steps[-1][1]
+        self.columns = list(preprocess.feature_names_in_)
+
+        # (column, {category: output index}, ignore unknown) for one-hot columns
+        self.onehot = []
+        # (column, output index, mean, scale) for numeric columns
+        self.numeric = []
+
+        offset = 0
+        for name, transformer, cols in preprocess.transformers_:
+            if transformer == "drop" or name == "remainder":
+                if transformer != "drop":
+                    raise ValueError("remainder columns are not supported")
+                continue
+
+            cols = list(cols)
+
+            if isinstance(transformer, OneHotEncoder):
+                if transformer.drop_idx_ is not None or getattr(transformer, "_infrequent_enabled", False):
+                    raise ValueError("OneHotEncoder with drop/infrequent categories is not supported")
+                for col, cats in zip(cols, transformer.categories_):
+                    table = {c: offset + i for i, c in enumerate(cats)}
+                    self.onehot.append((col, table, transformer.handle_unknown != "error"))
+                    offset += len(cats)
+
+            elif transformer == "passthrough" or (
+                isinstance(transformer, FunctionTransformer) and transformer.func is None
+            ):
+                for col in cols:
+                    self.numeric.append((col, offset, 0.0, 1.0))
+                    offset += 1
+
+            elif isinstance(transformer, StandardScaler):
+                means = transformer.mean_ if transformer.mean_ is not None else np.zeros(len(cols))
+                scales = transformer.scale_ if transformer.scale_ is not None else np.ones(len(cols))
+                for col, mean, scale in zip(cols, means, scales):
+                    self.numeric.append((col, offset, float(mean), float(scale)))
+                    offset += 1
+
+            else:
+                raise ValueError(f"Unsupported transformer: {type(transformer).__name__}")
+
+        self.n_features = offset
+        self.engine = build_engine(self.estimator, knn_engine)
+
+    def encode_into(self, features: dict, out: np.ndarray):
+        for col, table, ignore_unknown in self.onehot:
+            idx = table.get(features[col])
+            if idx is not None:
+                out[idx] = 1.0
+            elif not ignore_unknown:
+                raise ValueError(f"Found unknown category {features[col]!r} in column {col!r}")
+
+        for col, idx, mean, scale in self.numeric:
+            out[idx] = (float(features[col]) - mean) / scale
+
+        return out
+
+    def encode(self, features: dict):
+        return self.encode_into(features, np.zeros(self.n_features))
+
+    def encode_many(self, rows):
+        X = np.zeros((len(rows), self.n_features))
+        for i, features in enumerate(rows):
+            self.encode_into(features, X[i])
+        return X
+
+    def predict_proba(self, X):
+        if self.engine is not None:
+            return self.engine.predict_proba(X)[:, 1]
+        return self.estimator.predict_proba(X)[:, 1]
+
+    def predict_row(self, features: dict):
+        return float(self.predict_proba(self.encode(features)[None, :])[0])
+
+
+def compile_pipeline(pipeline, knn_engine: bool = True):
+    try:
+        return CompiledPipeline(pipeline, knn_engine)
+    except (AttributeError, ValueError) as e:
+        print(f"⚠️ Could not compile model pipeline, using sklearn path: {e}")
+        return None
@@ -0,0 +1,111 @@
+import itertools
+import math
+import os
+import time
+
+import numpy as np
+
+from .features import CATEGORICAL, INTEGER, NUMERIC, REQUEST_FIELDS, prepare_row, request_features
+
+# Counterfactual scoring: one customer, many variants ("what if they moved
+# to a One year contract / auto-pay / ..."), all encoded into one matrix and
+# scored in a single predict_proba call against one model snapshot.
+# Nothing is persisted and no explanation is generated.
+
+MAX_VARIANTS = int(os.getenv("COUNTERFACTUAL_MAX_VARIANTS", "1000"))
+
+# Fields a variant may change (PredictRequest names)
+CHANGEABLE = [f for f in REQUEST_FIELDS if f != "customer_id"]
+
+
+class CounterfactualError(ValueError):
+    pass
+
+
+def expand(changes=None, vary=None):
+    """Variants as dicts of changed fields.
+
+    `changes` is a list of explicit variants; `vary` maps fields to candidate
+    values and adds every combination of them.
+    """
+    variants = [dict(c) for c in changes or []]
+    if vary:
+        combinations = math.prod(len(values) for values in vary.values())
+        if len(variants) + combinations > MAX_VARIANTS:
+            raise CounterfactualError(f"Too many variants ({len(variants) + combinations}), max {MAX_VARIANTS}")
+        variants += [dict(zip(vary, values)) for values in itertools.product(*vary.values())]
+
+    if not variants:
+        raise CounterfactualError("No variants given")
+    if len(variants) > MAX_VARIANTS:
+        raise CounterfactualError(f"Too many variants ({len(variants)}), max {MAX_VARIANTS}")
+
+    unknown = sorted({f for v in variants for f in v if f not in CHANGEABLE})
+    if unknown:
+        raise CounterfactualError(f"Unknown fields: {', '.join(unknown)}")
+    return [{field: _parse(field, value) for field, value in v.items()} for v in variants]
+
+
+def _parse(field, value):
+    # Strictly, as PredictRequest would: prepare_row turns bad numbers into 0
+    col = REQUEST_FIELDS[field]
+    if col not in NUMERIC:
+        if not isinstance(value, str):
+            raise CounterfactualError(f"Invalid {field} value {value!r}; expected a string")
+        return value
+    try:
+        number = float(value) if not isinstance(value, bool) else math.nan
+    except (TypeError, ValueError):
+        number = math.nan
+    if not math.isfinite(number) or (col in INTEGER and not number.is_integer()):
+        kind = "an integer" if col in INTEGER else "a number"
+        raise CounterfactualError(f"Invalid {field} value {value!r}; expected {kind}")
+    return int(number) if col in INTEGER else number
+
+
+def _check_categories(model, rows):
+    # Unknown categories would be silently ignored by the one-hot encoder
+    if model.compiled is None:
+        return
+    known = {col: table for col, table, _ in model.compiled.onehot}
+    for col in CATEGORICAL:
+        if col not in known:
+            continue
+        bad = sorted({row[col] for row in rows} - set(known[col]))
+        if bad:
+            raise CounterfactualError(f"Unknown {col} value(s) {bad}; expected one of {sorted(known[col])}")
+
+
+def score_variants(model, customer: dict, variants):
+    """Baseline + variants scored together, variants ranked by delta (most
+    negative, i.e. biggest churn-risk reduction, first)."""
+    start = time.perf_counter()
+    base = request_features(customer)
+    rows = [prepare_row({**base, **request_features(variant)}) for variant in [{}] + variants]
+    _check_categories(model, rows)
+
+    probabilities = np.asarray(model.predict_rows(rows), dtype=float)
+    baseline = float(probabilities[0])
+    deltas = probabilities[1:] - baseline
+    order = np.argsort(deltas, kind="stable")
+
+    return {
+        "model_version": model.version,
+        "baseline": {"probability": round(baseline, 4), "label": _label(baseline)},
+        "variants": [
+            {
+                "rank": rank,
+                "changes": variants[i],
+                "probability": round(float(probabilities[i + 1]), 4),
+                "delta": round(float(deltas[i]), 4),
+                "label": _label(probabilities[i + 1]),
+            }
+            for rank, i in enumerate(order, start=1)
+        ],
+        "count": len(variants),
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 2),
+    }
+
+
+def _label(prob):
+    return "Likely to Churn" if prob > 0.5 else "Safe Customer"
@@ -0,0 +1,185 @@
+import asyncio
+import threading
+import time
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from ..database.db import SessionLocal
+from ..database.schema import BatchSummaryState, Prediction
+from . import ai_helper
+from .ai_helper import (
+    SUMMARY_FALLBACK, explain_single_customer_async, summarize_batch, summarize_batch_async, summary_key,
+)
+from .explanation_cache import get_explanation_cache
+
+# LLM explanations are generated off the request path: predictions are saved
+# with explanation_status="pending" and a task on the LLM gateway loop
+# (utils/llm_gateway.py, which bounds concurrency and rate) fills in the
+# text later.
+# Batch summaries work the same way, except there is no row to update: the
+# text lands in the explanation cache under summary_key(profile), which is
+# what clients poll. Until then its state ("pending" / "failed") is a row
+# in batch_summary_state, so a poll answered by any worker sees it; cache
+# pruning and /clear never touch that table. A pending row older than the
+# gateway timeout (twice over) belongs to a worker that went away and reads
+# as failed. Rows older than SUMMARY_STATE_TTL are dropped on write.
+
+SUMMARY_STATE_TTL = 24 * 3600
+
+_in_flight = set()
+_summaries_in_flight = set()
+_lock = threading.Lock()
+
+
+def schedule_explanation(prediction_id: int, features: dict, probability: float):
+    with _lock:
+        if prediction_id in _in_flight:
+            return False
+        _in_flight.add(prediction_id)
+
+    ai_helper.gateway.submit(_generate(prediction_id, features, probability))
+    return True
+
+
+async def _generate(prediction_id: int, features: dict, probability: float):
+    try:
+        # No fallback text: a failed row stays retryable (ensure_explanation)
+        explanation = await explain_single_customer_async(features, probability, fallback=None)
+        status = "ready"
+    except Exception as e:
+        print(f"Explanation failed for prediction {prediction_id}: {e}")
+        explanation, status = None, "failed"
+    finally:
+        # Released before the store, so a retry that sees "failed" is queued
+        with _lock:
+            _in_flight.discard(prediction_id)
+
+    await asyncio.to_thread(_store, prediction_id, explanation, status)
+
+
+def _store(prediction_id: int, explanation, status: str):
+    db = SessionLocal()
+    try:
+        db.query(Prediction).filter(Prediction.id == prediction_id).update(
+            {"explanation": explanation, "explanation_status": status}
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def explanation_status(record: Prediction):
+    if record.explanation_status:
+        return record.explanation_status
+    # Rows written before explanations were generated in the background
+    return "ready" if record.explanation else "unavailable"
+
+
+def report_features(record: Prediction):
+    return {
+        "customer_id": record.customer_id,
+        "tenure": record.tenure,
+        "contract": record.contract,
+        "monthly_charges": record.monthly_charges,
+    }
+
+
+def ensure_explanation(record: Prediction):
+    # Stored explanation if there is one, otherwise queue it and return None.
+    if record.explanation:
+        return record.explanation
+    if record.explanation_status == "failed":
+        # Back to pending first, so pollers wait for the retry
+        _store(record.id, None, "pending")
+    schedule_explanation(record.id, report_features(record), record.probability)
+    return None
+
+
+def _set_summary_state(key: str, status: str = None):
+    # Shared by all workers; None removes the row
+    db = SessionLocal()
+    try:
+        now = time.time()
+        if status is None:
+            db.query(BatchSummaryState).filter(BatchSummaryState.key == key).delete()
+        else:
+            db.merge(BatchSummaryState(key=key, status=status, updated_at=now))
+            db.query(BatchSummaryState).filter(BatchSummaryState.updated_at < now - SUMMARY_STATE_TTL).delete()
+        db.commit()
+    except SQLAlchemyError as e:
+        db.rollback()
+        print(f"Could not record batch summary {key[:12]} as {status}: {e}")
+    finally:
+        db.close()
+
+
+def _summary_state(key: str):
+    # "pending", "failed" or None
+    db = SessionLocal()
+    try:
+        row = db.get(BatchSummaryState, key)
+    finally:
+        db.close()
+    if row is None:
+        return None
+    if row.status == "pending" and time.time() - row.updated_at > 2 * ai_helper.gateway.timeout:
+        return "failed"
+    return row.status
+
+
+def schedule_summary(profile: dict):
+    """Queue the LLM summary of a batch segment profile: (key, status, text).
+
+    Status is "ready" (cached), "pending" (poll summary_status(key)) or
+    "unavailable" (no LLM configured).
+    """
+    key = summary_key(profile)
+    if ai_helper.client is None:
+        return key, "unavailable", summarize_batch(profile)
+
+    cached = get_explanation_cache().get(key)
+    if cached is not None:
+        return key, "ready", cached
+
+    with _lock:
+        if key in _summaries_in_flight:
+            return key, "pending", None
+        _summaries_in_flight.add(key)
+
+    if _summary_state(key) == "pending":
+        # Another worker is generating it
+        with _lock:
+            _summaries_in_flight.discard(key)
+        return key, "pending", None
+
+    _set_summary_state(key, "pending")
+    ai_helper.gateway.submit(_summarize(key, profile))
+    return key, "pending", None
+
+
+async def _summarize(key: str, profile: dict):
+    try:
+        await summarize_batch_async(profile, fallback=None)  # caches the text under `key`
+        status = None
+    except Exception as e:
+        print(f"Batch summary {key[:12]} failed: {e}")
+        status = "failed"
+    try:
+        await asyncio.to_thread(_set_summary_state, key, status)
+    finally:
+        with _lock:
+            _summaries_in_flight.discard(key)
+
+
+def summary_status(key: str):
+    # (status, text); status "unknown" if the key was never scheduled.
+    # State first: the text is cached before the state row is removed.
+    state = _summary_state(key)
+    cached = get_explanation_cache().get(key)
+    if cached is not None:
+        return "ready", cached
+    if state == "failed":
+        return "failed", SUMMARY_FALLBACK
+    if state == "pending":
+        return "pending", None
+    return "unknown", None
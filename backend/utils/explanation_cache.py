@@ -0,0 +1,192 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from ..database.db import SessionLocal
+from ..database.schema import ExplanationCacheEntry
+
+# Identifiers never change what the LLM says about a customer, so they are
+# left out of the key and identical profiles share one explanation.
+ID_FIELDS = {"customerID", "customer_id"}
+
+
+def _canonical(value):
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in value.items() if k not in ID_FIELDS}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    if isinstance(value, float):
+        return round(value, 4)
+    if hasattr(value, "item"):  # numpy scalars
+        return _canonical(value.item())
+    return value
+
+
+def cache_key(kind: str, payload: dict, probability: float = None, decimals: int = 2):
+    body = {"kind": kind, "payload": _canonical(payload)}
+    if probability is not None:
+        body["probability"] = round(float(probability), decimals)
+    raw = json.dumps(body, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ExplanationCache:
+    """Two-tier (in-memory LRU + SQLite) cache for LLM output.
+
+    Entries older than `ttl_seconds` are ignored and removed. The memory
+    tier keeps at most `max_memory_entries`; the SQLite tier is pruned back
+    to `max_db_entries` every `prune_every` writes.
+    """
+
+    def __init__(self, max_memory_entries=1024, max_db_entries=100_000, ttl_seconds=7 * 24 * 3600,
+                 prune_every=256, session_factory=SessionLocal):
+        self.max_memory_entries = max_memory_entries
+        self.max_db_entries = max_db_entries
+        self.ttl = ttl_seconds
+        self.prune_every = prune_every
+        self.session_factory = session_factory
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            max_memory_entries=int(os.getenv("EXPLAIN_CACHE_MEMORY_ENTRIES", "1024")),
+            max_db_entries=int(os.getenv("EXPLAIN_CACHE_DB_ENTRIES", "100000")),
+            ttl_seconds=float(os.getenv("EXPLAIN_CACHE_TTL_SECONDS", str(7 * 24 * 3600))),
+        )
+
+    def _fresh(self, created_at, now):
+        return self.ttl <= 0 or now - created_at < self.ttl
+
+    def get(self, key: str):
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, created_at = entry
+                if self._fresh(created_at, now):
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    return value
+                del self._memory[key]
+                self.expired += 1
+
+        row = None
+        db = self.session_factory()
+        try:
+            row = db.get(ExplanationCacheEntry, key)
+            if row is not None and not self._fresh(row.created_at, now):
+                db.delete(row)
+                db.commit()
+                row = None
+                with self._lock:
+                    self.expired += 1
+        except SQLAlchemyError as e:
+            print(f"Explanation cache read failed: {e}")
+            row = None
+        finally:
+            db.close()
+
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.db_hits += 1
+            self._remember(key, row.value, row.created_at)
+            return row.value
+
+    def put(self, key: str, value: str, kind: str = None):
+        now = time.time()
+
+        with self._lock:
+            self._remember(key, value, now)
+            self._writes += 1
+            prune = self._writes % self.prune_every == 0
+
+        db = self.session_factory()
+        try:
+            db.merge(ExplanationCacheEntry(key=key, kind=kind, value=value, created_at=now))
+            db.commit()
+            if prune:
+                self._prune(db, now)
+        except IntegrityError:
+            # A concurrent put of the same key (e.g. coalesced LLM callers)
+            # got there first; the value is the same
+            db.rollback()
+        except SQLAlchemyError as e:
+            db.rollback()
+            print(f"Explanation cache write failed: {e}")
+        finally:
+            db.close()
+
+    def _remember(self, key, value, created_at):
+        self._memory[key] = (value, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def _prune(self, db, now):
+        if self.ttl > 0:
+            db.query(ExplanationCacheEntry).filter(ExplanationCacheEntry.created_at < now - self.ttl).delete()
+
+        overflow = db.query(ExplanationCacheEntry).count() - self.max_db_entries
+        if overflow > 0:
+            oldest = (
+                db.query(ExplanationCacheEntry.key)
+                .order_by(ExplanationCacheEntry.created_at)
+                .limit(overflow)
+                .scalar_subquery()
+            )
+            db.query(ExplanationCacheEntry).filter(ExplanationCacheEntry.key.in_(oldest)).delete(
+                synchronize_session=False
+            )
+        db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        db = self.session_factory()
+        try:
+            db.query(ExplanationCacheEntry).delete()
+            db.commit()
+        finally:
+            db.close()
+
+    def stats(self):
+        lookups = self.memory_hits + self.db_hits + self.misses
+        return {
+            "memory_entries": len(self._memory),
+            "memory_hits": self.memory_hits,
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.memory_hits + self.db_hits) / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expired": self.expired,
+        }
+
+
+explanation_cache = None
+_cache_lock = threading.Lock()
+
+def get_explanation_cache():
+    global explanation_cache
+    with _cache_lock:
+        if explanation_cache is None:
+            explanation_cache = ExplanationCache.from_env()
+    return explanation_cache
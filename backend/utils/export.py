@@ -0,0 +1,155 @@
+import csv
+import gzip
+import io
+import os
+
+from sqlalchemy import select, Integer, Float, DateTime
+
+from ..database.schema import Prediction
+from ..database.filters import prediction_filters
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional: only needed for parquet / arrow exports
+    pa = None
+    pq = None
+
+# Streams the `predictions` table in id order, one chunk at a time: each chunk
+# is fetched with a keyset query (id > last id), encoded, and the encoded
+# bytes are handed to the caller before the next chunk is read, so memory is
+# bounded by EXPORT_CHUNK_SIZE rows whatever the table size.
+
+EXPORT_COLUMNS = [c.name for c in Prediction.__table__.columns]
+DEFAULT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "50000"))
+
+FORMATS = {
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+    "csv": ("application/gzip", "csv.gz"),
+}
+
+
+class ExportError(ValueError):
+    pass
+
+
+def resolve_columns(columns=None):
+    if not columns:
+        return list(EXPORT_COLUMNS)
+    unknown = [c for c in columns if c not in EXPORT_COLUMNS]
+    if unknown:
+        raise ExportError(f"Unknown columns: {', '.join(unknown)}")
+    return list(columns)
+
+
+def check_format(fmt: str):
+    if fmt not in FORMATS:
+        raise ExportError(f"Unsupported format '{fmt}', expected one of {', '.join(FORMATS)}")
+    if fmt != "csv" and pa is None:
+        raise ExportError(f"{fmt} export requires pyarrow (pip install pyarrow)")
+
+
+def iter_chunks(db, columns, filters=None, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    # Yields lists of row tuples in `columns` order.
+    table = Prediction.__table__
+    selected = [table.c[c] for c in columns]
+    conditions = prediction_filters(**(filters or {}))
+
+    last_id = None
+    while True:
+        query = select(table.c.id, *selected).where(*conditions).order_by(table.c.id).limit(chunk_size)
+        if last_id is not None:
+            query = query.where(table.c.id > last_id)
+        rows = db.execute(query).all()
+        if not rows:
+            return
+        last_id = rows[-1][0]
+        yield [row[1:] for row in rows]
+        if len(rows) < chunk_size:
+            return
+
+
+def arrow_schema(columns):
+    types = []
+    for name in columns:
+        column_type = Prediction.__table__.c[name].type
+        if isinstance(column_type, Integer):
+            types.append(pa.int64())
+        elif isinstance(column_type, Float):
+            types.append(pa.float64())
+        elif isinstance(column_type, DateTime):
+            types.append(pa.timestamp("us"))
+        else:
+            types.append(pa.string())
+    return pa.schema(list(zip(columns, types)))
+
+
+class _Sink(io.RawIOBase):
+    # Write-only file object whose contents are drained after every chunk
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+def _arrow_writer(fmt, sink, schema):
+    if fmt == "parquet":
+        return pq.ParquetWriter(sink, schema, compression="snappy")
+    return pa.ipc.new_stream(sink, schema)
+
+
+def stream_export(db, fmt: str = "parquet", columns=None, filters=None,
+                  chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """Yield the encoded export of `predictions` as a sequence of byte blocks.
+
+    `fmt` is parquet (one row group per chunk), arrow (IPC stream) or csv
+    (gzip-compressed, with a header row). `filters` takes the keyword
+    arguments of database.filters.prediction_filters.
+    """
+    check_format(fmt)
+    columns = resolve_columns(columns)
+    sink = _Sink()
+
+    if fmt == "csv":
+        with gzip.GzipFile(fileobj=sink, mode="wb") as gz:
+            text = io.TextIOWrapper(gz, encoding="utf-8", newline="")
+            writer = csv.writer(text)
+            writer.writerow(columns)
+            for rows in iter_chunks(db, columns, filters, chunk_size):
+                writer.writerows(rows)
+                text.flush()
+                yield sink.drain()
+            text.flush()
+            text.detach()
+        yield sink.drain()
+        return
+
+    schema = arrow_schema(columns)
+    writer = _arrow_writer(fmt, sink, schema)
+    try:
+        for rows in iter_chunks(db, columns, filters, chunk_size):
+            batch = pa.RecordBatch.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(zip(*rows), schema)],
+                schema=schema,
+            )
+            writer.write_batch(batch)
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
@@ -0,0 +1,142 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+# Input preparation shared by /predict, /predict/simple and batch scoring.
+# One set of rules, applied either to a frame (prepare_frame) or to a
+# single feature dict (prepare_row):
+#
+#   * a missing column / key takes its DEFAULTS value and is reported;
+#   * categorical values are stripped strings, blanks and NaN -> default;
+#   * numeric values are coerced, unparseable -> 0 (SeniorCitizen and
+#     tenure as ints);
+#   * a missing TotalCharges is estimated as MonthlyCharges * tenure.
+
+CATEGORICAL = [
+    "gender", "Partner", "Dependents", "PhoneService", "MultipleLines", "InternetService",
+    "OnlineSecurity", "OnlineBackup", "DeviceProtection", "TechSupport", "StreamingTV",
+    "StreamingMovies", "Contract", "PaperlessBilling", "PaymentMethod",
+]
+INTEGER = ["SeniorCitizen", "tenure"]
+NUMERIC = INTEGER + ["MonthlyCharges", "TotalCharges"]
+
+# Model input columns, in training order
+FEATURE_COLUMNS = [
+    "gender", "SeniorCitizen", "Partner", "Dependents", "tenure", "PhoneService",
+    "MultipleLines", "InternetService", "OnlineSecurity", "OnlineBackup", "DeviceProtection",
+    "TechSupport", "StreamingTV", "StreamingMovies", "Contract", "PaperlessBilling",
+    "PaymentMethod", "MonthlyCharges", "TotalCharges",
+]
+REQUIRED_COLUMNS = ["customerID"] + FEATURE_COLUMNS
+
+DEFAULTS = {
+    "customerID": "Unknown",
+    "gender": "Female", "SeniorCitizen": 0, "Partner": "No", "Dependents": "No",
+    "tenure": 0, "PhoneService": "Yes", "MultipleLines": "No", "InternetService": "DSL",
+    "OnlineSecurity": "No", "OnlineBackup": "No", "DeviceProtection": "No",
+    "TechSupport": "No", "StreamingTV": "No", "StreamingMovies": "No",
+    "Contract": "Month-to-month", "PaperlessBilling": "Yes", "PaymentMethod": "Electronic check",
+    "MonthlyCharges": 0.0, "TotalCharges": None,
+}
+
+# PredictRequest field -> model column
+REQUEST_FIELDS = {
+    "customer_id": "customerID", "gender": "gender", "senior_citizen": "SeniorCitizen",
+    "partner": "Partner", "dependents": "Dependents", "tenure": "tenure",
+    "phone_service": "PhoneService", "multiple_lines": "MultipleLines",
+    "internet_service": "InternetService", "online_security": "OnlineSecurity",
+    "online_backup": "OnlineBackup", "device_protection": "DeviceProtection",
+    "tech_support": "TechSupport", "streaming_tv": "StreamingTV", "streaming_movies": "StreamingMovies",
+    "contract": "Contract", "paperless_billing": "PaperlessBilling", "payment_method": "PaymentMethod",
+    "monthly_charges": "MonthlyCharges", "total_charges": "TotalCharges",
+}
+
+
+def _categorical(values: pd.Series, default: str):
+    # Clean the distinct values only: factorize once, strip/fill the
+    # (few) uniques, then re-map the integer codes.
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    labels = pd.Index(uniques).astype(str).str.strip()
+    labels = labels.where(labels != "", default).append(pd.Index([default]))
+    codes[codes < 0] = len(labels) - 1
+
+    remap, categories = pd.factorize(labels)
+    return pd.Categorical.from_codes(remap[codes], categories=categories)
+
+
+def _numeric(values: pd.Series):
+    if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+        return values.to_numpy(dtype=np.float64, copy=True)
+    return pd.to_numeric(values, errors="coerce").to_numpy(dtype=np.float64)
+
+
+def prepare_frame(df: pd.DataFrame):
+    """Model input for a chunk of raw rows: (frame, columns filled with defaults).
+
+    Each input column is read once; categorical columns come back as
+    pandas categoricals and numeric fills happen in place on the NumPy
+    arrays. Missing columns are also added to `df` (scalar default) so
+    the scored output and persistence see them.
+    """
+    auto_filled = [c for c in REQUIRED_COLUMNS if c not in df.columns]
+    for col in auto_filled:
+        df[col] = DEFAULTS[col]
+    # Blank IDs would otherwise be stored as the string "nan"
+    df["customerID"] = df["customerID"].fillna(DEFAULTS["customerID"])
+
+    columns = {}
+    for col in CATEGORICAL:
+        columns[col] = _categorical(df[col], DEFAULTS[col])
+
+    numbers = {col: _numeric(df[col]) for col in NUMERIC}
+    for col in INTEGER:
+        values = numbers[col]
+        values[np.isnan(values)] = 0
+        numbers[col] = values.astype(np.int64)
+
+    monthly = numbers["MonthlyCharges"]
+    monthly[np.isnan(monthly)] = 0.0
+    total = numbers["TotalCharges"]
+    missing = np.isnan(total)
+    np.multiply(monthly, numbers["tenure"], out=total, where=missing)
+    columns.update(numbers)
+
+    return pd.DataFrame({col: columns[col] for col in FEATURE_COLUMNS}, index=df.index), auto_filled
+
+
+def _number(value):
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return math.nan
+    return number
+
+
+def request_features(values: dict):
+    # PredictRequest-style (snake_case) values -> raw model columns
+    return {REQUEST_FIELDS[k]: v for k, v in values.items() if k in REQUEST_FIELDS}
+
+
+def prepare_row(raw: dict):
+    """The same rules for one request: a feature dict ready for scoring.
+
+    Keys outside REQUIRED_COLUMNS are dropped; customerID is kept.
+    """
+    features = {}
+    for col in CATEGORICAL:
+        value = raw.get(col)
+        value = "" if value is None or (isinstance(value, float) and math.isnan(value)) else str(value).strip()
+        features[col] = value or DEFAULTS[col]
+
+    for col in INTEGER:
+        value = _number(raw.get(col, DEFAULTS[col]))
+        features[col] = 0 if math.isnan(value) else int(value)
+
+    monthly = _number(raw.get("MonthlyCharges", DEFAULTS["MonthlyCharges"]))
+    features["MonthlyCharges"] = 0.0 if math.isnan(monthly) else monthly
+    total = _number(raw.get("TotalCharges"))
+    features["TotalCharges"] = features["MonthlyCharges"] * features["tenure"] if math.isnan(total) else total
+
+    features["customerID"] = str(raw.get("customerID", DEFAULTS["customerID"]))
+    return {col: features[col] for col in REQUIRED_COLUMNS}
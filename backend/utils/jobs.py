@@ -0,0 +1,299 @@
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+from sqlalchemy import or_, update, func
+from sqlalchemy.exc import SQLAlchemyError
+
+from ..database.db import SessionLocal
+from ..database.schema import BatchJob
+from .batch_scoring import iter_scored_chunks, persist_chunk
+from . import model_loader
+
+# Batch jobs run in a process pool so pandas/sklearn/SQLite work never
+# touches the web worker's event loop. All job state lives in `batch_jobs`:
+# progress is committed together with each persisted chunk, so a job picked
+# up again after a restart continues from the last committed chunk.
+#
+# A worker claims a job with a fresh owner token and a thread refreshes its
+# heartbeat every STALE_SECONDS / 4 for as long as it runs, however slow a
+# chunk is; only a job whose worker died goes stale and can be claimed
+# again. Every progress write is conditional on the owner token (and made
+# before the chunk's output is written), so a worker that lost the job stops
+# without touching its rows or output. Finished jobs and their files are
+# removed after BATCH_JOB_RETENTION_SECONDS, or when deleted.
+
+JOB_DIR = Path(os.getenv("BATCH_JOB_DIR", "backend/jobs"))
+STALE_SECONDS = float(os.getenv("BATCH_JOB_STALE_SECONDS", "120"))
+RETENTION_SECONDS = float(os.getenv("BATCH_JOB_RETENTION_SECONDS", str(7 * 24 * 3600)))
+ACTIVE_STATUSES = ("queued", "running")
+
+executor = None
+_lock = threading.Lock()
+
+
+def get_executor():
+    global executor
+    with _lock:
+        if executor is None:
+            executor = ProcessPoolExecutor(
+                max_workers=int(os.getenv("BATCH_JOB_WORKERS", "2")),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+    return executor
+
+
+def shutdown():
+    global executor
+    with _lock:
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+            executor = None
+
+
+def create_job(db, upload, filename: str, chunk_size: int):
+    expire_jobs(db)
+    JOB_DIR.mkdir(parents=True, exist_ok=True)
+    job_id = uuid.uuid4().hex
+    input_path = JOB_DIR / f"{job_id}.csv"
+
+    # Copy the upload to disk, counting lines on the way for progress reporting
+    newlines, last = 0, b"\n"
+    with open(input_path, "wb") as f:
+        while True:
+            block = upload.read(1 << 20)
+            if not block:
+                break
+            f.write(block)
+            newlines += block.count(b"\n")
+            last = block[-1:]
+    lines = newlines + (last != b"\n")
+
+    job = BatchJob(
+        id=job_id,
+        filename=filename,
+        status="queued",
+        input_path=str(input_path),
+        output_path=str(JOB_DIR / f"{job_id}.out.csv"),
+        chunk_size=chunk_size,
+        total_rows=max(lines - 1, 0),
+        rows_scored=0,
+        rows_persisted=0,
+        likely_churn=0,
+        output_bytes=0,
+        cancel_requested=0,
+    )
+    db.add(job)
+    db.commit()
+
+    submit(job_id)
+    return job
+
+
+def submit(job_id: str):
+    get_executor().submit(run_job, job_id)
+
+
+def resume_jobs():
+    # Re-submit jobs left queued/running by a previous worker; _claim()
+    # makes sure only one process ends up running each of them.
+    db = SessionLocal()
+    try:
+        expire_jobs(db)
+        ids = [j.id for j in db.query(BatchJob.id).filter(BatchJob.status.in_(ACTIVE_STATUSES))]
+    finally:
+        db.close()
+
+    for job_id in ids:
+        submit(job_id)
+    return ids
+
+
+def is_stale(job: BatchJob):
+    return job.status == "running" and (job.heartbeat is None or job.heartbeat < time.time() - STALE_SECONDS)
+
+
+def cancel_job(db, job: BatchJob):
+    if job.status not in ACTIVE_STATUSES:
+        return job
+    job.cancel_requested = 1
+    if job.status == "queued":
+        job.status = "cancelled"
+        job.finished_at = func.now()
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def _remove_files(job: BatchJob):
+    for path in (job.input_path, job.output_path):
+        if path and os.path.exists(path):
+            os.remove(path)
+
+
+def delete_job(db, job: BatchJob):
+    # Finished jobs only; active ones are cancelled first
+    _remove_files(job)
+    db.delete(job)
+    db.commit()
+
+
+def expire_jobs(db, now: float = None):
+    # Finished jobs older than RETENTION_SECONDS, with their files
+    if RETENTION_SECONDS <= 0:
+        return 0
+    now = time.time() if now is None else now
+    expired = 0
+    for job in db.query(BatchJob).filter(~BatchJob.status.in_(ACTIVE_STATUSES), BatchJob.finished_at.isnot(None)):
+        finished = job.finished_at
+        if finished.tzinfo is None:  # SQLite hands back naive UTC
+            finished = finished.replace(tzinfo=timezone.utc)
+        if now - finished.timestamp() > RETENTION_SECONDS:
+            _remove_files(job)
+            db.delete(job)
+            expired += 1
+    if expired:
+        db.commit()
+    return expired
+
+
+def job_to_dict(job: BatchJob):
+    progress = None
+    if job.total_rows:
+        progress = round(min(job.rows_persisted / job.total_rows, 1.0), 4)
+    elif job.status == "completed":
+        progress = 1.0
+
+    return {
+        "job_id": job.id,
+        "filename": job.filename,
+        "status": job.status,
+        "total_rows": job.total_rows,
+        "rows_scored": job.rows_scored,
+        "rows_persisted": job.rows_persisted,
+        "likely_churn": job.likely_churn,
+        "progress": progress,
+        "error": job.error,
+        "created_at": job.created_at,
+        "finished_at": job.finished_at,
+    }
+
+
+# ---------------------------------------------------------
+# Worker process side
+# ---------------------------------------------------------
+
+def _claim(db, job_id: str):
+    # Owner token if this worker got the job, else None
+    now = time.time()
+    owner = uuid.uuid4().hex
+    result = db.execute(
+        update(BatchJob)
+        .where(BatchJob.id == job_id)
+        .where(or_(
+            BatchJob.status == "queued",
+            (BatchJob.status == "running") & or_(BatchJob.heartbeat.is_(None), BatchJob.heartbeat < now - STALE_SECONDS),
+        ))
+        .values(status="running", heartbeat=now, owner=owner)
+    )
+    db.commit()
+    return owner if result.rowcount == 1 else None
+
+
+def _update(db, job_id: str, owner: str, **values):
+    # Compare-and-set on the owner token; False once another worker has the
+    # job. Not committed here.
+    result = db.execute(
+        update(BatchJob).where(BatchJob.id == job_id, BatchJob.owner == owner).values(**values)
+    )
+    return result.rowcount == 1
+
+
+def _keep_alive(job_id: str, owner: str, stop: threading.Event):
+    while not stop.wait(max(STALE_SECONDS / 4, 0.1)):
+        db = SessionLocal()
+        try:
+            held = _update(db, job_id, owner, heartbeat=time.time())
+            db.commit()
+            if not held:
+                return
+        except SQLAlchemyError as e:
+            db.rollback()
+            print(f"Heartbeat for job {job_id} failed: {e}")
+        finally:
+            db.close()
+
+
+def run_job(job_id: str):
+    db = SessionLocal()
+    stop = threading.Event()
+    try:
+        owner = _claim(db, job_id)
+        if owner is None:
+            return
+        threading.Thread(target=_keep_alive, args=(job_id, owner, stop), name="job-heartbeat", daemon=True).start()
+
+        job = db.get(BatchJob, job_id)
+        try:
+            # Pool processes outlive model swaps; score with the current version
+            model_loader.refresh()
+            _process(db, job, owner)
+        except Exception as e:
+            db.rollback()
+            _update(db, job_id, owner, status="failed", error=str(e), finished_at=func.now())
+            db.commit()
+    finally:
+        stop.set()
+        db.close()
+
+
+def _finish(db, job: BatchJob, owner: str, status: str):
+    if not _update(db, job.id, owner, status=status, finished_at=func.now()):
+        db.rollback()
+        return
+    db.commit()
+    if status in ("completed", "cancelled") and os.path.exists(job.input_path):
+        os.remove(job.input_path)
+
+
+def _process(db, job: BatchJob, owner: str):
+    rows_persisted, likely_churn, output_bytes = job.rows_persisted, job.likely_churn, job.output_bytes
+    mode = "r+b" if os.path.exists(job.output_path) else "wb"
+
+    with open(job.output_path, mode) as out:
+        # Drop output written after the last committed chunk
+        out.truncate(output_bytes)
+        out.seek(output_bytes)
+
+        for df, X, _ in iter_scored_chunks(job.input_path, job.chunk_size, skip_rows=rows_persisted):
+            db.refresh(job)
+            if job.cancel_requested:
+                _finish(db, job, owner, "cancelled")
+                return
+
+            if not _update(db, job.id, owner, rows_scored=rows_persisted + len(df), heartbeat=time.time()):
+                db.rollback()
+                return  # another worker has taken the job over
+            db.commit()
+
+            # Rows and progress are committed in one transaction; the
+            # owner check takes the row lock before the output is written
+            persist_chunk(db, df, X, batch_size=max(len(df), 1), commit=False)
+            data = df.to_csv(index=False, header=(rows_persisted == 0)).encode("utf-8")
+            rows_persisted += len(df)
+            likely_churn += int((df["prediction_label"] == "Likely to Churn").sum())
+            output_bytes += len(data)
+            if not _update(db, job.id, owner, rows_persisted=rows_persisted, likely_churn=likely_churn,
+                           output_bytes=output_bytes, heartbeat=time.time()):
+                db.rollback()
+                return
+            out.write(data)
+            out.flush()
+            db.commit()
+
+    _finish(db, job, owner, "completed")
@@ -0,0 +1,139 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from sklearn.neighbors import BallTree, KNeighborsClassifier
+
+# Indexed replacement for KNeighborsClassifier.predict_proba. A BallTree is
+# built once over the encoded training matrix when the model is loaded, so
+# a query visits a few leaves instead of every training row.
+#
+# Results equal sklearn's exactly. The tree is asked for k + 1 neighbours;
+# when the k-th and (k+1)-th squared distances are closer than sklearn's
+# own rounding error (AMBIGUITY_RTOL of the squared norms involved; sklearn
+# computes |x|^2 - 2x.y + |y|^2), sklearn might pick a different but
+# (near-)equidistant k-th neighbour, so those rows are handed to
+# estimator.kneighbors. Exact ties are a subset of these rows. Only
+# uniform-weight models are served: distance weights would depend on
+# sklearn's rounding of every distance.
+#
+# Rows are scored in blocks of KNN_BLOCK_ROWS on KNN_THREADS threads;
+# BallTree.query releases the GIL.
+#
+# Tree pruning depends on the data: on standardized one-hot features the
+# tree can be slower than sklearn's brute search. Whether to use the tree
+# is decided once, when a version is registered (tree_is_faster, stored as
+# metadata["knn_engine"]), so every worker serves a version the same way.
+# KNN_ENGINE=on/off overrides that; versions without a recorded choice
+# use the engine.
+
+AMBIGUITY_RTOL = 1e-9
+THREADS = int(os.getenv("KNN_THREADS", str(os.cpu_count() or 1)))
+BLOCK_ROWS = int(os.getenv("KNN_BLOCK_ROWS", "4096"))
+LEAF_SIZE = 16
+PROBE_ROWS = 512
+PROBE_REPEATS = 5
+SETTING = os.getenv("KNN_ENGINE", "auto").lower()
+
+
+class KNNEngine:
+    def __init__(self, estimator: KNeighborsClassifier, threads: int = THREADS, block_rows: int = BLOCK_ROWS):
+        self.estimator = estimator
+        self.k = estimator.n_neighbors
+        self.n_classes = len(estimator.classes_)
+        self.fit_X = estimator._fit_X
+        self.labels = np.asarray(estimator._y)
+        self.tree = BallTree(self.fit_X, leaf_size=LEAF_SIZE)
+        self.n_candidates = min(self.k + 1, len(self.fit_X))
+        self.max_norm = float((np.asarray(self.fit_X) ** 2).sum(axis=1).max())
+        self.block_rows = block_rows
+        self._pool = ThreadPoolExecutor(threads, thread_name_prefix="knn") if threads > 1 else None
+
+    def ambiguous(self, X, dist):
+        # Rows whose k-th neighbour sklearn's rounding could change
+        if self.n_candidates == self.k:
+            return np.zeros(len(X), dtype=bool)
+        gap = dist[:, self.k] ** 2 - dist[:, self.k - 1] ** 2
+        scale = (X ** 2).sum(axis=1) + self.max_norm
+        return gap <= AMBIGUITY_RTOL * scale
+
+    def kneighbors(self, X):
+        """(distances, indices) of the k nearest training rows: the same
+        neighbour sets sklearn's kneighbors returns."""
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        candidates, idx = self.tree.query(X, k=self.n_candidates)
+        dist, idx = candidates[:, :self.k].copy(), idx[:, :self.k].copy()
+        rows = np.flatnonzero(self.ambiguous(X, candidates))
+        if len(rows):
+            dist[rows], idx[rows] = self.estimator.kneighbors(X[rows])
+        return dist, idx
+
+    def _proba_block(self, X):
+        _, idx = self.kneighbors(X)
+        # Uniform votes, accumulated as sklearn does
+        proba = np.zeros((len(X), self.n_classes))
+        rows = np.arange(len(X))
+        y = self.labels[idx]
+        for j in range(self.k):
+            proba[rows, y[:, j]] += 1.0
+        return proba / proba.sum(axis=1, keepdims=True)
+
+    def predict_proba(self, X):
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        blocks = [X[i:i + self.block_rows] for i in range(0, len(X), self.block_rows)]
+        if not blocks:
+            return np.zeros((0, self.n_classes))
+        if self._pool is None or len(blocks) == 1:
+            return np.vstack([self._proba_block(b) for b in blocks])
+        return np.vstack(list(self._pool.map(self._proba_block, blocks)))
+
+
+def _seconds(fn, X):
+    # Best of PROBE_REPEATS, so one slow run doesn't decide
+    timings = []
+    for _ in range(PROBE_REPEATS):
+        start = time.perf_counter()
+        fn(X)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def supported(estimator):
+    # Dense, uniform-weight euclidean KNN classifiers
+    if not isinstance(estimator, KNeighborsClassifier):
+        return False
+    if estimator.weights != "uniform" or estimator.outputs_2d_:
+        return False
+    metric, params = estimator.effective_metric_, estimator.effective_metric_params_
+    if not (metric == "euclidean" or (metric == "minkowski" and params.get("p", 2) == 2)):
+        return False
+    fit_X = getattr(estimator, "_fit_X", None)
+    return fit_X is not None and not hasattr(fit_X, "toarray") and len(fit_X) >= estimator.n_neighbors
+
+
+def tree_is_faster(estimator):
+    """Time the engine against sklearn on a sample of training rows.
+
+    Called once at registration; the answer is stored with the version
+    rather than re-measured by each worker.
+    """
+    if not supported(estimator):
+        return False
+    engine = KNNEngine(estimator, threads=1)
+    probe = np.asarray(engine.fit_X[::max(1, len(engine.fit_X) // PROBE_ROWS)])
+    return _seconds(engine._proba_block, probe) < _seconds(estimator.predict_proba, probe)
+
+
+def enabled(recorded=None):
+    # KNN_ENGINE=on/off wins over the choice recorded for the version
+    if SETTING in ("on", "off"):
+        return SETTING == "on"
+    return True if recorded is None else bool(recorded)
+
+
+def build_engine(estimator, use_engine: bool = True):
+    # None unless use_engine and the estimator is supported()
+    if not use_engine or not supported(estimator):
+        return None
+    return KNNEngine(estimator)
@@ -0,0 +1,238 @@
+import asyncio
+import hashlib
+import inspect
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future
+
+# All LLM traffic goes through one LLMGateway, which runs its own event loop
+# on a background thread. Every chat completion call is
+#
+#   * coalesced: identical in-flight requests (model, messages, temperature)
+#     share one upstream call;
+#   * rate limited by a token bucket (LLM_RATE_PER_MINUTE, bursts of
+#     LLM_BURST) and bounded to LLM_MAX_CONCURRENCY calls at a time;
+#   * retried with exponential backoff and jitter on 429, 5xx and
+#     connection errors, honouring Retry-After;
+#   * bounded by LLM_TIMEOUT_SECONDS overall (queueing and retries
+#     included), after which it raises LLMUnavailable; callers answer
+#     with their fallback text (ai_helper).
+#
+# Sync code calls gateway.run(coro) / gateway.submit(coro); coroutines run
+# on the gateway loop, so the limits hold across every caller.
+
+
+class LLMUnavailable(Exception):
+    pass
+
+
+class TokenBucket:
+    """`rate` tokens per second, holding at most `burst`; rate <= 0 is unlimited."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = None
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return 0.0
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        waited = 0.0
+        # One waiter at a time, so tokens are handed out in arrival order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return waited
+                delay = (1.0 - self._tokens) / self.rate
+                waited += delay
+                await asyncio.sleep(delay)
+
+
+def _retry_after(error):
+    response = getattr(error, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _retryable(error):
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return status == 429 or status >= 500
+    # Connection errors and client-side timeouts (groq.APIConnectionError)
+    return type(error).__name__ in ("APIConnectionError", "APITimeoutError") or isinstance(error, ConnectionError)
+
+
+class LLMGateway:
+    def __init__(self, client=None, max_concurrency: int = 4, rate_per_minute: float = 30.0, burst: float = 5.0,
+                 timeout_s: float = 20.0, max_retries: int = 3, backoff_s: float = 0.5, backoff_max_s: float = 8.0):
+        self.client = client
+        self.max_concurrency = max(1, max_concurrency)
+        self.timeout = timeout_s
+        self.max_retries = max_retries
+        self.backoff = backoff_s
+        self.backoff_max = backoff_max_s
+        self.bucket = TokenBucket(rate_per_minute / 60.0, burst)
+
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._semaphore = None
+        self._in_flight = {}
+
+        self._requests = 0
+        self._coalesced = 0
+        self._upstream_calls = 0
+        self._retries = 0
+        self._rate_limited = 0
+        self._timeouts = 0
+        self._failures = 0
+        self._latency_total = 0.0
+        self._completed = 0
+        self._rate_wait_total = 0.0
+
+    @classmethod
+    def from_env(cls, client=None):
+        return cls(
+            client,
+            max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "4")),
+            rate_per_minute=float(os.getenv("LLM_RATE_PER_MINUTE", "30")),
+            burst=float(os.getenv("LLM_BURST", "5")),
+            timeout_s=float(os.getenv("LLM_TIMEOUT_SECONDS", "20")),
+            max_retries=int(os.getenv("LLM_MAX_RETRIES", "3")),
+            backoff_s=float(os.getenv("LLM_BACKOFF_SECONDS", "0.5")),
+            backoff_max_s=float(os.getenv("LLM_BACKOFF_MAX_SECONDS", "8")),
+        )
+
+    # ---- loop ----
+    def _ensure_loop(self):
+        if self._loop is not None:
+            return self._loop
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=loop.run_forever, name="llm-gateway", daemon=True)
+                self._thread.start()
+                self._loop = loop
+        return self._loop
+
+    def submit(self, coro) -> Future:
+        """Schedule a coroutine on the gateway loop (from any thread)."""
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+
+    def run(self, coro):
+        """Run a coroutine on the gateway loop and wait for its result."""
+        return self.submit(coro).result()
+
+    # ---- calls ----
+    async def complete(self, messages, temperature: float = 0.5, model: str = None):
+        """Chat completion text; must be awaited on the gateway loop.
+
+        Identical in-flight requests share one upstream call. Raises
+        LLMUnavailable when the call can't be completed within the timeout
+        or retries run out.
+        """
+        self._requests += 1
+        key = hashlib.sha256(
+            json.dumps([model, messages, temperature], sort_keys=True).encode("utf-8")
+        ).hexdigest()
+
+        loop = asyncio.get_running_loop()
+        entry = self._in_flight.get(key)
+        if entry is None:
+            task = loop.create_task(self._call(messages, temperature, model))
+            entry = self._in_flight[key] = (task, loop.time() + self.timeout)
+            task.add_done_callback(lambda t: self._finished(key, t))
+        else:
+            self._coalesced += 1
+        task, deadline = entry
+
+        # The deadline is enforced here, on the waiting side: the HTTP client
+        # may defer a cancellation until its request finishes. shield() so
+        # one caller giving up doesn't cancel the call for the others.
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), max(0.0, deadline - loop.time()))
+        except asyncio.TimeoutError:
+            if self._in_flight.get(key) is entry:
+                del self._in_flight[key]
+                self._timeouts += 1
+                task.cancel()
+            raise LLMUnavailable(f"LLM call timed out after {self.timeout:g}s") from None
+
+    def _finished(self, key, task):
+        if self._in_flight.get(key, (None,))[0] is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            task.exception()  # retrieved, even if every caller timed out
+
+    async def _call(self, messages, temperature, model):
+        if self.client is None:
+            raise LLMUnavailable("No LLM client configured")
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        start = time.monotonic()
+        text = await self._call_with_retries(messages, temperature, model)
+        self._completed += 1
+        self._latency_total += time.monotonic() - start
+        return text
+
+    async def _call_with_retries(self, messages, temperature, model):
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self._semaphore:
+                    self._rate_wait_total += await self.bucket.acquire()
+                    self._upstream_calls += 1
+                    resp = await self._create(messages, temperature, model)
+                return resp.choices[0].message.content.strip()
+            except Exception as e:
+                if getattr(e, "status_code", None) == 429:
+                    self._rate_limited += 1
+                if not _retryable(e) or attempt == self.max_retries:
+                    self._failures += 1
+                    raise LLMUnavailable(f"LLM call failed: {e}") from e
+                delay = min(self.backoff_max, self.backoff * 2 ** attempt) * random.uniform(0.5, 1.0)
+                delay = max(delay, _retry_after(e) or 0.0)
+
+            self._retries += 1
+            await asyncio.sleep(delay)
+
+    async def _create(self, messages, temperature, model):
+        create = self.client.chat.completions.create
+        kwargs = {"model": model, "messages": messages, "temperature": temperature}
+        if inspect.iscoroutinefunction(create):
+            return await create(**kwargs)
+        # Sync clients (e.g. a stub set via ai_helper.set_client) run off the loop
+        return await asyncio.to_thread(create, **kwargs)
+
+    def stats(self):
+        return {
+            "max_concurrency": self.max_concurrency,
+            "rate_per_minute": round(self.bucket.rate * 60, 2),
+            "timeout_s": self.timeout,
+            "requests": self._requests,
+            "coalesced": self._coalesced,
+            "upstream_calls": self._upstream_calls,
+            "retries": self._retries,
+            "rate_limited": self._rate_limited,
+            "timeouts": self._timeouts,
+            "failures": self._failures,
+            "in_flight": len(self._in_flight),
+            "avg_latency_ms": round(self._latency_total / self._completed * 1000, 1) if self._completed else 0.0,
+            "avg_rate_wait_ms": round(self._rate_wait_total / self._upstream_calls * 1000, 1)
+            if self._upstream_calls else 0.0,
+        }
@@ -1,12 +1,381 @@
-import joblib
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from datetime import datetime, timezone
 from pathlib import Path
 
+import joblib
+import numpy as np
+import pandas as pd
+
+from .attribution import build_attributor
+from .compiled_model import compile_pipeline
+from .knn_engine import enabled as knn_engine_enabled, supported as knn_supported, tree_is_faster
+from . import whatif
+
+# Versioned model registry. Each version lives in its own directory:
+#
+#   <MODEL_REGISTRY_DIR>/<version>/model.pkl
+#   <MODEL_REGISTRY_DIR>/<version>/metadata.json
+#   <MODEL_REGISTRY_DIR>/ACTIVE              name of the version to serve
+#
+# Every worker holds the active model as one immutable ActiveModel and swaps
+# the reference in a single assignment, so a reader that took the reference
+# scores and labels with the same version even while a swap happens. A
+# watcher thread re-reads ACTIVE every MODEL_RELOAD_INTERVAL seconds, loads
+# and warms the new version off the request path, then swaps; activating a
+# version therefore rolls out to all workers without a restart. With an
+# empty registry the legacy MODEL_PATH artifact is served.
+#
+# Artifacts are loaded memory-mapped: each pickle is re-dumped once,
+# uncompressed, into MODEL_MMAP_DIR (keyed by its sha256) and opened with
+# mmap_mode="r", so the large arrays (KNN training matrix, coefficients)
+# are read-only views onto the file and every worker shares the same pages
+# through the OS page cache. MODEL_MMAP=0 falls back to a private unpickle.
+
 MODEL_PATH = "backend/models/churn_model.pkl"
+REGISTRY_DIR = Path(os.getenv("MODEL_REGISTRY_DIR", "backend/models/registry"))
+RELOAD_INTERVAL = float(os.getenv("MODEL_RELOAD_INTERVAL", "5"))
+ACTIVE_FILE = "ACTIVE"
+USE_MMAP = os.getenv("MODEL_MMAP", "1") != "0"
+MMAP_DIR = Path(os.getenv("MODEL_MMAP_DIR", "backend/models/.mmap"))
+VERSION_NAME = re.compile(r"[A-Za-z0-9][A-Za-z0-9._-]{0,127}")
 
-model = None
+# Representative input for warm-up inference
+WARMUP_ROW = {
+    "gender": "Female", "SeniorCitizen": 0, "Partner": "No", "Dependents": "No",
+    "tenure": 12, "PhoneService": "Yes", "MultipleLines": "No", "InternetService": "DSL",
+    "OnlineSecurity": "No", "OnlineBackup": "No", "DeviceProtection": "No",
+    "TechSupport": "No", "StreamingTV": "No", "StreamingMovies": "No",
+    "Contract": "Month-to-month", "PaperlessBilling": "Yes", "PaymentMethod": "Electronic check",
+    "MonthlyCharges": 70.0, "TotalCharges": 840.0,
+}
 
-def load_model():
-    global model
-    if model is None:
-        model = joblib.load(MODEL_PATH)
+
+def _has_memmap(obj, depth=0):
+    # True if any array reachable from the fitted estimator is file-backed
+    if isinstance(obj, np.memmap):
+        return True
+    if depth > 4:
+        return False
+    if isinstance(obj, (list, tuple)):
+        return any(_has_memmap(o, depth + 1) for o in obj)
+    if hasattr(obj, "__dict__") and not isinstance(obj, type):
+        return any(_has_memmap(v, depth + 1) for v in vars(obj).values())
+    return False
+
+
+class ActiveModel:
+    def __init__(self, version: str, pipeline, metadata: dict):
+        self.version = version
+        self.pipeline = pipeline
+        self.compiled = compile_pipeline(pipeline, knn_engine_enabled(metadata.get("knn_engine")))
+        self.metadata = metadata
+        self.loaded_at = time.time()
+        self.warmup_ms = None
+        self.memory_mapped = _has_memmap(pipeline)
+        self.attributor = build_attributor(self)
+        self._whatif = None
+        self._whatif_check = None
+        self._whatif_lock = threading.Lock()
+
+    def predict_rows(self, rows):
+        # Churn probabilities for a list of feature dicts, in one vectorized call.
+        if self.compiled is not None:
+            return self.compiled.predict_proba(self.compiled.encode_many(rows))
+        return self.pipeline.predict_proba(pd.DataFrame(rows))[:, 1]
+
+    def reasons_rows(self, rows):
+        # Local attribution reasons for a list of feature dicts
+        if self.attributor is None:
+            return [[] for _ in rows]
+        return self.attributor.reasons(self.compiled.encode_many(rows))
+
+    def score_frame(self, X: pd.DataFrame, reasons: bool = False):
+        # Batch scoring: sklearn preprocessing, then the compiled estimator
+        # (indexed KNN engine) and, if asked, attribution reasons from the
+        # same encoded matrix. Returns (probabilities, reasons or None).
+        if self.compiled is None:
+            return self.pipeline.predict_proba(X)[:, 1], None
+        encoded = self.pipeline[:-1].transform(X)
+        encoded = encoded.toarray() if hasattr(encoded, "toarray") else np.asarray(encoded)
+        explained = self.attributor.reasons(encoded) if reasons and self.attributor is not None else None
+        return self.compiled.predict_proba(encoded), explained
+
+    def predict_frame(self, X: pd.DataFrame):
+        return self.score_frame(X)[0]
+
+    @property
+    def whatif(self):
+        # Scoring grid for the simple form, built on first use. None when
+        # WHATIF_GRID=0.
+        if self._whatif is None and whatif.ENABLED:
+            with self._whatif_lock:
+                if self._whatif is None:
+                    self._whatif = whatif.ScoringGrid(self)
+        return self._whatif
+
+    @property
+    def serving_grid(self):
+        # The grid when it may answer for this model, else None. The sampled
+        # error check runs once per loaded version; a model that fails it
+        # never has its grid built for scoring.
+        if not whatif.ENABLED:
+            return None
+        if self._whatif_check is None:
+            with self._whatif_lock:
+                if self._whatif_check is None:
+                    self._whatif_check = whatif.check_error(self)
+        if self._whatif_check["max"] > whatif.MAX_ERROR:
+            return None
+        grid = self.whatif
+        return grid if grid.accurate else None
+
+    def warm_up(self, batch_size: int = 64):
+        # First calls pay for lazy imports, BLAS thread pools and page faults
+        start = time.perf_counter()
+        self.predict_rows([WARMUP_ROW])
+        self.predict_rows([WARMUP_ROW] * batch_size)
+        self.pipeline.predict_proba(pd.DataFrame([WARMUP_ROW] * batch_size))
+        self.warmup_ms = round((time.perf_counter() - start) * 1000, 2)
+        return self
+
+    def info(self):
+        return {
+            "version": self.version,
+            "compiled": self.compiled is not None,
+            "knn_engine": self.compiled is not None and self.compiled.engine is not None,
+            "attribution": self.attributor.method if self.attributor is not None else None,
+            "memory_mapped": self.memory_mapped,
+            "whatif_grid": self._whatif.info() if self._whatif is not None else None,
+            "whatif_check": self._whatif_check,
+            "loaded_at": self.loaded_at,
+            "warmup_ms": self.warmup_ms,
+            "metadata": self.metadata,
+        }
+
+
+_active = None
+_lock = threading.Lock()
+_watcher = None
+_failed_version = None
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def mmap_artifact(pkl_path, sha256: str):
+    # Uncompressed joblib file: numpy arrays are stored raw and aligned, so
+    # joblib.load(mmap_mode="r") maps them instead of copying.
+    target = MMAP_DIR / f"{sha256[:16]}.joblib"
+    if not target.exists():
+        MMAP_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = MMAP_DIR / f".{target.name}.{os.getpid()}.tmp"
+        joblib.dump(joblib.load(pkl_path), tmp)
+        os.replace(tmp, target)
+    return target
+
+
+def load_artifact(pkl_path, sha256: str):
+    if USE_MMAP:
+        try:
+            return joblib.load(mmap_artifact(pkl_path, sha256), mmap_mode="r")
+        except OSError as e:
+            print(f"⚠️ Memory-mapped model unavailable ({e}); loading {pkl_path} in-process")
+    return joblib.load(pkl_path)
+
+
+def list_versions():
+    if not REGISTRY_DIR.exists():
+        return []
+    versions = []
+    for meta_path in sorted(REGISTRY_DIR.glob("*/metadata.json")):
+        with open(meta_path) as f:
+            versions.append(json.load(f))
+    return sorted(versions, key=lambda m: m.get("created_at", ""))
+
+
+def active_version_name():
+    try:
+        return (REGISTRY_DIR / ACTIVE_FILE).read_text().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def register(artifact_path, version: str, metrics: dict = None, notes: str = None, activate: bool = False,
+             knn_engine: bool = None):
+    """Copy a fitted pipeline into the registry as `version`.
+
+    The artifact is written to a temporary directory and renamed into place,
+    so a half-copied version is never visible to workers. For KNN models
+    `knn_engine` (measured here when None) records whether the version is
+    served through the neighbour index.
+    """
+    if not valid_version_name(version):
+        raise ValueError(f"Invalid model version name '{version}'")
+    target = REGISTRY_DIR / version
+    if target.exists():
+        raise ValueError(f"Model version '{version}' already exists")
+
+    REGISTRY_DIR.mkdir(parents=True, exist_ok=True)
+    staging = REGISTRY_DIR / f".{version}.tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir()
+
+    shutil.copyfile(artifact_path, staging / "model.pkl")
+    pipeline = joblib.load(staging / "model.pkl")
+    metadata = {
+        "version": version,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "source": str(artifact_path),
+        "sha256": _sha256(staging / "model.pkl"),
+        "estimator": type(pipeline.steps[-1][1]).__name__ if hasattr(pipeline, "steps") else type(pipeline).__name__,
+        "metrics": metrics or {},
+        "notes": notes,
+    }
+    estimator = pipeline.steps[-1][1] if hasattr(pipeline, "steps") else pipeline
+    if knn_engine is None and knn_supported(estimator):
+        # Decided once here so every worker serves the version the same way
+        knn_engine = tree_is_faster(estimator)
+    if knn_engine is not None:
+        metadata["knn_engine"] = bool(knn_engine)
+    with open(staging / "metadata.json", "w") as f:
+        json.dump(metadata, f, indent=2)
+    os.replace(staging, target)
+
+    if activate:
+        set_active_version(version)
+    return metadata
+
+
+def valid_version_name(version: str):
+    # Plain directory names only: no separators, no "..", no hidden files
+    return bool(VERSION_NAME.fullmatch(version or ""))
+
+
+def has_version(version: str):
+    return valid_version_name(version) and (REGISTRY_DIR / version / "model.pkl").exists()
+
+
+def set_active_version(version: str):
+    if not has_version(version):
+        raise ValueError(f"Unknown model version '{version}'")
+    tmp = REGISTRY_DIR / f".{ACTIVE_FILE}.tmp"
+    tmp.write_text(version)
+    os.replace(tmp, REGISTRY_DIR / ACTIVE_FILE)
+
+
+def _load(version):
+    if version is None:
+        # Legacy single-artifact layout
+        metadata = {"version": None, "source": MODEL_PATH, "sha256": _sha256(MODEL_PATH)}
+        metadata["version"] = f"churn_model-{metadata['sha256'][:8]}"
+        return ActiveModel(metadata["version"], load_artifact(MODEL_PATH, metadata["sha256"]), metadata)
+
+    directory = REGISTRY_DIR / version
+    with open(directory / "metadata.json") as f:
+        metadata = json.load(f)
+    return ActiveModel(version, load_artifact(directory / "model.pkl", metadata["sha256"]), metadata)
+
+
+def _prepare(version, warm_up: bool = True):
+    candidate = _load(version)
+    if warm_up:
+        candidate.warm_up()
+        candidate.serving_grid  # check (and only then build) the what-if grid before taking traffic
+    return candidate
+
+
+def _swap(candidate):
+    global _active
+    with _lock:
+        _active = candidate
+    return candidate
+
+
+def activate(version: str = None, warm_up: bool = True):
+    # Load (and warm) first, then swap the reference; readers never wait on I/O.
+    return _swap(_prepare(version if version is not None else active_version_name(), warm_up))
+
+
+def promote(version: str):
+    """Load and warm `version`, then point ACTIVE at it and serve it here.
+
+    ACTIVE is only written once the model has loaded, so a version that
+    can't be loaded never reaches the other workers.
+    """
+    candidate = _prepare(version)
+    set_active_version(version)
+    return _swap(candidate)
+
+
+def get_active():
+    global _active
+    if _active is None:
+        with _lock:
+            if _active is None:
+                # Used outside the app (scripts, benchmarks): load lazily
+                _active = _load(active_version_name())
+    return _active
+
+
+def refresh():
+    # Catch up with ACTIVE without a watcher (batch job processes)
+    wanted = active_version_name()
+    if wanted is not None and wanted != get_active().version:
+        activate(wanted, warm_up=False)
+    return get_active()
+
+
+def _watch():
+    global _failed_version
+    while True:
+        time.sleep(RELOAD_INTERVAL)
+        wanted = active_version_name()
+        if wanted is None or wanted == _failed_version or (_active is not None and wanted == _active.version):
+            continue
+        try:
+            activate(wanted)
+            print(f"🔁 Switched to model version {wanted}")
+        except Exception as e:
+            # Keep serving the current model; retry once ACTIVE changes again
+            _failed_version = wanted
+            print(f"⚠️ Could not load model version {wanted}: {e}")
+
+
+def start(warm_up: bool = True):
+    # Called from the app lifespan: load + warm the active version, then
+    # follow ACTIVE for hot swaps.
+    global _watcher
+    model = activate(warm_up=warm_up)
+    if _watcher is None and RELOAD_INTERVAL > 0:
+        _watcher = threading.Thread(target=_watch, name="model-watcher", daemon=True)
+        _watcher.start()
     return model
+
+
+def load_model():
+    return get_active().pipeline
+
+
+def load_compiled_model():
+    return get_active().compiled
+
+
+def predict_rows(rows):
+    return get_active().predict_rows(rows)
+
+
+def score_rows(rows):
+    # (probability, model version) per row, all from one model snapshot
+    model = get_active()
+    return [(float(p), model.version) for p in model.predict_rows(rows)]
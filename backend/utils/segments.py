@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+
+# Segment profile of a scored batch: churn rate and revenue at risk by
+# contract, payment method, tenure band and service bundle. Each scored
+# chunk goes through one groupby over all four keys together; the joint
+# cells are summed across chunks and every per-dimension view is a sum of
+# those cells, so the upload is never grouped twice.
+#
+# "Revenue at risk" is the expected monthly revenue lost to churn,
+# sum(probability * MonthlyCharges).
+
+DIMENSIONS = ["contract", "payment_method", "tenure_band", "service_bundle"]
+MEASURES = ["rows", "likely_churn", "probability", "monthly_revenue", "revenue_at_risk"]
+
+TENURE_EDGES = [12, 24, 48, 72]
+TENURE_BANDS = ["0-12 months", "13-24 months", "25-48 months", "49-72 months", "72+ months"]
+
+# phone | internet << 1 | streaming << 2 (streaming needs internet)
+SERVICE_BUNDLES = {
+    0: "No services", 1: "Phone only", 2: "Internet only", 3: "Phone + Internet",
+    6: "Internet + Streaming", 7: "Phone + Internet + Streaming",
+}
+
+TOP_SEGMENTS = 5
+MIN_SEGMENT_ROWS = 30
+COMPACT_EVERY = 64
+
+
+def service_bundle(X: pd.DataFrame):
+    phone = (X["PhoneService"] == "Yes").to_numpy()
+    internet = (X["InternetService"] != "No").to_numpy()
+    streaming = ((X["StreamingTV"] == "Yes") | (X["StreamingMovies"] == "Yes")).to_numpy() & internet
+    return phone.astype(np.int8) | internet.astype(np.int8) << 1 | streaming.astype(np.int8) << 2
+
+
+class SegmentProfile:
+    def __init__(self):
+        self._cells = []
+
+    def add(self, X: pd.DataFrame, probabilities, likely_churn):
+        """Fold one scored chunk (model input, probabilities, label mask) in."""
+        probabilities = np.asarray(probabilities, dtype=np.float64)
+        monthly = X["MonthlyCharges"].to_numpy(dtype=np.float64)
+        frame = pd.DataFrame({
+            "contract": X["Contract"],
+            "payment_method": X["PaymentMethod"],
+            "tenure_band": np.searchsorted(TENURE_EDGES, X["tenure"].to_numpy()),
+            "service_bundle": service_bundle(X),
+            "rows": 1,
+            "likely_churn": np.asarray(likely_churn, dtype=np.int64),
+            "probability": probabilities,
+            "monthly_revenue": monthly,
+            "revenue_at_risk": probabilities * monthly,
+        }, index=X.index)
+
+        cells = frame.groupby(DIMENSIONS, observed=True, sort=False)[MEASURES].sum().reset_index()
+        # Chunks factorize categories independently; align on the labels
+        for col in ("contract", "payment_method"):
+            cells[col] = cells[col].astype(str)
+        self._cells.append(cells)
+        if len(self._cells) >= COMPACT_EVERY:
+            self._cells = [self.cells()]
+
+    def cells(self):
+        if not self._cells:
+            return pd.DataFrame(columns=DIMENSIONS + MEASURES)
+        merged = pd.concat(self._cells, ignore_index=True)
+        return merged.groupby(DIMENSIONS, sort=False)[MEASURES].sum().reset_index()
+
+    @staticmethod
+    def _summary(row):
+        rows = int(row["rows"])
+        return {
+            "rows": rows,
+            "likely_churn": int(row["likely_churn"]),
+            "churn_rate": round(row["likely_churn"] / rows, 4) if rows else 0.0,
+            "avg_probability": round(row["probability"] / rows, 4) if rows else 0.0,
+            "monthly_revenue": round(float(row["monthly_revenue"]), 2),
+            "revenue_at_risk": round(float(row["revenue_at_risk"]), 2),
+        }
+
+    def profile(self):
+        """Structured profile: totals, one table per dimension (highest
+        revenue at risk first) and the riskiest joint segments."""
+        cells = self.cells()
+        cells["tenure_band"] = [TENURE_BANDS[int(b)] for b in cells["tenure_band"]]
+        cells["service_bundle"] = [SERVICE_BUNDLES.get(int(b), "Other") for b in cells["service_bundle"]]
+        total = cells[MEASURES].sum()
+
+        segments = {}
+        for dim in DIMENSIONS:
+            table = cells.groupby(dim, sort=False)[MEASURES].sum()
+            table = table.sort_values("revenue_at_risk", ascending=False)
+            segments[dim] = [
+                {"segment": name, "share": round(row["rows"] / total["rows"], 4), **self._summary(row)}
+                for name, row in table.iterrows()
+            ]
+
+        riskiest = cells[cells["rows"] >= MIN_SEGMENT_ROWS].nlargest(TOP_SEGMENTS, "revenue_at_risk")
+        return {
+            **self._summary(total),
+            "segments": segments,
+            "top_segments": [
+                {**{dim: row[dim] for dim in DIMENSIONS}, **self._summary(row)}
+                for _, row in riskiest.iterrows()
+            ],
+        }
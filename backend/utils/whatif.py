@@ -0,0 +1,169 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from .features import DEFAULTS, prepare_frame
+
+# Precomputed scores for the /predict/simple input space. Only tenure,
+# Contract, PaymentMethod and MonthlyCharges vary there (everything else is
+# features.DEFAULTS, TotalCharges = MonthlyCharges * tenure), so the model
+# is scored once, when it is loaded, on every
+#
+#   tenure 0..72  x  contract  x  payment method  x  charge knot
+#
+# and a query becomes an array lookup with linear interpolation between the
+# two surrounding charge knots. The interpolation error is measured against
+# the real model on WHATIF_ERROR_SAMPLES random inputs at build time and
+# reported with every answer; /predict/simple only answers from the grid
+# when that measured maximum is within WHATIF_MAX_ERROR.
+#
+# Whether a model's grid can meet WHATIF_MAX_ERROR is checked first, without
+# building it: check_error() scores WHATIF_CHECK_SAMPLES random inputs and
+# their two charge knots. The full grid is only built at load when that
+# check passes; otherwise it waits for a request that needs the surface.
+
+ENABLED = os.getenv("WHATIF_GRID", "1") != "0"
+CHARGE_MIN = float(os.getenv("WHATIF_CHARGE_MIN", "18"))
+CHARGE_MAX = float(os.getenv("WHATIF_CHARGE_MAX", "120"))
+CHARGE_STEP = float(os.getenv("WHATIF_CHARGE_STEP", "1.0"))
+MAX_ERROR = float(os.getenv("WHATIF_MAX_ERROR", "0.01"))
+ERROR_SAMPLES = int(os.getenv("WHATIF_ERROR_SAMPLES", "2000"))
+CHECK_SAMPLES = int(os.getenv("WHATIF_CHECK_SAMPLES", "200"))
+
+TENURE_MAX = 72
+CONTRACTS = ["Month-to-month", "One year", "Two year"]
+PAYMENT_METHODS = ["Electronic check", "Mailed check", "Bank transfer (automatic)", "Credit card (automatic)"]
+
+
+def _categories(model, column, fallback):
+    # Categories the fitted one-hot encoder knows, in its order
+    if model.compiled is not None:
+        for col, table, _ in model.compiled.onehot:
+            if col == column:
+                return sorted(table, key=table.get)
+    return list(fallback)
+
+
+def _error_stats(approx, exact):
+    error = np.abs(approx - exact)
+    return {
+        "samples": len(error),
+        "max": round(float(error.max()), 4),
+        "p99": round(float(np.quantile(error, 0.99)), 4),
+        "mean": round(float(error.mean()), 4),
+        "label_agreement": round(float(((approx > 0.5) == (exact > 0.5)).mean()), 4),
+    }
+
+
+def check_error(model, n: int = CHECK_SAMPLES, charge_min: float = CHARGE_MIN, charge_max: float = CHARGE_MAX,
+                charge_step: float = CHARGE_STEP):
+    """Interpolation error a ScoringGrid would have, from `n` random inputs
+    and their two surrounding charge knots (3n rows scored, no grid)."""
+    rng = np.random.default_rng(1)
+    contracts = np.asarray(_categories(model, "Contract", CONTRACTS))
+    payment_methods = np.asarray(_categories(model, "PaymentMethod", PAYMENT_METHODS))
+    knots = np.round(np.arange(charge_min, charge_max + charge_step / 2, charge_step), 6)
+
+    tenure = rng.integers(0, TENURE_MAX + 1, n)
+    contract = contracts[rng.integers(0, len(contracts), n)]
+    payment = payment_methods[rng.integers(0, len(payment_methods), n)]
+    charges = rng.uniform(knots[0], knots[-1], n)
+    position = (charges - knots[0]) / charge_step
+    low = np.clip(np.floor(position).astype(int), 0, len(knots) - 2)
+
+    scores = ScoringGrid._score(model, np.tile(tenure, 3), np.tile(contract, 3), np.tile(payment, 3),
+                                np.concatenate([charges, knots[low], knots[low + 1]]))
+    exact, below, above = scores[:n], scores[n:2 * n], scores[2 * n:]
+    weight = np.clip(position - low, 0.0, 1.0)
+    return _error_stats(below + (above - below) * weight, exact)
+
+
+class ScoringGrid:
+    def __init__(self, model, charge_min: float = CHARGE_MIN, charge_max: float = CHARGE_MAX,
+                 charge_step: float = CHARGE_STEP, error_samples: int = ERROR_SAMPLES):
+        start = time.perf_counter()
+        self.version = model.version
+        self.tenure = np.arange(TENURE_MAX + 1)
+        self.contracts = _categories(model, "Contract", CONTRACTS)
+        self.payment_methods = _categories(model, "PaymentMethod", PAYMENT_METHODS)
+        self.charges = np.round(np.arange(charge_min, charge_max + charge_step / 2, charge_step), 6)
+        self.charge_min, self.charge_step = float(self.charges[0]), charge_step
+
+        shape = (len(self.tenure), len(self.contracts), len(self.payment_methods), len(self.charges))
+        t, c, p, m = np.indices(shape).reshape(4, -1)
+        self.probabilities = self._score(
+            model, self.tenure[t], np.asarray(self.contracts)[c], np.asarray(self.payment_methods)[p], self.charges[m]
+        ).reshape(shape)
+        self.build_ms = round((time.perf_counter() - start) * 1000, 1)
+        self.error = self._measure_error(model, error_samples)
+
+    @staticmethod
+    def _score(model, tenure, contract, payment_method, monthly_charges):
+        frame = pd.DataFrame(
+            {col: value for col, value in DEFAULTS.items() if col != "TotalCharges"}, index=range(len(tenure))
+        )
+        frame["tenure"] = tenure
+        frame["Contract"] = contract
+        frame["PaymentMethod"] = payment_method
+        frame["MonthlyCharges"] = monthly_charges
+        frame["TotalCharges"] = np.nan
+        X, _ = prepare_frame(frame)
+        return model.predict_frame(X)
+
+    def _measure_error(self, model, n):
+        rng = np.random.default_rng(0)
+        tenure = rng.integers(0, TENURE_MAX + 1, n)
+        contract = rng.integers(0, len(self.contracts), n)
+        payment = rng.integers(0, len(self.payment_methods), n)
+        charges = rng.uniform(self.charges[0], self.charges[-1], n)
+
+        exact = self._score(model, tenure, np.asarray(self.contracts)[contract],
+                            np.asarray(self.payment_methods)[payment], charges)
+        return _error_stats(self._interpolate(tenure, contract, payment, charges), exact)
+
+    def _interpolate(self, tenure, contract, payment, charges):
+        tenure, contract, payment, charges = (np.atleast_1d(v) for v in (tenure, contract, payment, charges))
+        position = (charges.astype(float) - self.charge_min) / self.charge_step
+        low = np.clip(np.floor(position).astype(int), 0, len(self.charges) - 2)
+        weight = np.clip(position - low, 0.0, 1.0)
+        below = self.probabilities[tenure, contract, payment, low]
+        above = self.probabilities[tenure, contract, payment, low + 1]
+        return below + (above - below) * weight
+
+    @property
+    def accurate(self):
+        return self.error["max"] <= MAX_ERROR
+
+    def lookup(self, tenure: int, contract: str, payment_method: str, monthly_charges: float):
+        # Interpolated probability, or None outside the grid
+        if not (0 <= tenure <= TENURE_MAX and self.charges[0] <= monthly_charges <= self.charges[-1]):
+            return None
+        try:
+            c, p = self.contracts.index(contract), self.payment_methods.index(payment_method)
+        except ValueError:
+            return None
+        position = (monthly_charges - self.charge_min) / self.charge_step
+        low = min(int(position), len(self.charges) - 2)
+        cell = self.probabilities[int(tenure), c, p]
+        below, above = float(cell[low]), float(cell[low + 1])
+        return below + (above - below) * min(position - low, 1.0)
+
+    def surface(self, contract: str, payment_method: str):
+        # tenure x charge-knot probabilities (exact model scores at the knots)
+        return self.probabilities[:, self.contracts.index(contract), self.payment_methods.index(payment_method)]
+
+    def info(self):
+        return {
+            "model_version": self.version,
+            "tenure": [int(self.tenure[0]), int(self.tenure[-1])],
+            "contracts": self.contracts,
+            "payment_methods": self.payment_methods,
+            "monthly_charges": {"min": float(self.charges[0]), "max": float(self.charges[-1]),
+                                "step": self.charge_step, "knots": len(self.charges)},
+            "cells": int(self.probabilities.size),
+            "build_ms": self.build_ms,
+            "error": self.error,
+            "serves_simple_predictions": self.accurate,
+        }
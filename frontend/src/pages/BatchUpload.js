@@ -68,6 +68,25 @@ export default function BatchUpload() {
     }
   };
 
+  const pollSummary = async (summaryKey, attempts = 6) => {
+    for (let i = 0; i < attempts; i++) {
+      try {
+        const res = await api.get(`/predict/batch/summary/${summaryKey}?wait=10`, { timeout: 15000 });
+        if (res.data.summary_status !== "pending") {
+          setResult((prev) => prev && prev.summary_key === summaryKey
+            ? { ...prev, ...res.data }
+            : prev);
+          return;
+        }
+      } catch (err) {
+        console.log(err?.response?.data);
+        // 404: no such summary; anything else (timeout, restart) is retried
+        if (err?.response?.status === 404) return;
+        await new Promise((resolve) => setTimeout(resolve, 2000));
+      }
+    }
+  };
+
   const handleUpload = async () => {
     if (!file) {
       setError("Please select a CSV file first");
@@ -87,6 +106,11 @@ export default function BatchUpload() {
       });
 
       setResult(res.data);
+
+      // AI summary is generated in the background — long-poll for it
+      if (res.data.summary_status === "pending") {
+        pollSummary(res.data.summary_key);
+      }
     } catch (err) {
       console.log(err?.response?.data);
       setError("Batch prediction failed. Please check your CSV format.");
@@ -237,13 +261,19 @@ export default function BatchUpload() {
             </Card>
 
             {/* AI SUMMARY */}
-            {result.summary && (
+            {(result.summary || result.summary_status === "pending") && (
               <Card elevation={3} sx={{ borderRadius: 3, bgcolor: 'primary.50' }}>
                 <CardContent>
                   <Typography variant="h6" color="primary.dark" sx={{ mb: 2, display: 'flex', alignItems: 'center', gap: 1 }}>
                     <AutoAwesome /> Strategic Insights
                   </Typography>
-                  <FormattedReport text={result.summary} />
+                  {result.summary_status === "pending" ? (
+                    <Typography variant="body2" color="text.secondary">
+                      Generating summary…
+                    </Typography>
+                  ) : (
+                    <FormattedReport text={result.summary} />
+                  )}
                 </CardContent>
               </Card>
             )}
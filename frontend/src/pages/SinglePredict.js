@@ -84,6 +84,23 @@ export default function SinglePredict() {
   const [error, setError] = useState(null);
   const [loading, setLoading] = useState(false);
 
+  const pollExplanation = async (predictionId, attempts = 6) => {
+    for (let i = 0; i < attempts; i++) {
+      try {
+        const res = await api.get(`/predict/${predictionId}/explanation?wait=10`, { timeout: 15000 });
+        if (res.data.explanation_status !== "pending") {
+          setResult((prev) => prev && prev.prediction_id === predictionId
+            ? { ...prev, ...res.data }
+            : prev);
+          return;
+        }
+      } catch (err) {
+        console.log(err?.response?.data);
+        return;
+      }
+    }
+  };
+
   const handleSubmit = async (e) => {
     e.preventDefault();
     setError(null);
@@ -102,6 +119,11 @@ export default function SinglePredict() {
       const res = await api.post("/predict/simple", payload);
       setResult(res.data);
 
+      // AI explanation is generated in the background — long-poll for it
+      if (res.data.explanation_status === "pending") {
+        pollExplanation(res.data.prediction_id);
+      }
+
     } catch (err) {
       console.log(err?.response?.data);
       setError(
@@ -263,7 +285,13 @@ export default function SinglePredict() {
                         <AutoAwesome color="warning" /> AI Insights
                       </Typography>
                       {/* CUSTOM FORMATTER */}
-                      <FormattedReport text={result.explanation} />
+                      {result.explanation_status === "pending" ? (
+                        <Typography variant="body2" color="text.secondary" sx={{ mt: 2 }}>
+                          Generating explanation…
+                        </Typography>
+                      ) : (
+                        <FormattedReport text={result.explanation} />
+                      )}
                     </Box>
                   </CardContent>
                 </Card>